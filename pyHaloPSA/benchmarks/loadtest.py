@@ -0,0 +1,386 @@
+"""
+Load Test
+=========
+
+Drive a long lived HaloAPI with get, lookup and pagination calls against a
+local mock server, to find its saturation point and catch slow leaks.
+
+Usage::
+
+    cd pyHaloPSA
+    python -m benchmarks.loadtest sweep --levels 1,2,4,8,16,32,64
+    python -m benchmarks.loadtest soak --hours 6 --interval 60 --json r.json
+
+``sweep`` runs each concurrency level for ``--duration`` seconds and
+reports throughput and latency percentiles per level. The saturation point
+is the first level where adding workers no longer raises throughput by
+``--gain`` while p95 latency keeps growing.
+
+``soak`` runs one concurrency level for hours, sampling RSS, live object
+counts and the size of the client's caches and auth state every
+``--interval`` seconds. Short lived tokens (``--token-seconds``) make the
+client re-authenticate throughout the run. A metric is flagged as leaking
+when it keeps growing after warm up. The mock server runs in the same
+process, so its memory is part of the RSS.
+"""
+
+# python
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from time import monotonic, perf_counter, sleep
+
+# local
+from .mock_halo import RECORD_COUNTS, MockHaloServer
+from .transport_bench import _settings_env
+
+OPERATIONS: tuple[str, ...] = ("get", "lookup", "page")
+"""Operations a worker picks from"""
+
+
+def rss_bytes() -> int:
+    """rss_bytes
+
+    Resident set size of this process. Falls back to the peak RSS where
+    ``/proc`` is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KiB elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mix(value: str) -> dict[str, int]:
+    """_mix
+
+    Parse ``get=3,lookup=2,page=1`` into operation weights.
+    """
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                f"operation ({name}) not found, options include: {OPERATIONS}"
+            )
+        weights[name] = int(weight or 1)
+    return weights
+
+
+class Load:
+    """
+    Load
+    ====
+
+    Worker threads calling a shared HaloAPI until stopped.
+    """
+
+    def __init__(self, api: object, mix: dict[str, int], seed: int = 0):
+        self.api = api
+        self.names: list[str] = list(mix)
+        self.weights: list[int] = list(mix.values())
+        self.seed: int = seed
+        self._stop: threading.Event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._results: list[list[tuple[str, float, bool]]] = []
+
+    def _call(self, op: str, rng: random.Random) -> None:
+        if op == "get":
+            pk = rng.randint(1, RECORD_COUNTS["clients"])
+            self.api.get("clients", pk=pk)
+        elif op == "lookup":
+            n = rng.randint(1, RECORD_COUNTS["agents"])
+            self.api.lookup("agents", f"Agent {n}")
+        else:
+            for _ in self.api.iter_pages("suppliers", page_size=25):
+                pass
+
+    def _work(self, n: int, results: list) -> None:
+        rng = random.Random(self.seed + n)
+        while not self._stop.is_set():
+            op = rng.choices(self.names, self.weights)[0]
+            start = perf_counter()
+            try:
+                self._call(op, rng)
+                ok = True
+            except Exception:
+                ok = False
+            results.append((op, perf_counter() - start, ok))
+
+    def start(self, workers: int) -> None:
+        self._stop.clear()
+        self._results = [[] for _ in range(workers)]
+        self._threads = [
+            threading.Thread(target=self._work, args=(n, results))
+            for n, results in enumerate(self._results)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> list[tuple[str, float, bool]]:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        return self.take()
+
+    def take(self) -> list[tuple[str, float, bool]]:
+        """take
+
+        Results recorded since the last call.
+        """
+        taken = []
+        for results in self._results:
+            count = len(results)
+            taken += results[:count]
+            del results[:count]
+        return taken
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def summarize(results: list, seconds: float) -> dict[str, any]:
+    """summarize
+
+    Throughput, latency percentiles (ms) and errors of a run.
+    """
+    latencies = sorted(r[1] for r in results if r[2])
+    by_op = Counter(r[0] for r in results)
+    return {
+        "ops": len(results),
+        "ops_per_s": len(results) / seconds,
+        "errors": sum(1 for r in results if not r[2]),
+        "p50": _percentile(latencies, 0.50) * 1000,
+        "p95": _percentile(latencies, 0.95) * 1000,
+        "p99": _percentile(latencies, 0.99) * 1000,
+        "by_op": dict(by_op),
+    }
+
+
+def saturation(rows: list[dict], gain: float) -> int | None:
+    """saturation
+
+    The first concurrency level whose throughput is less than ``gain``
+    above the previous level while its p95 latency is higher.
+    """
+    for prev, row in zip(rows, rows[1:]):
+        if (
+            row["ops_per_s"] < prev["ops_per_s"] * (1 + gain)
+            and row["p95"] > prev["p95"]
+        ):
+            return row["concurrency"]
+    return None
+
+
+def sweep(api: object, args: argparse.Namespace) -> dict[str, any]:
+    load = Load(api, args.mix, args.seed)
+    rows = []
+    print(
+        f"{'workers':>8}{'ops/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'errors':>8}"
+    )
+    for level in args.levels:
+        load.start(level)
+        sleep(args.duration)
+        row = {"concurrency": level, **summarize(load.stop(), args.duration)}
+        rows.append(row)
+        print(
+            f"{level:>8}{row['ops_per_s']:>10.0f}{row['p50']:>9.1f}"
+            f"{row['p95']:>9.1f}{row['p99']:>9.1f}{row['errors']:>8}"
+        )
+    knee = saturation(rows, args.gain)
+    print(f"saturation: {knee if knee else 'not reached'}")
+    return {"mode": "sweep", "levels": rows, "saturation": knee}
+
+
+def probes(api: object, server: MockHaloServer) -> dict[str, int]:
+    """probes
+
+    Sizes of the client state that would grow with a leak: auth headers,
+    caches, indexes, metrics, scheduler and connections.
+    """
+    auth = api._auth
+    prefetcher = api._prefetcher
+    return {
+        "auth_query_headers": len(auth._query_headers.data_list),
+        "auth_headers": len(auth._auth_headers.data_list),
+        "prefetch_cache": sum(
+            len(c) for c in (prefetcher._cache if prefetcher else {}).values()
+        ),
+        "index_records": sum(
+            len(api.get_index(n)) for n in api.list_indexes()
+        ),
+        "metrics_keys": len(api.metrics.summary()),
+        "scheduler_waiting": api.scheduler.stats()["waiting"],
+        "connections": server.connections,
+    }
+
+
+def _trend(values: list[float]) -> tuple[float, float]:
+    """_trend
+
+    Least squares slope per sample, and the share of steps that grew.
+    """
+    n = len(values)
+    if n < 3:
+        return 0.0, 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    var = sum((x - mean_x) ** 2 for x in range(n))
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    rises = sum(1 for a, b in zip(values, values[1:]) if b > a)
+    return slope / var, rises / (n - 1)
+
+
+def leaks(samples: list[dict], warmup: int) -> dict[str, dict]:
+    """leaks
+
+    Metrics that kept growing after the first ``warmup`` samples: a
+    positive trend, growth in most intervals and a total rise above the
+    metric's noise floor (2 MiB of RSS, 1% of objects, any probe growth).
+    """
+    steady = samples[warmup:]
+    flagged = {}
+    if len(steady) < 3:
+        return flagged
+    names = ["rss", "objects", *steady[0]["probes"]]
+    for name in names:
+        values = [
+            s["probes"][name] if name in s["probes"] else s[name]
+            for s in steady
+        ]
+        slope, rising = _trend(values)
+        rise = values[-1] - values[0]
+        floor = {"rss": 2 * 2**20, "objects": values[0] * 0.01}.get(name, 0)
+        if slope > 0 and rising >= 0.5 and rise > floor:
+            flagged[name] = {
+                "start": values[0],
+                "end": values[-1],
+                "per_hour": slope * 3600 / steady[1]["interval"],
+            }
+    return flagged
+
+
+def soak(
+    api: object, server: MockHaloServer, args: argparse.Namespace
+) -> dict[str, any]:
+    load = Load(api, args.mix, args.seed)
+    seconds = args.hours * 3600
+    samples = []
+    baseline: Counter = None
+    load.start(args.concurrency)
+    started = monotonic()
+    try:
+        while monotonic() - started < seconds:
+            sleep(args.interval)
+            gc.collect()
+            objects = gc.get_objects()
+            types = Counter(type(o).__name__ for o in objects)
+            del objects
+            if baseline is None:
+                baseline = types
+            stats = summarize(load.take(), args.interval)
+            sample = {
+                "elapsed": round(monotonic() - started),
+                "interval": args.interval,
+                "rss": rss_bytes(),
+                "objects": sum(types.values()),
+                "ops_per_s": stats["ops_per_s"],
+                "p95": stats["p95"],
+                "errors": stats["errors"],
+                "probes": probes(api, server),
+                "growing_types": dict(
+                    (types - baseline).most_common(args.top)
+                ),
+            }
+            samples.append(sample)
+            print(
+                f"{sample['elapsed']:>7}s rss {sample['rss'] / 2**20:7.1f}"
+                f" MiB  objects {sample['objects']:>9}"
+                f"  {sample['ops_per_s']:7.0f} ops/s"
+                f"  p95 {sample['p95']:6.1f} ms  errors {sample['errors']}"
+            )
+    finally:
+        load.stop()
+    flagged = leaks(samples, args.warmup)
+    for name, leak in flagged.items():
+        print(
+            f"LEAK {name}: {leak['start']:.0f} -> {leak['end']:.0f}"
+            f" ({leak['per_hour']:+.0f}/hour)"
+        )
+    if samples and flagged:
+        print("growing types:", samples[-1]["growing_types"])
+    if not flagged:
+        print("no growth detected")
+    return {"mode": "soak", "samples": samples, "leaks": flagged}
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    modes = parser.add_subparsers(dest="mode", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--mix", type=_mix, default=_mix("get=3,lookup=2,page=1")
+    )
+    common.add_argument("--latency", type=float, default=0.002)
+    common.add_argument("--token-seconds", type=int, default=3600)
+    common.add_argument("--index", action="store_true", help="index agents")
+    common.add_argument("--seed", type=int, default=0)
+    common.add_argument("--json", help="write the report to this file")
+
+    run = modes.add_parser("sweep", parents=[common])
+    run.add_argument(
+        "--levels",
+        type=lambda v: [int(n) for n in v.split(",")],
+        default=[1, 2, 4, 8, 16, 32, 64],
+    )
+    run.add_argument("--duration", type=float, default=10.0)
+    run.add_argument("--gain", type=float, default=0.1)
+
+    run = modes.add_parser("soak", parents=[common])
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--hours", type=float, default=1.0)
+    run.add_argument("--interval", type=float, default=60.0)
+    run.add_argument("--warmup", type=int, default=3, help="samples")
+    run.add_argument("--top", type=int, default=10, help="growing types")
+    args = parser.parse_args(argv)
+
+    with MockHaloServer(
+        latency=args.latency, token_seconds=args.token_seconds
+    ) as server:
+        _settings_env(server.url)
+        from halo_psa.api import HaloAPI
+        from halo_psa.core.scheduler import RequestScheduler
+
+        workers = max(args.levels) if args.mode == "sweep" else 0
+        api = HaloAPI(
+            scheduler=RequestScheduler(
+                max(workers, getattr(args, "concurrency", 0), 16)
+            )
+        )
+        if args.index:
+            api.index("agents")
+        if args.mode == "sweep":
+            report = sweep(api, args)
+        else:
+            report = soak(api, server, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+Mock HaloPSA
+============
+
+A small in-process HaloPSA API used by the benchmarks.
+
+It serves ``POST /auth/token`` and ``GET /api/<Resource>[/<id>]`` for the
+resources shipped with the package, with HaloPSA style pagination
+(``pageinate``, ``page_size``, ``page_no``), ``count``, ``search`` and
+date filters (``startdate``, ``enddate``, ``datesearch``).
+Bodies over 512 bytes are gzip compressed when the client accepts it.
+
+Run it with the standard library server::
+
+    >>> with MockHaloServer(latency=0.01) as server:
+    >>>     server.url
+    'http://127.0.0.1:53011'
+
+or serve :data:`asgi_app` with an HTTP/2 capable ASGI server, e.g.::
+
+    hypercorn benchmarks.mock_halo:asgi_app --certfile cert.pem \\
+        --keyfile key.pem --bind 127.0.0.1:8443
+
+"""
+
+# python
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qsl, urlsplit
+
+RECORD_COUNTS: dict[str, int] = {
+    "clients": 500,
+    "agents": 50,
+    "assets": 20000,
+    "suppliers": 100,
+    "tickets": 30000,
+}
+"""Number of generated records per resource"""
+
+PAGES: dict[str, tuple[str, str]] = {
+    "client": ("clients", "clients"),
+    "agent": ("agents", None),
+    "asset": ("assets", "assets"),
+    "supplier": ("suppliers", "suppliers"),
+    "tickets": ("tickets", "tickets"),
+}
+"""Url page name mapped to (resource, response data key)"""
+
+TICKETS_FROM: datetime = datetime(2025, 1, 1)
+"""Date of the first generated ticket; tickets span the following year"""
+
+
+def _record(resource: str, i: int) -> dict[str, any]:
+    """_record
+
+    Build the ``i``-th fake record of ``resource``.
+    """
+    if resource == "clients":
+        return {"id": i, "name": f"Client {i}", "inactive": i % 10 == 0}
+    if resource == "agents":
+        return {
+            "id": i,
+            "name": f"Agent {i}",
+            "email": f"agent{i}@example.com",
+            "phonenumber": f"555-{i:04d}",
+        }
+    if resource == "suppliers":
+        return {"id": i, "name": f"Supplier {i}"}
+    if resource == "tickets":
+        # busier at the start of the year, so windows need different sizes
+        share = (i / RECORD_COUNTS["tickets"]) ** 2
+        occurred = TICKETS_FROM + timedelta(days=365 * share)
+        return {
+            "id": i,
+            "summary": f"Ticket {i}",
+            "client_id": i % RECORD_COUNTS["clients"] + 1,
+            "client_name": f"Client {i % RECORD_COUNTS['clients'] + 1}",
+            "agent_id": i % RECORD_COUNTS["agents"] + 1,
+            "status_id": i % 9 + 1,
+            "tickettype_id": i % 5 + 1,
+            "priority_id": i % 4 + 1,
+            "dateoccurred": occurred.isoformat(timespec="seconds"),
+        }
+    return {
+        "id": i,
+        "inventory_number": f"INV-{i:06d}",
+        "key_field": f"HOST-{i:06d}",
+        "client_id": i % RECORD_COUNTS["clients"] + 1,
+        "client_name": f"Client {i % RECORD_COUNTS['clients'] + 1}",
+        "site_id": i % 50 + 1,
+        "site_name": f"Site {i % 50 + 1}",
+        "supplier_id": i % RECORD_COUNTS["suppliers"] + 1,
+        "assettype_id": i % 12 + 1,
+        "assettype_name": f"Type {i % 12 + 1}",
+        "inactive": i % 25 == 0,
+        "fields": [{"name": f"field{n}", "value": "x" * 24} for n in range(8)],
+    }
+
+
+class MockHalo:
+    """
+    MockHalo
+    ========
+
+    The transport independent request handler.
+    """
+
+    def __init__(
+        self,
+        record_counts: dict[str, int] = None,
+        latency: float = 0.0,
+        compress: bool = True,
+        token_seconds: int = 3600,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+    ) -> None:
+        self.latency: float = latency
+        # a slow_rate share of requests take slow_latency more seconds
+        self.slow_rate: float = slow_rate
+        self.slow_latency: float = slow_latency
+        self._random: random.Random = random.Random(0)
+        self.compress: bool = compress
+        self.token_seconds: int = token_seconds
+        self.records: dict[str, list[dict]] = {
+            name: [_record(name, i) for i in range(1, count + 1)]
+            for name, count in (record_counts or RECORD_COUNTS).items()
+        }
+        self.requests: int = 0
+        self._lock: Lock = Lock()
+
+    def change(
+        self, resource: str, pk: int, deleted: bool = False, **fields
+    ) -> dict[str, any]:
+        """change
+
+        Update or delete a record and return the matching webhook event,
+        for testing webhook receivers locally. Deleted records answer 404.
+
+        Example::
+
+            >>> event = halo.change("clients", 12, name="Renamed Ltd")
+            >>> requests.post(receiver_url, json=event)
+        """
+        page = next(p for p, (r, _) in PAGES.items() if r == resource)
+        records = self.records[resource]
+        with self._lock:
+            if deleted:
+                records[pk - 1] = None
+                return {"event": f"{page.title()} Deleted", "object_id": pk}
+            records[pk - 1] = {**records[pk - 1], **fields}
+            return {"event": f"{page.title()} Updated", page: records[pk - 1]}
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, str],
+        headers: dict[str, str] = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        """handle
+
+        Answer a request.
+
+        Returns:
+            tuple[int, dict[str, str], bytes]: Status, headers and body.
+        """
+        status, out, body = self._route(method, path, query)
+        accepted = {k.lower(): v for k, v in (headers or {}).items()}.get(
+            "accept-encoding", ""
+        )
+        if self.compress and "gzip" in accepted and len(body) > 512:
+            body = gzip.compress(body, compresslevel=5)
+            out["Content-Encoding"] = "gzip"
+        return status, out, body
+
+    def _route(
+        self, method: str, path: str, query: dict[str, str]
+    ) -> tuple[int, dict[str, str], bytes]:
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.slow_rate and self._random.random() < self.slow_rate:
+            time.sleep(self.slow_latency)
+        parts = [p for p in path.split("/") if p]
+        if method == "POST" and parts[-1:] == ["token"]:
+            return self._json(
+                200,
+                {
+                    "token_type": "Bearer",
+                    "access_token": "mock-token",
+                    "expires_in": self.token_seconds,
+                },
+            )
+        if method != "GET" or len(parts) < 2 or parts[0] != "api":
+            return self._json(404, {"error": "not found"})
+        page = parts[1].lower()
+        if page not in PAGES or PAGES[page][0] not in self.records:
+            return self._json(404, {"error": "not found"})
+        resource, data_key = PAGES[page]
+        records = self.records[resource]
+        if len(parts) > 2:
+            pk = int(parts[2])
+            if not 0 < pk <= len(records) or records[pk - 1] is None:
+                return self._json(404, {"error": "not found"})
+            return self._json(200, records[pk - 1])
+        return self._json(200, self._list(records, data_key, query))
+
+    @staticmethod
+    def _list(
+        records: list[dict], data_key: str, query: dict[str, str]
+    ) -> dict | list:
+        records = [r for r in records if r is not None]
+        search = query.get("search")
+        if search:
+            needle = search.lower()
+            records = [
+                r
+                for r in records
+                if any(needle in str(v).lower() for v in r.values())
+            ]
+        field = query.get("datesearch")
+        if field:
+            low = query.get("startdate") or ""
+            high = query.get("enddate") or "9999"
+            records = [r for r in records if low <= r[field][:19] <= high]
+        total = len(records)
+        if str(query.get("pageinate", "")).lower() == "true":
+            size = int(query.get("page_size") or 50)
+            page_no = max(int(query.get("page_no") or 1), 1)
+            records = records[(page_no - 1) * size : page_no * size]
+        elif query.get("count"):
+            records = records[: int(query["count"])]
+        if data_key is None:
+            return records
+        return {"record_count": total, data_key: records}
+
+    @staticmethod
+    def _json(status: int, data: any) -> tuple[int, dict[str, str], bytes]:
+        body = json.dumps(data).encode()
+        return status, {"Content-Type": "application/json"}, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.connections.add(self.client_address)
+        status, headers, body = self.server.halo.handle(
+            self.command,
+            url.path,
+            dict(parse_qsl(url.query)),
+            dict(self.headers.items()),
+        )
+        try:
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up, e.g. its deadline passed
+            self.close_connection = True
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class MockHaloServer:
+    """
+    MockHaloServer
+    ==============
+
+    Runs :class:`MockHalo` on a local HTTP/1.1 server in a background
+    thread. Use it as a context manager.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        halo: MockHalo = None,
+        **options,
+    ) -> None:
+        self.halo: MockHalo = halo or MockHalo(**options)
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.halo = self.halo
+        self.httpd.connections = set()
+        self._thread: Thread = None
+
+    @property
+    def url(self) -> str:
+        """Base url of the server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def connections(self) -> int:
+        """Number of distinct client connections seen."""
+        return len(self.httpd.connections)
+
+    def start(self) -> "MockHaloServer":
+        self._thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockHaloServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+_asgi_halo: MockHalo = None
+
+
+async def asgi_app(scope: dict, receive, send) -> None:
+    """asgi_app
+
+    ASGI entry point serving :class:`MockHalo`, for HTTP/2 servers.
+    """
+    global _asgi_halo
+    if scope["type"] != "http":
+        return
+    if _asgi_halo is None:
+        _asgi_halo = MockHalo()
+    more = True
+    while more:
+        message = await receive()
+        more = message.get("more_body", False)
+    query = dict(parse_qsl(scope.get("query_string", b"").decode()))
+    headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+    status, headers, body = _asgi_halo.handle(
+        scope["method"], scope["path"], query, headers
+    )
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (k.lower().encode(), v.encode()) for k, v in headers.items()
+            ]
+            + [(b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,103 @@
+"""
+Request Overhead Benchmark
+==========================
+
+Measure the client side cost of building a page request, without any
+network traffic: headers, query parameters, the encoded url and the HTTP
+client's own request preparation.
+
+Usage::
+
+    cd pyHaloPSA
+    python -m benchmarks.request_overhead --requests 50000
+
+``rebuilt`` repeats what every request used to do: rebuild the auth
+headers from :class:`BaseData`, update them in place, merge the resource's
+``LIST_PARAMS`` into a new dict and let requests encode the query.
+``compiled`` uses the resource's :class:`RequestSpec` and the cached auth
+headers, and only encodes the page parameters.
+"""
+
+# python
+import argparse
+import os
+import statistics
+from time import perf_counter
+
+# 3rd party
+import requests
+
+# local
+from .transport_bench import _settings_env
+
+
+def _null_transport() -> object:
+    # imported late: settings are read when halo_psa is imported
+    from halo_psa.core.transport import BaseTransport, TransportResponse
+
+    class NullTransport(BaseTransport):
+        """Prepares requests like requests.Session would, never sends."""
+
+        NAME: str = "null"
+
+        def request(self, method, url, headers=None, params=None, **kwargs):
+            requests.Request(
+                method, url, headers=self._headers(headers), params=params
+            ).prepare()
+            return TransportResponse(200, "OK", {}, b"[]", 0.0)
+
+    return NullTransport()
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resource", default="assets")
+    args = parser.parse_args(argv)
+
+    _settings_env("http://127.0.0.1:9")
+    from halo_psa.api import HaloAPI
+
+    transport = _null_transport()
+    api = HaloAPI(transport=transport)
+    api._auth.query_headers = {"Authorization": "Bearer benchmark"}
+    resource = api.get_resource(args.resource)
+    auth_data = api._auth._query_headers
+    filters = {"includedetails": True}
+
+    def rebuilt(page_no: int) -> None:
+        headers = auth_data()
+        headers.update({})
+        query = {
+            k: v for k, v in resource.LIST_PARAMS.items() if v is not None
+        }
+        query.update(filters)
+        query.update(pageinate=True, page_size=100, page_no=page_no)
+        transport.get(resource.page, headers=headers, params=query)
+
+    base = resource.list_spec.merge(filters)
+
+    def compiled(page_no: int) -> None:
+        headers = api._auth.query_headers
+        spec = base.merge(
+            {"pageinate": True, "page_size": 100, "page_no": page_no}
+        )
+        transport.get(spec.full_url, headers=spec.header_dict(headers))
+
+    print(f"{os.path.basename(resource.page)}: {args.requests} requests")
+    for name, build in (("rebuilt", rebuilt), ("compiled", compiled)):
+        runs = []
+        for _ in range(args.repeat):
+            start = perf_counter()
+            for page_no in range(1, args.requests + 1):
+                build(page_no)
+            runs.append((perf_counter() - start) / args.requests * 1e6)
+        print(
+            f"  {name:<9} {statistics.median(runs):7.2f} us/request "
+            f"(best {min(runs):.2f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Transport Benchmark
+===================
+
+Compare the HTTP/1.1 pooled transport with the HTTP/2 multiplexed
+transport by sending concurrent resource requests to a local server.
+
+Usage::
+
+    cd pyHaloPSA
+    python -m benchmarks.transport_bench --requests 2000 --concurrency 64
+
+By default both transports are pointed at a local :class:`MockHaloServer`,
+which only speaks HTTP/1.1. To measure multiplexing, serve
+``benchmarks.mock_halo:asgi_app`` with an HTTP/2 server and pass its url
+with ``--h2-url`` (add ``--insecure`` for a self-signed certificate).
+"""
+
+# python
+import argparse
+import os
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+# local
+from .mock_halo import MockHaloServer
+
+
+def _settings_env(url: str) -> None:
+    """Point the package settings at the local server before import."""
+    os.environ.setdefault("BASE_URL", url)
+    os.environ.setdefault("TENANT", "benchmark")
+    os.environ.setdefault("CLIENT_ID", "benchmark")
+    os.environ.setdefault("CLIENT_SECRET", "benchmark")
+
+
+def run(
+    transport: object,
+    url: str,
+    requests: int,
+    concurrency: int,
+) -> dict[str, any]:
+    """run
+
+    Send ``requests`` GET requests to ``url`` with ``concurrency`` threads.
+
+    Returns:
+        dict[str, any]: Throughput and latency results.
+    """
+    params = {"pageinate": "true", "page_size": 50, "page_no": 1}
+
+    def one(_: int) -> tuple[float, str]:
+        response = transport.get(url, params=params)
+        return response.elapsed, response.http_version
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    wall = perf_counter() - start
+    latencies = sorted(r[0] for r in results)
+    return {
+        "protocol": results[-1][1],
+        "requests": requests,
+        "wall": wall,
+        "rps": requests / wall,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--h2-url", default=None)
+    parser.add_argument("--insecure", action="store_true")
+    args = parser.parse_args(argv)
+
+    with MockHaloServer(latency=args.latency) as server:
+        _settings_env(server.url)
+        from halo_psa.core.transport import HTTP2Transport, RequestsTransport
+
+        targets = [
+            ("http1", RequestsTransport, server.url, {}),
+            ("http2", HTTP2Transport, args.h2_url or server.url, {}),
+        ]
+        if args.insecure:
+            targets[1][3]["verify"] = False
+
+        print(
+            f"{'transport':<10}{'protocol':<10}{'conns':>6}{'req/s':>10}"
+            f"{'p50 ms':>9}{'p99 ms':>9}"
+        )
+        for name, cls, base, options in targets:
+            try:
+                transport = cls(pool_size=args.pool_size, **options)
+            except ImportError as err:
+                print(f"{name:<10}skipped: {err.args[-1]}")
+                continue
+            before = server.connections
+            result = run(
+                transport,
+                f"{base}/api/Client",
+                args.requests,
+                args.concurrency,
+            )
+            transport.close()
+            conns = server.connections - before if base == server.url else "-"
+            print(
+                f"{name:<10}{result['protocol']:<10}{conns:>6}"
+                f"{result['rps']:>10.0f}{result['p50']:>9.1f}"
+                f"{result['p99']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,120 @@
+import os
+import time
+from datetime import datetime
+from typing import Callable, Iterator
+
 from halo_psa.auth import HaloAuth as Auth
-from .resources import Clients, Agents, Assets, Suppliers
+from halo_psa.core import (
+    ColumnTable,
+    HedgePolicy,
+    HistoryStore,
+    MemoryGovernor,
+    PageSizeTuner,
+    Paginator,
+    Pipeline,
+    ResourceIndex,
+    Sink,
+    Snapshot,
+    TransformPool,
+    WindowScan,
+    write_snapshot,
+)
+from halo_psa.config import settings
+from halo_psa.core.deadline import Deadline, DeadlineExceeded
+from halo_psa.core.metrics import Metrics
+from halo_psa.core.profiling import Profiler, phase
+from halo_psa.core.scheduler import (
+    BULK,
+    DEFAULT,
+    INTERACTIVE,
+    RequestScheduler,
+)
+from halo_psa.core.transform import Transform
+from halo_psa.core.transport import BaseTransport, default_transport
+from .planner import Plan, Planner
+from .prefetch import Prefetcher
+from .sync import ShardedSync
+from .webhooks import WebhookReceiver
+from .resources import Clients, Agents, Assets, Suppliers, Tickets
 
 
 class HaloAPI:
-    _auth = Auth()
-    _clients = Clients()
-    _agents = Agents()
-    _assets = Assets()
-    _suppliers = Suppliers()
     _RESOURCES: list[str] = [
         "clients",
         "agents",
         "assets",
         "suppliers",
+        "tickets",
     ]
+    _prefetcher: Prefetcher = None
+    _planner: Planner = None
+    _indexes: dict[str, ResourceIndex] = None
+    _tuner: PageSizeTuner = None
+    _history: HistoryStore = None
+
+    def __init__(
+        self,
+        transport: BaseTransport = None,
+        scheduler: RequestScheduler = None,
+        profile: bool | Profiler = settings.PROFILE,
+        governor: MemoryGovernor = None,
+        hedge: bool | HedgePolicy = settings.HEDGE,
+    ) -> None:
+        """__init__
+
+        Create the API's authentication and resource objects.
+
+        Args:
+            transport (BaseTransport, optional): HTTP backend shared by
+            authentication and every resource. Defaults to the transport
+            selected by the TRANSPORT setting.
+            scheduler (RequestScheduler, optional): Priority lanes and
+            concurrency limits for resource requests. Defaults to a
+            scheduler configured by the MAX_CONCURRENCY settings.
+            profile (bool | Profiler, optional): Profile every request and
+            write a report at exit, see :class:`Profiler`. A profiler is
+            used as is and left to the caller to start and write.
+            Defaults to the PROFILE setting.
+            governor (MemoryGovernor, optional): Memory budget for page
+            requests in flight. Defaults to a governor with the
+            MEMORY_BUDGET_MB budget when it is set, otherwise none.
+            hedge (bool | HedgePolicy, optional): Hedge slow single record
+            requests, see :class:`HedgePolicy`. True uses a policy from
+            the HEDGE_PERCENTILE and HEDGE_MAX_EXTRA settings. Defaults to
+            the HEDGE setting.
+        """
+        self.transport: BaseTransport = transport or default_transport()
+        self.metrics: Metrics = Metrics()
+        self.scheduler: RequestScheduler = scheduler or RequestScheduler()
+        self.profiler: Profiler = None
+        if isinstance(profile, Profiler):
+            self.profiler = profile
+        elif profile:
+            self.profiler = Profiler()
+            self.profiler.start()
+            self.profiler.write_at_exit()
+        self.governor: MemoryGovernor = governor
+        if governor is None and MemoryGovernor.BUDGET:
+            self.governor = MemoryGovernor()
+        self.hedge: HedgePolicy = None
+        if isinstance(hedge, HedgePolicy):
+            self.hedge = hedge
+        elif hedge:
+            self.hedge = HedgePolicy()
+        shared = {
+            "transport": self.transport,
+            "metrics": self.metrics,
+            "scheduler": self.scheduler,
+            "profiler": self.profiler,
+            "governor": self.governor,
+            "hedge": self.hedge,
+        }
+        self._auth = Auth(transport=self.transport, metrics=self.metrics)
+        self._clients = Clients(**shared)
+        self._agents = Agents(**shared)
+        self._assets = Assets(**shared)
+        self._suppliers = Suppliers(**shared)
+        self._tickets = Tickets(**shared)
 
     def get_resource(self, value: str) -> object:
         """get_resource
@@ -40,11 +141,13 @@ class HaloAPI:
         """
         return self._RESOURCES
 
-    def connect(self):
-        self._auth.connect()
+    def connect(self, deadline: float | Deadline = None):
+        self._auth.connect(Deadline.of(deadline))
 
-    def get_credentials(self) -> dict[str, str]:
-        self.connect()
+    def get_credentials(
+        self, deadline: float | Deadline = None
+    ) -> dict[str, str]:
+        self.connect(deadline)
         return self._auth.query_headers
 
     def get(
@@ -53,6 +156,8 @@ class HaloAPI:
         pk: int = None,
         headers: dict = None,
         params: dict = None,
+        priority: int | str = DEFAULT,
+        deadline: float | Deadline = None,
     ):
         """get
 
@@ -66,27 +171,569 @@ class HaloAPI:
             Defaults to None.
             params (dict, optional): Request parameters.
             Defaults to None.
+            priority (int | str, optional): Scheduling priority,
+            "interactive", "default" or "bulk". Defaults to "default".
+            deadline (float | Deadline, optional): Time budget in seconds,
+            covering authentication, the wait for a request slot and the
+            request. Defaults to no budget.
+
+        Raises:
+            DeadlineExceeded: The budget ran out.
 
         Returns:
             dict | list: Response data.
         """
         r = self.get_resource(f"{resource.lower()}")
-        auth = self.get_credentials()
+        deadline = Deadline.of(deadline)
+        with phase(self.profiler, r.RESOURCE_NAME, "get", "auth"):
+            auth = self.get_credentials(deadline)
         return r.get(
             auth=auth,
             pk=pk,
             headers=headers,
             params=params,
+            priority=priority,
+            deadline=deadline,
+        )
+
+    @property
+    def tuner(self) -> PageSizeTuner:
+        """tuner
+
+        Learned page sizes used by auto-tuned pagination.
+        """
+        if self._tuner is None:
+            self._tuner = PageSizeTuner()
+        return self._tuner
+
+    def paginate(
+        self,
+        resource: str,
+        headers: dict = None,
+        params: dict = None,
+        page_size: int = None,
+        auto_tune: bool = False,
+        priority: int | str = BULK,
+        concurrency: int = 1,
+        deadline: float | Deadline = None,
+    ) -> Paginator:
+        """paginate
+
+        Create a :class:`Paginator` over a resource using its default
+        ``LIST_PARAMS``, updated with ``params``.
+
+        Args:
+            resource (str): The desired resource's name
+            headers (dict, optional): Request headers.
+            Defaults to None.
+            params (dict, optional): Request parameters.
+            Defaults to None.
+            page_size (int, optional): Records per page.
+            Defaults to the resource's PAGE_SIZE.
+            auto_tune (bool, optional): Adjust the page size from observed
+            latency, body size and errors, and remember it between runs.
+            Defaults to False.
+            priority (int | str, optional): Scheduling priority of the page
+            requests. Defaults to "bulk".
+            concurrency (int, optional): Pages fetched at once after the
+            first. Defaults to 1.
+            deadline (float | Deadline, optional): Time budget in seconds
+            for the whole iteration, including authentication and retries.
+            Pages already yielded are kept when it runs out.
+            Defaults to no budget.
+
+        Returns:
+            Paginator: An iterable of record pages.
+        """
+        r = self.get_resource(f"{resource.lower()}")
+        deadline = Deadline.of(deadline)
+        return Paginator(
+            r,
+            lambda: self.get_credentials(deadline),
+            headers=headers,
+            params=params,
+            page_size=page_size,
+            tuner=self.tuner if auto_tune else None,
+            priority=priority,
+            concurrency=concurrency,
+            deadline=deadline,
+        )
+
+    def iter_pages(
+        self, resource: str, **options
+    ) -> Iterator[list[dict[str, any]]]:
+        """iter_pages
+
+        Yield every record of a resource one page at a time.
+        See :func:`paginate` for the options.
+
+        Example::
+
+            >>> for page in halo.iter_pages("assets", auto_tune=True):
+            >>>     write(page)
+        """
+        yield from self.paginate(resource, **options)
+
+    def iter_records(
+        self, resource: str, **options
+    ) -> Iterator[dict[str, any]]:
+        """iter_records
+
+        Yield every record of a resource, fetching one page at a time.
+        See :func:`paginate` for the options.
+        """
+        for page in self.paginate(resource, **options):
+            yield from page
+
+    def get_all(
+        self, resource: str, partial: bool = False, **options
+    ) -> list[dict[str, any]]:
+        """get_all
+
+        Get every record of a resource, paging through the results.
+        See :func:`paginate` for the options.
+
+        Args:
+            resource (str): The desired resource's name
+            partial (bool, optional): When the ``deadline`` runs out,
+            return the records fetched so far instead of raising.
+            Defaults to False.
+
+        Raises:
+            DeadlineExceeded: The deadline ran out; its ``partial``
+            attribute holds the records fetched so far.
+
+        Returns:
+            list[dict[str, any]]: Response data.
+        """
+        records = []
+        try:
+            for page in self.paginate(resource, **options):
+                records.extend(page)
+        except DeadlineExceeded as err:
+            if partial:
+                return records
+            err.partial = records
+            raise
+        return records
+
+    def scan(
+        self,
+        resource: str,
+        start: str | datetime,
+        end: str | datetime,
+        headers: dict = None,
+        params: dict = None,
+        concurrency: int = 4,
+        priority: int | str = BULK,
+        deadline: float | Deadline = None,
+        **options,
+    ) -> WindowScan:
+        """scan
+
+        Create a :class:`WindowScan` reading a resource's records between
+        ``start`` and ``end`` in concurrent time windows, in date order.
+        Unlike :func:`paginate`, the number of windows in flight, not the
+        number of pages, bounds how long a large range takes.
+
+        Example::
+
+            >>> for window in halo.scan("tickets", "2025-01-01", "2026-01-01"):
+            >>>     write(window)
+
+        Args:
+            resource (str): The desired resource's name
+            start (str | datetime): Start of the range, inclusive.
+            end (str | datetime): End of the range, exclusive.
+            headers (dict, optional): Request headers.
+            Defaults to None.
+            params (dict, optional): Request parameters.
+            Defaults to None.
+            concurrency (int, optional): Windows fetched at once.
+            Defaults to 4.
+            priority (int | str, optional): Scheduling priority of the
+            requests. Defaults to "bulk".
+            deadline (float | Deadline, optional): Time budget in seconds
+            for the whole scan. Defaults to no budget.
+            **options: ``field`` and ``target``, see :class:`WindowScan`.
+
+        Raises:
+            ValueError: The resource has no date field.
+
+        Returns:
+            WindowScan: An iterable of record windows.
+        """
+        r = self.get_resource(f"{resource.lower()}")
+        deadline = Deadline.of(deadline)
+        return WindowScan(
+            r,
+            lambda: self.get_credentials(deadline),
+            start,
+            end,
+            headers=headers,
+            params=params,
+            concurrency=concurrency,
+            priority=priority,
+            deadline=deadline,
+            **options,
+        )
+
+    def transform(
+        self,
+        resource: str,
+        transforms: Transform | list[Transform],
+        processes: int = None,
+        ordered: bool = True,
+        max_pending: int = None,
+        batch_size: int = None,
+        **options,
+    ) -> Iterator[list[dict[str, any]]]:
+        """transform
+
+        Page through a resource and run record transforms over the pages in
+        worker processes while the next pages are fetched.
+        See :class:`TransformPool` for the transform arguments and
+        :func:`paginate` for the options.
+
+        Example::
+
+            >>> for batch in halo.transform("assets", [flatten, enrich]):
+            >>>     write(batch)
+
+        Yields:
+            list[dict[str, any]]: Transformed batches of records.
+        """
+        with TransformPool(
+            transforms,
+            processes=processes or TransformPool.PROCESSES,
+            ordered=ordered,
+            max_pending=max_pending,
+            batch_size=batch_size,
+        ) as pool:
+            yield from pool.map(self.paginate(resource, **options))
+
+    def table(
+        self, resource: str, fields: dict[str, str] = None, **options
+    ) -> ColumnTable:
+        """table
+
+        Page through a resource into a :class:`ColumnTable` for vectorized
+        counts, filters and rollups. See :func:`paginate` for the options.
+
+        Example::
+
+            >>> assets = halo.table("assets", concurrency=4)
+            >>> assets.count_by("client_id", "assettype_name")
+
+        Args:
+            resource (str): The desired resource's name
+            fields (dict[str, str], optional): Field names mapped to their
+            type. Defaults to the resource's SNAPSHOT_FIELDS.
+
+        Returns:
+            ColumnTable: The resource's records, by column.
+        """
+        r = self.get_resource(resource.lower())
+        return ColumnTable.from_pages(
+            self.paginate(resource, **options), fields or r.SNAPSHOT_FIELDS
+        )
+
+    def pipeline(
+        self,
+        resource: str,
+        sink: Sink | Callable[[list[dict]], None],
+        transforms: Transform | list[Transform] = (),
+        processes: int = None,
+        queue_size: int = None,
+        **options,
+    ) -> Pipeline:
+        """pipeline
+
+        Create a :class:`Pipeline` streaming a resource to a sink, with
+        fetching, decoding, transforms and writing running concurrently.
+        See :func:`paginate` for the options.
+
+        Example::
+
+            >>> sink = SQLiteSink("halo.db", "assets")
+            >>> halo.pipeline("assets", sink, concurrency=4).run()
+
+        Args:
+            resource (str): The desired resource's name
+            sink (Sink | Callable[[list[dict]], None]): Where records are
+            written, e.g. a :class:`FileSink` or :class:`SQLiteSink`.
+            transforms (Transform | list[Transform], optional): Record
+            transforms applied in order. Defaults to none.
+            processes (int, optional): Run the transforms in worker
+            processes. Defaults to the transform thread.
+            queue_size (int, optional): Pages buffered between two stages.
+            Defaults to PIPELINE_QUEUE_SIZE.
+
+        Returns:
+            Pipeline: The pipeline, started by :func:`Pipeline.run`.
+        """
+        return Pipeline(
+            self.paginate(resource, **options),
+            sink,
+            transforms=transforms,
+            processes=processes,
+            queue_size=queue_size or Pipeline.QUEUE_SIZE,
+        )
+
+    @property
+    def planner(self) -> Planner:
+        """planner
+
+        Plans reads of resources and learns their costs, see
+        :class:`Planner`.
+        """
+        if self._planner is None:
+            self._planner = Planner(self)
+        return self._planner
+
+    def plan(self, resource: str, **options) -> Plan:
+        """plan
+
+        Probe a resource's record count and plan how to read it, with its
+        estimated requests, bytes, rate limit usage and wall time.
+        See :func:`Planner.plan` for the options.
+
+        Example::
+
+            >>> plan = halo.plan("assets", params={"includedetails": True})
+            >>> print(plan.summary())
+            >>> for page in plan.pages():
+            >>>     write(page)
+
+        Returns:
+            Plan: The plan, not yet run.
+        """
+        return self.planner.plan(resource, **options)
+
+    def sync(self, resource: str, **options) -> ShardedSync:
+        """sync
+
+        Plan a sharded sync of a resource, worked through by several
+        processes or machines. See :class:`ShardedSync` for the options.
+
+        Example::
+
+            >>> sync = halo.sync("assets", processes=8).run()
+            >>> sync.merge("assets.ndjson")
+
+        Returns:
+            ShardedSync: The sync, not yet started.
+        """
+        return ShardedSync(self, resource, **options)
+
+    def snapshot_path(self, resource: str) -> str:
+        """snapshot_path
+
+        The default snapshot file of a resource, in SNAPSHOT_DIR.
+        """
+        r = self.get_resource(resource.lower())
+        return os.path.join(
+            os.path.expanduser(settings.SNAPSHOT_DIR),
+            f"{r.RESOURCE_NAME}.halosnap",
+        )
+
+    def snapshot(self, resource: str, path: str = None, **options) -> str:
+        """snapshot
+
+        Fetch every record of a resource and write the fields listed in
+        its SNAPSHOT_FIELDS to a binary snapshot.
+        See :func:`paginate` for the options.
+
+        Args:
+            resource (str): The desired resource's name
+            path (str, optional): The snapshot file.
+            Defaults to :func:`snapshot_path`.
+
+        Returns:
+            str: The snapshot file.
+        """
+        r = self.get_resource(resource.lower())
+        path = path or self.snapshot_path(resource)
+        fetched_at = time.time()
+        write_snapshot(
+            path,
+            r.RESOURCE_NAME,
+            self.iter_records(resource, **options),
+            r.SNAPSHOT_FIELDS,
+            created_at=fetched_at,
+        )
+        return path
+
+    def open_snapshot(
+        self,
+        resource: str,
+        path: str = None,
+        max_age: float = settings.SNAPSHOT_MAX_AGE,
+        refresh: bool = True,
+    ) -> Snapshot:
+        """open_snapshot
+
+        Open a resource's snapshot, writing a new one first when it is
+        missing or older than ``max_age``. Processes opening the same file
+        share one read-only copy of it.
+
+        Example::
+
+            >>> clients = halo.open_snapshot("clients")
+            >>> clients.get(12)["name"]
+            'Acme Ltd'
+
+        Args:
+            resource (str): The desired resource's name
+            path (str, optional): The snapshot file.
+            Defaults to :func:`snapshot_path`.
+            max_age (float, optional): Seconds before the snapshot is
+            stale. Defaults to SNAPSHOT_MAX_AGE.
+            refresh (bool, optional): Write a new snapshot when it is
+            missing or stale. Defaults to True.
+
+        Raises:
+            FileNotFoundError: No snapshot and ``refresh`` is False.
+
+        Returns:
+            Snapshot: The opened snapshot.
+        """
+        path = path or self.snapshot_path(resource)
+        if os.path.exists(path):
+            snapshot = Snapshot(path)
+            if not refresh or not snapshot.is_stale(max_age):
+                return snapshot
+            snapshot.close()
+        elif not refresh:
+            raise FileNotFoundError(f"Snapshot ({path}) not found")
+        return Snapshot(self.snapshot(resource, path))
+
+    @property
+    def history(self) -> HistoryStore:
+        """history
+
+        The history store at HISTORY_PATH, used by :func:`record_history`.
+        """
+        if self._history is None:
+            self._history = HistoryStore()
+        return self._history
+
+    def record_history(
+        self, resource: str, store: HistoryStore = None, **options
+    ) -> dict[str, int]:
+        """record_history
+
+        Fetch every record of a resource and commit them to a history
+        store as a new version. Only records that changed since the last
+        version are stored. See :func:`paginate` for the options.
+
+        Example::
+
+            >>> halo.record_history("clients")
+            {'version': 31, 'records': 4210, 'added': 2, 'changed': 9, ...}
+            >>> halo.history.as_of("clients", "2026-03-31")[12]["name"]
+            'Acme Ltd'
+
+        Args:
+            resource (str): The desired resource's name
+            store (HistoryStore, optional): The store to commit to.
+            Defaults to :attr:`history`.
+
+        Returns:
+            dict[str, int]: The version and its change counts, see
+            :func:`HistoryStore.commit`.
+        """
+        r = self.get_resource(resource.lower())
+        store = store or self.history
+        fetched_at = time.time()
+        return store.commit(
+            r.RESOURCE_NAME,
+            self.iter_records(resource, **options),
+            taken_at=fetched_at,
+        )
+
+    def index(
+        self,
+        resource: str,
+        fields: list[str] = None,
+        search_fields: list[str] = None,
+        max_age: float = ResourceIndex.MAX_AGE,
+    ) -> ResourceIndex:
+        """index
+
+        Keep an in-memory index of a resource so :func:`lookup` is answered
+        locally. The index is reloaded once it is older than ``max_age``.
+
+        Args:
+            resource (str): The name of the desired HaloPSA Resource.
+            fields (list[str], optional): Fields with an exact match index.
+            Defaults to None.
+            search_fields (list[str], optional): Fields matched by lookups.
+            Defaults to the resource's ``SEARCH_FIELDS``.
+            max_age (float, optional): Staleness bound in seconds.
+            Defaults to ResourceIndex.MAX_AGE.
+
+        Returns:
+            ResourceIndex: The resource's index.
+
+        Example::
+
+            >>> halo.index("agents", fields=["email"], max_age=600)
+            >>> halo.lookup("agents", "Jack")  # no request is sent
+        """
+        name = resource.lower()
+        r = self.get_resource(name)
+        if self._indexes is None:
+            self._indexes = {}
+        self._indexes[name] = ResourceIndex(
+            lambda: self.get_all(name),
+            fields=fields,
+            search_fields=search_fields or r.SEARCH_FIELDS,
+            max_age=max_age,
         )
+        return self._indexes[name]
+
+    def get_index(self, resource: str) -> ResourceIndex | None:
+        """get_index
+
+        Returns the resource's in-memory index, if one was created.
+        """
+        return (self._indexes or {}).get(resource.lower())
 
-    def lookup(self, resource: str, value: str) -> list[dict[str, any]]:
+    def list_indexes(self) -> list[str]:
+        """list_indexes
+
+        Names of the resources with a local index.
+        """
+        return list(self._indexes or {})
+
+    def drop_index(self, resource: str) -> None:
+        """drop_index
+
+        Stop answering lookups for ``resource`` locally.
+        """
+        (self._indexes or {}).pop(resource.lower(), None)
+
+    def lookup(
+        self,
+        resource: str,
+        value: str,
+        deadline: float | Deadline = None,
+    ) -> list[dict[str, any]]:
         """lookup
 
         Performs a get request with an additional 'search' parameter.
+        If the resource has an in-memory index (see :func:`index`), the
+        search is answered locally instead.
 
         Args:
             resource (str): The name of the desired HaloPSA Resource.
             value (str): A search string for the request.
+            deadline (float | Deadline, optional): Time budget in seconds.
+            Defaults to no budget.
+
+        Raises:
+            DeadlineExceeded: The budget ran out.
 
         Returns:
             list[dict[str, any]]: response data.
@@ -101,4 +748,107 @@ class HaloAPI:
             }]
 
         """
-        return self.get(resource=resource, params={"search": value})
+        index = self.get_index(resource)
+        if index is not None:
+            return index.search(value)
+        return self.get(
+            resource=resource,
+            params={"search": value},
+            priority=INTERACTIVE,
+            deadline=deadline,
+        )
+
+    @property
+    def prefetcher(self) -> Prefetcher:
+        """prefetcher
+
+        Cache of related records used by :func:`prefetch`.
+        """
+        if self._prefetcher is None:
+            self._prefetcher = Prefetcher(self)
+        return self._prefetcher
+
+    def prefetch(
+        self,
+        resource: str,
+        records: list[dict[str, any]],
+        related: list[str] = None,
+        deadline: float | Deadline = None,
+    ) -> list[dict[str, any]]:
+        """prefetch
+
+        Attach related records to a batch of ``resource`` records, resolving
+        each distinct foreign key once instead of once per record.
+
+        Args:
+            resource (str): The name of the records' HaloPSA Resource.
+            records (list[dict[str, any]]): Records returned by :func:`get`.
+            related (list[str], optional): Relation names from the resource's
+            ``RELATIONS``. Defaults to all relations.
+            deadline (float | Deadline, optional): Time budget in seconds
+            for fetching the related records. Defaults to no budget.
+
+        Returns:
+            list[dict[str, any]]: ``records`` with related records attached.
+
+        Example::
+
+            >>> assets = halo.get("assets")
+            >>> halo.prefetch("assets", assets, related=["client"])
+            >>> assets[0]["client"]["name"]
+            'Sandboxed Thoughts'
+
+        """
+        return self.prefetcher.attach(
+            resource, records, related, Deadline.of(deadline)
+        )
+
+    def get_related(
+        self,
+        resource: str,
+        related: list[str] = None,
+        headers: dict = None,
+        params: dict = None,
+        deadline: float | Deadline = None,
+    ) -> list[dict[str, any]]:
+        """get_related
+
+        Perform a resource GET request and prefetch its related records.
+
+        Args:
+            resource (str): The desired resource's name
+            related (list[str], optional): Relation names to attach.
+            Defaults to all relations.
+            headers (dict, optional): Request headers.
+            Defaults to None.
+            params (dict, optional): Request parameters.
+            Defaults to None.
+            deadline (float | Deadline, optional): Time budget in seconds
+            for the request and the related records. Defaults to no budget.
+
+        Returns:
+            list[dict[str, any]]: Response data with related records.
+        """
+        deadline = Deadline.of(deadline)
+        records = self.get(
+            resource=resource,
+            headers=headers,
+            params=params,
+            deadline=deadline,
+        )
+        return self.prefetch(resource, records, related, deadline)
+
+    def webhooks(self, **options) -> WebhookReceiver:
+        """webhooks
+
+        Create a :class:`WebhookReceiver` that keeps this API's indexes and
+        prefetch cache fresh from HaloPSA webhooks.
+        See :class:`WebhookReceiver` for the options.
+
+        Example::
+
+            >>> halo.index("clients")
+            >>> with WebhookServer(halo.webhooks(), port=8080):
+            >>>     serve_forever()
+        """
+        return WebhookReceiver(self, **options)
@@ -0,0 +1,604 @@
+"""
+Planner
+=======
+
+Estimate what reading a resource will cost before running it, then run the
+cheapest plan and learn from how it went.
+
+A plan starts with one request for a one record page, which reports how
+many records match the filters and how long a request takes. From that and
+what earlier runs of the same resource and filters measured, the planner
+estimates each way of reading the records:
+
+    single: One request for every record.
+    sequential: One page after another.
+    parallel: Several pages at once, after the first.
+    mirror: A fresh local snapshot, without any request.
+
+and picks the fastest, unless a plan with fewer requests is nearly as
+fast. A resource that reports no record count is always read one page
+after another, until a short page. Estimates cover requests, bytes, the share of the API rate limit
+used and wall time, which is never below what the rate limit allows.
+
+Running a plan records its actual requests, bytes and time. Later plans
+of the same resource and filters use them: the time per request and per
+record, the bytes per record and how far off each strategy's estimates
+were. They are saved to ``path`` between runs.
+
+Example:
+--------
+
+    >>> plan = Halo.plan("assets", params={"includeinactive": False})
+    >>> print(plan.summary())
+    assets: parallel, 23514 records in 24 requests (1000 per page, 8 at once)
+      estimated 45.9 MiB, 3.6% of the rate limit, 14.2s
+    >>> records = plan.run()
+
+"""
+
+# python
+import json
+import os
+import time
+from threading import Lock
+from typing import Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+from halo_psa.core import Paginator, Snapshot
+from halo_psa.core.scheduler import BULK
+from halo_psa.core.tuning import PageSizeTuner
+
+SINGLE: str = "single"
+"""Every record in one request"""
+SEQUENTIAL: str = "sequential"
+"""One page after another"""
+PARALLEL: str = "parallel"
+"""Several pages at once, after the first"""
+MIRROR: str = "mirror"
+"""Records read from a local snapshot"""
+
+STRATEGIES: tuple[str, ...] = (SINGLE, SEQUENTIAL, PARALLEL, MIRROR)
+"""Ways a plan can read a resource"""
+
+
+def _requests(count: int) -> str:
+    return f"{count} request" if count == 1 else f"{count} requests"
+
+
+class Plan:
+    """
+    Plan
+    ====
+
+    The chosen way to read a resource, with its estimated cost and, once
+    run, its actual cost.
+
+    Attributes:
+
+        resource (str): The resource's name
+        params (dict[str, any]): The filters
+        strategy (str): One of STRATEGIES
+        record_count (int | None): Records reported by the probe, None
+            when the resource reports no count
+        page_size (int): Records per request
+        concurrency (int): Requests in flight
+        requests (int): Estimated requests, the probe excluded; without a
+            record count, the first page's
+        bytes (int): Estimated body bytes
+        seconds (float): Estimated wall time
+        rate_limit_usage (float): Share of one rate limit window the
+            requests use
+        alternatives (list[dict]): The other strategies' estimates
+        actual (dict | None): Requests, bytes, records and seconds of the
+            run, once it finished
+
+    """
+
+    def __init__(
+        self,
+        planner: "Planner",
+        resource: str,
+        estimate: dict[str, any],
+        record_count: int | None = None,
+        params: dict[str, any] = None,
+        headers: dict[str, str] = None,
+        fields: list[str] = None,
+        alternatives: list[dict[str, any]] = None,
+        probe_seconds: float = None,
+    ) -> None:
+        self.planner: Planner = planner
+        self.resource: str = resource
+        self.params: dict[str, any] = dict(params or {})
+        self.headers: dict[str, str] = headers
+        self.fields: list[str] = fields
+        self.key: str = PageSizeTuner.key(resource, self.params)
+        self.record_count: int | None = record_count
+        self.strategy: str = estimate["strategy"]
+        self.page_size: int = estimate["page_size"]
+        self.concurrency: int = estimate["concurrency"]
+        self.requests: int = estimate["requests"]
+        self.bytes: int = estimate["bytes"]
+        self.seconds: float = estimate["seconds"]
+        self.rate_limit_usage: float = estimate["rate_limit_usage"]
+        self.model_seconds: float = estimate["model_seconds"]
+        """Wall time estimated before the learned correction"""
+        self.alternatives: list[dict[str, any]] = alternatives or []
+        self.probe_seconds: float = probe_seconds
+        """Response time of the probe request"""
+        self.actual: dict[str, any] = None
+
+    def as_dict(self) -> dict[str, any]:
+        """as_dict
+
+        The plan's strategy, estimates and actual cost as plain values.
+        """
+        return {
+            "resource": self.resource,
+            "params": dict(self.params),
+            "strategy": self.strategy,
+            "record_count": self.record_count,
+            "page_size": self.page_size,
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "rate_limit_usage": self.rate_limit_usage,
+            "seconds": self.seconds,
+            "alternatives": self.alternatives,
+            "actual": self.actual,
+        }
+
+    def summary(self) -> str:
+        """summary
+
+        The plan and its estimates, and the actual cost once run, as text.
+        """
+        count = "unknown" if self.record_count is None else self.record_count
+        how = f"{self.page_size} per page"
+        if self.concurrency > 1:
+            how += f", {self.concurrency} at once"
+        requests = _requests(self.requests)
+        if self.record_count is None:
+            requests = f"at least {requests}"
+        lines = [
+            f"{self.resource}: {self.strategy}, {count} records in "
+            f"{requests} ({how})",
+            f"  estimated {self.bytes / 2**20:.1f} MiB, "
+            f"{self.rate_limit_usage:.1%} of the rate limit, "
+            f"{self.seconds:.1f}s",
+        ]
+        for other in self.alternatives:
+            lines.append(
+                f"  or {other['strategy']}: {_requests(other['requests'])}, "
+                f"{other['seconds']:.1f}s"
+            )
+        if self.actual is not None:
+            actual = self.actual
+            lines.append(
+                f"  actual {actual['records']} records in "
+                f"{_requests(actual['requests'])}, "
+                f"{actual['bytes'] / 2**20:.1f} MiB, "
+                f"{actual['seconds']:.1f}s"
+            )
+        return "\n".join(lines)
+
+    def _mirror(self) -> Iterator[list[dict]]:
+        api = self.planner.api
+        with Snapshot(api.snapshot_path(self.resource)) as snapshot:
+            records = snapshot.to_list()
+        fields = self.fields
+        for start in range(0, len(records), self.page_size):
+            yield [
+                {name: record.get(name) for name in fields}
+                for record in records[start : start + self.page_size]
+            ]
+
+    def pages(self) -> Iterator[list[dict[str, any]]]:
+        """pages
+
+        Run the plan, yielding the records one page at a time. Once every
+        page is read, the actual cost is recorded in :attr:`actual` and
+        learned by the planner.
+        """
+        api = self.planner.api
+        before = api.metrics.get(self.resource)
+        start = time.perf_counter()
+        records = 0
+        if self.strategy == MIRROR:
+            pages = self._mirror()
+        else:
+            pages = api.paginate(
+                self.resource,
+                headers=self.headers,
+                params=self.params,
+                page_size=self.page_size,
+                concurrency=self.concurrency,
+            )
+        for page in pages:
+            records += len(page)
+            yield page
+        after = api.metrics.get(self.resource)
+
+        def spent(name: str) -> float:
+            return after.get(name, 0) - before.get(name, 0)
+
+        self.actual = {
+            "records": records,
+            "requests": int(spent("requests")),
+            "bytes": int(spent("body_bytes")),
+            "request_seconds": spent("elapsed"),
+            "seconds": time.perf_counter() - start,
+        }
+        self.planner.learn(self)
+
+    def run(self) -> list[dict[str, any]]:
+        """run
+
+        Run the plan and return every record.
+        """
+        records = []
+        for page in self.pages():
+            records.extend(page)
+        return records
+
+
+class Planner:
+    """
+    Planner
+    =======
+
+    Plans reads of a resource for a :class:`HaloAPI` instance, and learns
+    from the plans it runs.
+
+    The cost of a request is modelled as a fixed time plus a time per
+    record, and its size as bytes per record. Before a resource's first
+    run, the probe's response time is the fixed time and RECORD_SECONDS
+    the time per record; each run then refines both, and a correction per
+    strategy scales wall time estimates by how far off they were.
+
+    Example:
+    --------
+
+        >>> plan = Halo.planner.plan("tickets", strategy="sequential")
+        >>> plan.requests, plan.seconds
+        (30, 18.7)
+        >>> Halo.planner.runs("tickets")[-1]["actual"]["seconds"]
+        17.9
+
+    """
+
+    PATH: str = settings.PLAN_HISTORY_FILE
+    """Where learned costs and past runs are kept"""
+    RATE_LIMIT: int = settings.RATE_LIMIT_REQUESTS
+    """Requests allowed per rate limit window"""
+    RATE_WINDOW: float = settings.RATE_LIMIT_SECONDS
+    """Seconds of a rate limit window"""
+    SINGLE_MAX: int = 1000
+    """Most records fetched with a single request"""
+    PARALLEL_MIN_PAGES: int = 4
+    """Fewest pages worth fetching in parallel"""
+    MAX_CONCURRENCY: int = 8
+    """Most pages a parallel plan fetches at once"""
+    FEWER_REQUESTS: float = 0.8
+    """A plan with fewer requests is kept unless another takes at most
+    this share of its time"""
+    RECORD_SECONDS: float = 0.0002
+    """Seconds per record assumed before a resource's first run"""
+    SMOOTHING: float = 0.3
+    """Weight of the newest run in the learned costs"""
+    RUNS: int = 20
+    """Past runs kept per resource and filters"""
+
+    def __init__(self, api: object, path: str = PATH) -> None:
+        """__init__
+
+        Args:
+            api (HaloAPI): The API used to probe and run plans.
+            path (str, optional): JSON file with learned costs, or
+            ``None`` to keep them in memory only. Defaults to PATH.
+        """
+        self.api = api
+        self.path: str = os.path.expanduser(path) if path else None
+        self._lock: Lock = Lock()
+        self._state: dict[str, dict[str, any]] = self._load()
+
+    def _check(self, resource: object, params: dict[str, any]) -> None:
+        allowed = resource.LIST_PARAMS
+        for name in params:
+            if name not in allowed:
+                raise ValueError(
+                    f"Filter ({name}) not found",
+                    f"options include: {sorted(allowed)}",
+                )
+
+    def _snapshot(
+        self, resource: object, fields: list[str], max_age: float
+    ) -> tuple[int, int] | None:
+        """_snapshot
+
+        Records and file size of a fresh snapshot holding ``fields``, or
+        None when there is none.
+        """
+        if not fields or not set(fields) <= set(resource.SNAPSHOT_FIELDS):
+            return None
+        path = self.api.snapshot_path(resource.RESOURCE_NAME)
+        if not os.path.exists(path):
+            return None
+        with Snapshot(path) as snapshot:
+            if snapshot.is_stale(max_age):
+                return None
+            return len(snapshot), os.path.getsize(path)
+
+    def _cost(
+        self,
+        model: dict[str, any],
+        strategy: str,
+        records: int,
+        page_size: int,
+        concurrency: int = 1,
+    ) -> dict[str, any]:
+        """_cost
+
+        Requests, bytes, rate limit usage and wall time of reading
+        ``records`` records with a strategy, from a learned ``model``.
+        """
+        pages = max(-(-records // page_size), 1)
+        page_seconds = model["overhead"]
+        page_seconds += model["per_record"] * min(records, page_size)
+        rounds = pages
+        if concurrency > 1:
+            rounds = 1 + -(-(pages - 1) // concurrency)
+        seconds = rounds * page_seconds
+        # a full window has to pass for every window's worth of requests
+        windows = (pages - 1) // max(self.RATE_LIMIT, 1)
+        seconds = max(seconds, windows * self.RATE_WINDOW)
+        ratio = model["ratios"].get(strategy, 1.0)
+        return {
+            "strategy": strategy,
+            "page_size": page_size,
+            "concurrency": concurrency,
+            "requests": pages,
+            "bytes": int(records * model["bytes_per_record"]),
+            "rate_limit_usage": pages / max(self.RATE_LIMIT, 1),
+            "model_seconds": seconds,
+            "seconds": seconds * ratio,
+        }
+
+    def plan(
+        self,
+        resource: str,
+        params: dict[str, any] = None,
+        headers: dict[str, str] = None,
+        fields: list[str] = None,
+        strategy: str = None,
+        page_size: int = None,
+        concurrency: int = None,
+        max_age: float = settings.SNAPSHOT_MAX_AGE,
+    ) -> Plan:
+        """plan
+
+        Probe a resource and plan how to read it.
+
+        Args:
+            resource (str): The desired resource's name
+            params (dict[str, any], optional): Filters from the resource's
+            LIST_PARAMS.
+            headers (dict[str, str], optional): Request headers.
+            fields (list[str], optional): The fields needed. When they are
+            all in the resource's SNAPSHOT_FIELDS and there are no
+            filters, a fresh snapshot can serve the records.
+            strategy (str, optional): Plan with this strategy instead of
+            the cheapest. One of STRATEGIES.
+            page_size (int, optional): Records per page.
+            Defaults to the resource's PAGE_SIZE.
+            concurrency (int, optional): Most pages fetched at once.
+            Defaults to MAX_CONCURRENCY, within the bulk lane's limit.
+            max_age (float, optional): Seconds before a snapshot is too
+            stale to mirror. Defaults to SNAPSHOT_MAX_AGE.
+
+        Raises:
+            ValueError: Unknown filter or strategy, or the strategy does
+            not apply.
+
+        Returns:
+            Plan: The plan, not yet run.
+        """
+        r = self.api.get_resource(resource.lower())
+        name = r.RESOURCE_NAME
+        params = dict(params or {})
+        self._check(r, params)
+        if strategy is not None and strategy not in STRATEGIES:
+            raise ValueError(
+                f"Strategy ({strategy}) not found",
+                f"options include: {list(STRATEGIES)}",
+            )
+        key = PageSizeTuner.key(name, params)
+        size = (
+            page_size
+            or getattr(r, "PAGE_SIZE", 0)
+            or Paginator.DEFAULT_PAGE_SIZE
+        )
+
+        # a local mirror needs no requests, not even the probe
+        mirror = None
+        if not params and strategy in (None, MIRROR):
+            mirror = self._snapshot(r, fields, max_age)
+        if mirror is not None:
+            count, file_size = mirror
+            estimate = {
+                "strategy": MIRROR,
+                "page_size": size,
+                "concurrency": 1,
+                "requests": 0,
+                "bytes": file_size,
+                "rate_limit_usage": 0.0,
+                "model_seconds": 0.0,
+                "seconds": 0.0,
+            }
+            return Plan(self, name, estimate, count, fields=fields)
+        if strategy == MIRROR:
+            raise ValueError(
+                f"Strategy ({MIRROR}) not available for {name}",
+                "it needs fields within SNAPSHOT_FIELDS, no filters and "
+                "a fresh snapshot",
+            )
+
+        _, total, response = r.get_page(
+            auth=self.api.get_credentials(),
+            page_no=1,
+            page_size=1,
+            priority=BULK,
+            spec=r.list_spec.merge(params, headers),
+        )
+        with self._lock:
+            state = dict(self._state.get(key, {}))
+        model = {
+            "overhead": self._smooth(state.get("overhead"), response.elapsed),
+            "per_record": state.get("per_record", self.RECORD_SECONDS),
+            # until a run is measured, a one record page is the best guess
+            "bytes_per_record": state.get(
+                "bytes_per_record", len(response.content)
+            ),
+            "ratios": state.get("ratios", {}),
+        }
+        # without a record count, only reading pages until a short one is
+        # sure to get every record; estimates then cover the first page
+        records = size if total is None else total
+        bulk = self.api.scheduler.lane_limits[BULK]
+        workers = max(min(concurrency or self.MAX_CONCURRENCY, bulk), 1)
+        pages = max(-(-records // size), 1)
+        candidates: list[dict[str, any]] = []
+        if total is not None and records <= self.SINGLE_MAX:
+            candidates.append(
+                self._cost(model, SINGLE, records, max(records, 1))
+            )
+        candidates.append(self._cost(model, SEQUENTIAL, records, size))
+        if total is not None and pages >= self.PARALLEL_MIN_PAGES:
+            candidates.append(
+                self._cost(
+                    model, PARALLEL, records, size, min(workers, pages - 1)
+                )
+            )
+        if strategy is not None:
+            chosen = [c for c in candidates if c["strategy"] == strategy]
+            if not chosen:
+                raise ValueError(
+                    f"Strategy ({strategy}) not available for {name}",
+                    f"options include: {[c['strategy'] for c in candidates]}",
+                )
+            best = chosen[0]
+        else:
+            candidates.sort(key=lambda c: (c["requests"], c["seconds"]))
+            best = candidates[0]
+            for other in candidates[1:]:
+                if other["seconds"] < best["seconds"] * self.FEWER_REQUESTS:
+                    best = other
+        return Plan(
+            self,
+            name,
+            best,
+            total,
+            params=params,
+            headers=headers,
+            fields=fields,
+            alternatives=[
+                {k: c[k] for k in ("strategy", "requests", "seconds")}
+                for c in candidates
+                if c is not best
+            ],
+            probe_seconds=response.elapsed,
+        )
+
+    def _smooth(self, current: float | None, value: float) -> float:
+        if current is None:
+            return value
+        return self.SMOOTHING * value + (1 - self.SMOOTHING) * current
+
+    def learn(self, plan: Plan) -> None:
+        """learn
+
+        Update the learned costs of a plan's resource and filters from its
+        actual cost, keep the run, and save.
+        """
+        actual = plan.actual
+        with self._lock:
+            state = self._state.setdefault(plan.key, {})
+            if plan.probe_seconds is not None:
+                state["overhead"] = self._smooth(
+                    state.get("overhead"), plan.probe_seconds
+                )
+            requests = actual["requests"]
+            if requests and plan.strategy != MIRROR:
+                mean = actual["request_seconds"] / requests
+                overhead = state.get("overhead", mean)
+                per_page = actual["records"] / requests
+                if per_page > 1:
+                    per_record = max((mean - overhead) / per_page, 1e-7)
+                    state["per_record"] = self._smooth(
+                        state.get("per_record"), per_record
+                    )
+                if actual["records"] and actual["bytes"]:
+                    state["bytes_per_record"] = self._smooth(
+                        state.get("bytes_per_record"),
+                        actual["bytes"] / actual["records"],
+                    )
+            # estimates without a record count cover only the first page
+            if plan.model_seconds and plan.record_count is not None:
+                ratios = state.setdefault("ratios", {})
+                ratios[plan.strategy] = self._smooth(
+                    ratios.get(plan.strategy),
+                    actual["seconds"] / plan.model_seconds,
+                )
+            runs = state.setdefault("runs", [])
+            runs.append(
+                {
+                    "at": time.time(),
+                    "strategy": plan.strategy,
+                    "estimated": {
+                        "requests": plan.requests,
+                        "bytes": plan.bytes,
+                        "seconds": plan.seconds,
+                    },
+                    "actual": {
+                        k: actual[k]
+                        for k in ("records", "requests", "bytes", "seconds")
+                    },
+                }
+            )
+            del runs[: -self.RUNS]
+        self.save()
+
+    def runs(
+        self, resource: str, params: dict[str, any] = None
+    ) -> list[dict[str, any]]:
+        """runs
+
+        Past runs of a resource and filters, oldest first, each with its
+        estimated and actual requests, bytes and seconds.
+        """
+        key = PageSizeTuner.key(resource, params)
+        with self._lock:
+            return list(self._state.get(key, {}).get("runs", []))
+
+    def _load(self) -> dict[str, dict[str, any]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """save
+
+        Write learned costs and runs to ``path``.
+        """
+        with self._lock:
+            if not self.path:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._state, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
@@ -0,0 +1,213 @@
+"""
+Prefetch
+========
+
+Resolve related resources for a batch of records in as few requests as
+possible.
+
+Instead of one ``get(resource, pk=...)`` per record, the distinct foreign
+keys of a batch are collected first. Small key sets are fetched concurrently
+by id, and large key sets are resolved from a single cached list request.
+"""
+
+# python
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+# Py-HaloPSA
+from halo_psa.core.deadline import Deadline
+
+
+class Prefetcher:
+    """
+    Prefetcher
+    ==========
+
+    Collects and caches related records for a :class:`HaloAPI` instance.
+
+    Example:
+    --------
+
+    Attach each asset's client and supplier::
+
+        >>> from halo_psa import Halo
+        >>> assets = Halo.get("assets")
+        >>> Halo.prefetch("assets", assets, related=["client", "supplier"])
+        >>> assets[0]["client"]["name"]
+        'Sandboxed Thoughts'
+
+    """
+
+    MAX_WORKERS: int = 8
+    """Number of concurrent requests used to fetch records by id"""
+    LIST_THRESHOLD: int = 25
+    """Distinct key count above which the full resource list is loaded"""
+
+    def __init__(
+        self,
+        api: object,
+        max_workers: int = MAX_WORKERS,
+        list_threshold: int = LIST_THRESHOLD,
+    ) -> None:
+        """__init__
+
+        Args:
+            api (HaloAPI): The API used to fetch related records.
+            max_workers (int, optional): Concurrent requests for id lookups.
+            Defaults to MAX_WORKERS.
+            list_threshold (int, optional): Distinct key count above which
+            the full list is fetched instead. Defaults to LIST_THRESHOLD.
+        """
+        self._api = api
+        self.max_workers: int = max_workers
+        self.list_threshold: int = list_threshold
+        self._cache: dict[str, dict[int, dict]] = {}
+        self._complete: set[str] = set()
+        self._lock: Lock = Lock()
+
+    @staticmethod
+    def _key(value: any) -> int | None:
+        """_key
+
+        Normalize a foreign key. HaloPSA uses ``0`` and ``-1`` for "none".
+        """
+        try:
+            key = int(value)
+        except (TypeError, ValueError):
+            return None
+        return key if key > 0 else None
+
+    def _load_list(self, resource: str, deadline: Deadline = None) -> None:
+        """_load_list
+
+        Cache every record of ``resource`` with a single list request.
+        """
+        records = self._api.get_all(resource, deadline=deadline)
+        with self._lock:
+            cache = self._cache.setdefault(resource, {})
+            for record in records:
+                cache[record["id"]] = record
+            self._complete.add(resource)
+
+    def _load_ids(
+        self, resource: str, keys: set[int], deadline: Deadline = None
+    ) -> None:
+        """_load_ids
+
+        Fetch the records of ``keys`` concurrently and cache them. Error
+        bodies, e.g. for a deleted record, are not cached, so those keys
+        stay unresolved.
+        """
+        # authenticate once before fanning out
+        self._api.connect(deadline)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(
+                lambda pk: (
+                    pk,
+                    self._api.get(resource, pk=pk, deadline=deadline),
+                ),
+                keys,
+            )
+            for pk, record in results:
+                if not isinstance(record, dict) or record.get("id") != pk:
+                    continue
+                with self._lock:
+                    self._cache.setdefault(resource, {})[pk] = record
+
+    def resolve(
+        self, resource: str, keys: set[int], deadline: Deadline = None
+    ) -> dict[int, dict]:
+        """resolve
+
+        Find the records of ``resource`` matching ``keys``.
+
+        Args:
+            resource (str): Name of the related resource.
+            keys (set[int]): Record ids to resolve.
+            deadline (Deadline, optional): Bounds the requests.
+
+        Returns:
+            dict[int, dict]: Resolved records by id.
+        """
+        resource = resource.lower()
+        cache = self._cache.get(resource, {})
+        missing = {k for k in keys if k not in cache}
+        if missing and resource not in self._complete:
+            if len(missing) > self.list_threshold:
+                self._load_list(resource, deadline)
+            else:
+                self._load_ids(resource, missing, deadline)
+            cache = self._cache.get(resource, {})
+        return {k: cache[k] for k in keys if k in cache}
+
+    def attach(
+        self,
+        resource: str,
+        records: list[dict],
+        related: list[str] = None,
+        deadline: Deadline = None,
+    ) -> list[dict]:
+        """attach
+
+        Add related records to each record in ``records`` in place.
+
+        Args:
+            resource (str): Name of the resource ``records`` belong to.
+            records (list[dict]): A batch of records.
+            related (list[str], optional): Relation names from the
+            resource's ``RELATIONS``. Defaults to all relations.
+            deadline (Deadline, optional): Bounds the requests.
+
+        Raises:
+            ValueError: A relation is not defined for the resource.
+            DeadlineExceeded: ``deadline`` passed.
+
+        Returns:
+            list[dict]: ``records`` with the related records attached.
+        """
+        relations = self._api.get_resource(resource.lower()).RELATIONS
+        names = relations.keys() if related is None else related
+        for name in names:
+            if name not in relations:
+                raise ValueError(
+                    f"Relation ({name}) not found",
+                    f"options include: {list(relations)}",
+                )
+            field, target = relations[name]
+            keys = {self._key(rec.get(field)) for rec in records} - {None}
+            found = self.resolve(target, keys, deadline)
+            for rec in records:
+                rec[name] = found.get(self._key(rec.get(field)))
+        return records
+
+    def upsert(self, resource: str, record: dict) -> None:
+        """upsert
+
+        Replace a cached record of ``resource``. Records of resources that
+        were never fetched are not cached.
+        """
+        with self._lock:
+            cache = self._cache.get(resource.lower())
+            if cache is not None:
+                cache[record["id"]] = record
+
+    def remove(self, resource: str, pk: int) -> None:
+        """remove
+
+        Drop a cached record of ``resource``.
+        """
+        with self._lock:
+            self._cache.get(resource.lower(), {}).pop(pk, None)
+
+    def clear(self, resource: str = None) -> None:
+        """clear
+
+        Drop cached records for ``resource``, or all cached records.
+        """
+        with self._lock:
+            if resource is None:
+                self._cache.clear()
+                self._complete.clear()
+            else:
+                self._cache.pop(resource.lower(), None)
+                self._complete.discard(resource.lower())
@@ -2,8 +2,10 @@ from .agents import AgentsResource
 from .assets import AssetsResource
 from .clients import ClientsResource
 from .suppliers import SuppliersResource
+from .tickets import TicketsResource
 
 Agents = AgentsResource
 Assets = AssetsResource
 Clients = ClientsResource
 Suppliers = SuppliersResource
+Tickets = TicketsResource
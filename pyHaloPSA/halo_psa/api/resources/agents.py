@@ -13,6 +13,7 @@ class AgentsResource(BaseResource):
 
     Attributes:
 
+        RESOURCE_NAME (str): agents
         RESOURCE_PAGE (str): Agent
         RESOURCE_DATA (str): None
 
@@ -36,6 +37,7 @@ class AgentsResource(BaseResource):
     """
 
     # Resource Attributes
+    RESOURCE_NAME: str = "agents"
     RESOURCE_PAGE: str = "Agent"
     RESOURCE_DATA: str = None
 
@@ -78,6 +80,21 @@ class AgentsResource(BaseResource):
         "includedisabled": INCLUDE_DISABLED,
     }
 
+    # Local Search
+    SEARCH_FIELDS: tuple[str, ...] = ("name", "email", "phonenumber")
+    """Record fields matched by a local search lookup"""
+
+    # Snapshot Schema
+    SNAPSHOT_FIELDS: dict[str, str] = {
+        "id": "int",
+        "name": "str",
+        "email": "str",
+        "phonenumber": "str",
+        "team": "str",
+        "isdisabled": "bool",
+    }
+    """Record fields and types kept in a binary snapshot"""
+
     def __init__(
         self,
         list_url: str = f"{RESOURCE_SERVER}/{RESOURCE_PAGE}",
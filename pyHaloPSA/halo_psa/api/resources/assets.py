@@ -18,6 +18,7 @@ class AssetsResource(BaseResource):
 
     Attributes:
 
+        RESOURCE_NAME (str): assets
         RESOURCE_PAGE (str): Asset
         RESOURCE_DATA (str): assets
 
@@ -47,9 +48,15 @@ class AssetsResource(BaseResource):
         includedetails (bool): True
         includediagramdetails (bool): True
 
+    Relations:
+
+        client: client_id -> clients
+        supplier: supplier_id -> suppliers
+
     """
 
     # Resource Attributes
+    RESOURCE_NAME: str = "assets"
     RESOURCE_PAGE: str = "Asset"
     RESOURCE_DATA: str = "assets"
 
@@ -119,6 +126,33 @@ class AssetsResource(BaseResource):
     INCLUDE_DIAGRAM_DETAILS: bool = True
     """Whether to include diagram details in the response"""
 
+    # Related Resources
+    RELATIONS: dict[str, tuple[str, str]] = {
+        "client": ("client_id", "clients"),
+        "supplier": ("supplier_id", "suppliers"),
+    }
+    """Related resources that can be prefetched with the assets."""
+
+    # Local Search
+    SEARCH_FIELDS: tuple[str, ...] = ("inventory_number", "key_field")
+    """Record fields matched by a local search lookup"""
+
+    # Snapshot Schema
+    SNAPSHOT_FIELDS: dict[str, str] = {
+        "id": "int",
+        "inventory_number": "str",
+        "key_field": "str",
+        "client_id": "int",
+        "client_name": "str",
+        "site_id": "int",
+        "site_name": "str",
+        "supplier_id": "int",
+        "assettype_id": "int",
+        "assettype_name": "str",
+        "inactive": "bool",
+    }
+    """Record fields and types kept in a binary snapshot"""
+
     def __init__(
         self,
         list_url: str = f"{RESOURCE_SERVER}/{RESOURCE_PAGE}",
@@ -13,6 +13,7 @@ class ClientsResource(BaseResource):
 
     Attributes:
 
+        RESOURCE_NAME (str): clients
         RESOURCE_PAGE (str): Client
         RESOURCE_DATA (str): clients
 
@@ -37,6 +38,7 @@ class ClientsResource(BaseResource):
     """
 
     # Resource Attributes
+    RESOURCE_NAME: str = "clients"
     RESOURCE_PAGE: str = "Client"
     RESOURCE_DATA: str = "clients"
 
@@ -81,6 +83,16 @@ class ClientsResource(BaseResource):
         "count": COUNT,
     }
 
+    # Snapshot Schema
+    SNAPSHOT_FIELDS: dict[str, str] = {
+        "id": "int",
+        "name": "str",
+        "toplevel_id": "int",
+        "toplevel_name": "str",
+        "inactive": "bool",
+    }
+    """Record fields and types kept in a binary snapshot"""
+
     def __init__(
         self,
         list_url: str = f"{RESOURCE_SERVER}/{RESOURCE_PAGE}",
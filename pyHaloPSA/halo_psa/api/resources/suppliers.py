@@ -14,6 +14,7 @@ class SuppliersResource(BaseResource):
 
     Attributes:
 
+        RESOURCE_NAME (str): suppliers
         RESOURCE_PAGE (str): Supplier
         RESOURCE_DATA (str): suppliers
 
@@ -37,6 +38,7 @@ class SuppliersResource(BaseResource):
     """
 
     # Resource Attributes
+    RESOURCE_NAME: str = "suppliers"
     RESOURCE_PAGE: str = "Supplier"
     RESOURCE_DATA: str = "suppliers"
 
@@ -79,6 +81,15 @@ class SuppliersResource(BaseResource):
         "includeactive": INCLUDE_ACTIVE,
     }
 
+    # Snapshot Schema
+    SNAPSHOT_FIELDS: dict[str, str] = {
+        "id": "int",
+        "name": "str",
+        "toplevel_id": "int",
+        "inactive": "bool",
+    }
+    """Record fields and types kept in a binary snapshot"""
+
     def __init__(
         self,
         list_url: str = f"{RESOURCE_SERVER}/{RESOURCE_PAGE}",
@@ -0,0 +1,187 @@
+from halo_psa.config.settings import RESOURCE_SERVER
+from halo_psa.core import BaseResource
+
+
+class TicketsResource(BaseResource):
+    """
+    TicketsResource
+    ===============
+
+    Returns an object containing the count of Tickets, and an array of
+    Ticket objects.
+    https://haloacademy.halopsa.com/apidoc/resources/tickets
+
+    Tickets are usually the largest resource by far. Use
+    :func:`HaloAPI.scan` to pull a date range in concurrent time windows
+    instead of paging through every ticket.
+
+    Attributes:
+
+        RESOURCE_NAME (str): tickets
+        RESOURCE_PAGE (str): Tickets
+        RESOURCE_DATA (str): tickets
+        DATE_FIELD (str): dateoccurred
+
+    List Params:
+
+        pageinate (bool): False
+        page_size (int): 0
+        page_no (int): 0
+        order (str): id
+        orderdesc (bool): False
+        search (str): None
+        count (int): 5000
+        ticketidonly (bool): False
+        view_id (int): None
+        agent_id (int): None
+        status_id (int): None
+        requesttype_id (int): None
+        supplier_id (int): None
+        client_id (int): None
+        site_id (int): None
+        username (str): None
+        user_id (int): None
+        asset_id (int): None
+        open_only (bool): None
+        closed_only (bool): None
+        startdate (str): None
+        enddate (str): None
+        datesearch (str): None
+
+    Lookup Params:
+
+        includedetails (bool): True
+        includelastaction (bool): False
+
+    Relations:
+
+        client: client_id -> clients
+        agent: agent_id -> agents
+        supplier: supplier_id -> suppliers
+
+    """
+
+    # Resource Attributes
+    RESOURCE_NAME: str = "tickets"
+    RESOURCE_PAGE: str = "Tickets"
+    RESOURCE_DATA: str = "tickets"
+
+    # Default List Params
+    PAGENATE: bool = False
+    """Whether to use Pagination in the response"""
+    PAGE_SIZE: int = 0
+    """When using Pagination, the size of the page"""
+    PAGE_NO: int = 0
+    """When using Pagination, the page number to return"""
+    ORDER: str = "id"
+    """The name of the field to order by"""
+    ORDER_DESC: bool = False
+    """Whether to order ascending or descending"""
+    SEARCH: str = None
+    """Filter by Tickets like your search string"""
+    COUNT: int = 5000
+    """When not using pagination, the number of results to return"""
+    TICKET_ID_ONLY: bool = False
+    """Only return the ids of the Tickets"""
+    VIEW_ID: int = None
+    """Filter by a particular ticket view"""
+    AGENT_ID: int = None
+    """Filter by Tickets assigned to a particular agent"""
+    STATUS_ID: int = None
+    """Filter by Tickets in a particular status"""
+    REQUESTTYPE_ID: int = None
+    """Filter by Tickets of a particular ticket type"""
+    SUPPLIER_ID: int = None
+    """Filter by Tickets assigned to a particular supplier"""
+    CLIENT_ID: int = None
+    """Filter by Tickets belonging to a particular client"""
+    SITE_ID: int = None
+    """Filter by Tickets belonging to a particular site"""
+    USERNAME: str = None
+    """Filter by Tickets belonging to a particular user"""
+    USER_ID: int = None
+    """Filter by Tickets belonging to a particular user id"""
+    ASSET_ID: int = None
+    """Filter by Tickets linked to a particular Asset"""
+    OPEN_ONLY: bool = None
+    """Only return open Tickets"""
+    CLOSED_ONLY: bool = None
+    """Only return closed Tickets"""
+    START_DATE: str = None
+    """Filter by Tickets with a ``datesearch`` date on or after this"""
+    END_DATE: str = None
+    """Filter by Tickets with a ``datesearch`` date on or before this"""
+    DATE_SEARCH: str = None
+    """The date field ``startdate`` and ``enddate`` apply to"""
+
+    LIST_PARAMS: dict[str, any] = {
+        "pageinate": PAGENATE,
+        "page_size": PAGE_SIZE,
+        "page_no": PAGE_NO,
+        "order": ORDER,
+        "orderdesc": ORDER_DESC,
+        "search": SEARCH,
+        "count": COUNT,
+        "ticketidonly": TICKET_ID_ONLY,
+        "view_id": VIEW_ID,
+        "agent_id": AGENT_ID,
+        "status_id": STATUS_ID,
+        "requesttype_id": REQUESTTYPE_ID,
+        "supplier_id": SUPPLIER_ID,
+        "client_id": CLIENT_ID,
+        "site_id": SITE_ID,
+        "username": USERNAME,
+        "user_id": USER_ID,
+        "asset_id": ASSET_ID,
+        "open_only": OPEN_ONLY,
+        "closed_only": CLOSED_ONLY,
+        "startdate": START_DATE,
+        "enddate": END_DATE,
+        "datesearch": DATE_SEARCH,
+    }
+    """A dictionary mapping of available parameters."""
+
+    # Default Lookup Params (RESOURCE_PAGE/ID)
+    INCLUDE_DETAILS: bool = True
+    """Whether to include extra objects in the response"""
+    INCLUDE_LAST_ACTION: bool = False
+    """Whether to include the last action in the response"""
+
+    # Related Resources
+    RELATIONS: dict[str, tuple[str, str]] = {
+        "client": ("client_id", "clients"),
+        "agent": ("agent_id", "agents"),
+        "supplier": ("supplier_id", "suppliers"),
+    }
+    """Related resources that can be prefetched with the tickets."""
+
+    # Local Search
+    SEARCH_FIELDS: tuple[str, ...] = ("summary",)
+    """Record fields matched by a local search lookup"""
+
+    # Time Window Scans
+    DATE_FIELD: str = "dateoccurred"
+    """Record date field that ``startdate`` and ``enddate`` filter on"""
+
+    # Snapshot Schema
+    SNAPSHOT_FIELDS: dict[str, str] = {
+        "id": "int",
+        "summary": "str",
+        "client_id": "int",
+        "client_name": "str",
+        "agent_id": "int",
+        "status_id": "int",
+        "tickettype_id": "int",
+        "priority_id": "int",
+        "dateoccurred": "str",
+    }
+    """Record fields and types kept in a binary snapshot"""
+
+    def __init__(
+        self,
+        list_url: str = f"{RESOURCE_SERVER}/{RESOURCE_PAGE}",
+        data_group: str = RESOURCE_DATA,
+        **extra,
+    ):
+        """Initialize the object"""
+        super().__init__(list_url, data_group, **extra)
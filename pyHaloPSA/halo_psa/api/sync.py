@@ -0,0 +1,730 @@
+"""
+Sync
+====
+
+Full syncs of large resources split into shards and worked through by
+several processes, or several machines, at once.
+
+A sync job splits a resource into shards of consecutive pages and queues
+them in a SQLite file. Workers claim a shard at a time, write its records
+to the shard's own NDJSON file and mark it done. Each claim is a lease
+that the worker renews after every page; when a worker dies, its lease
+runs out and the shard is claimed again. A shard that fails is retried up
+to MAX_ATTEMPTS times. Once no shards are left to claim, idle workers
+start a second copy of any shard running far longer than the typical
+shard, and whichever copy finishes first is kept.
+
+The results are merged in page order, so a sharded sync yields the same
+records as :func:`HaloAPI.iter_pages`.
+
+Workers on other machines join a job by pointing ``halo-psa work`` at the
+same queue file; the queue and the shard files must be on storage every
+worker can reach.
+
+Example:
+--------
+
+    >>> sync = Halo.sync("assets", processes=8).run()
+    >>> sync.merge("assets.ndjson")
+
+On other nodes, while it runs::
+
+    halo-psa work /shared/halo_sync.db
+
+"""
+
+# python
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import statistics
+import time
+from typing import Iterator, NamedTuple
+
+# Py-HaloPSA
+from halo_psa.config import settings
+from halo_psa.core import Paginator
+from halo_psa.core.scheduler import BULK
+from halo_psa.core.transport import TransportError
+
+PENDING: str = "pending"
+"""Shard waiting for a worker"""
+RUNNING: str = "running"
+"""Shard claimed by a worker"""
+DONE: str = "done"
+"""Shard written to its file"""
+FAILED: str = "failed"
+"""Shard that ran out of attempts"""
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    resource TEXT NOT NULL,
+    params TEXT NOT NULL,
+    page_size INTEGER NOT NULL,
+    record_count INTEGER,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    job INTEGER NOT NULL REFERENCES jobs (id),
+    no INTEGER NOT NULL,
+    first_page INTEGER NOT NULL,
+    last_page INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    copies INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_until REAL,
+    started_at REAL,
+    finished_at REAL,
+    records INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, job, no);
+"""
+
+
+class SyncError(Exception):
+    """
+    SyncError
+    =========
+
+    A sync job finished with failed shards.
+
+    Attributes:
+
+        failed (list[dict]): The failed shards and their last errors.
+
+    """
+
+    def __init__(self, failed: list[dict]) -> None:
+        super().__init__(
+            f"{len(failed)} shard(s) failed, first: {failed[0]['error']}"
+        )
+        self.failed: list[dict] = failed
+
+
+class Shard(NamedTuple):
+    """A claimed range of pages of a sync job."""
+
+    id: int
+    job: int
+    no: int
+    resource: str
+    params: dict[str, any]
+    page_size: int
+    first_page: int
+    last_page: int | None
+    path: str
+
+
+def worker_name() -> str:
+    """worker_name
+
+    ``host:pid`` of this process, unique across the workers of a queue.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardQueue:
+    """
+    ShardQueue
+    ==========
+
+    The SQLite work queue shared by a sync's coordinator and workers.
+
+    Claims run in an immediate transaction, so concurrent workers never
+    take the same pending shard. Every process opens its own queue.
+    """
+
+    LEASE_SECONDS: float = settings.SYNC_LEASE_SECONDS
+    """Seconds a claim is held without a renewal"""
+    MAX_ATTEMPTS: int = 3
+    """Claims of a shard before it is failed"""
+    STRAGGLER_FACTOR: float = 3.0
+    """Multiple of the median shard time after which a copy is started"""
+    STRAGGLER_SECONDS: float = 10.0
+    """Least run time before a shard counts as straggling"""
+
+    def __init__(self, path: str, lease_seconds: float = LEASE_SECONDS):
+        """__init__
+
+        Args:
+            path (str): The queue file, created if missing.
+            lease_seconds (float, optional): Seconds a claim is held
+            without a renewal. Defaults to SYNC_LEASE_SECONDS.
+        """
+        self.path: str = os.path.expanduser(path)
+        self.lease_seconds: float = lease_seconds
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        self._db: sqlite3.Connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None
+        )
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def plan(
+        self,
+        resource: str,
+        page_size: int,
+        shard_pages: int,
+        record_count: int | None,
+        params: dict[str, any] = None,
+        output: str = None,
+    ) -> int:
+        """plan
+
+        Queue a sync job. Without a record count, the job is a single
+        shard that reads until an empty page.
+
+        Args:
+            resource (str): The resource's name
+            page_size (int): Records per page
+            shard_pages (int): Pages per shard
+            record_count (int | None): Records in the resource
+            params (dict[str, any], optional): Query parameters
+            output (str, optional): Directory of the shard files.
+            Defaults to a directory next to the queue file.
+
+        Returns:
+            int: The job's id.
+        """
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            job = self._db.execute(
+                "INSERT INTO jobs (resource, params, page_size, record_count, "
+                "output, created_at) VALUES (?, ?, ?, ?, '', ?)",
+                (
+                    resource,
+                    json.dumps(params or {}),
+                    page_size,
+                    record_count,
+                    time.time(),
+                ),
+            ).lastrowid
+            output = output or f"{self.path}.d/{job}"
+            self._db.execute(
+                "UPDATE jobs SET output = ? WHERE id = ?",
+                (os.path.abspath(output), job),
+            )
+            if record_count is None:
+                ranges = [(1, None)]
+            else:
+                pages = max(-(-record_count // page_size), 1)
+                ranges = [
+                    (first, min(first + shard_pages - 1, pages))
+                    for first in range(1, pages + 1, shard_pages)
+                ]
+            self._db.executemany(
+                "INSERT INTO shards (job, no, first_page, last_page) "
+                "VALUES (?, ?, ?, ?)",
+                [(job, no, *pages) for no, pages in enumerate(ranges)],
+            )
+        os.makedirs(output, exist_ok=True)
+        return job
+
+    def _shard(self, row: sqlite3.Row) -> Shard:
+        return Shard(
+            id=row["id"],
+            job=row["job"],
+            no=row["no"],
+            resource=row["resource"],
+            params=json.loads(row["params"]),
+            page_size=row["page_size"],
+            first_page=row["first_page"],
+            last_page=row["last_page"],
+            path=os.path.join(row["output"], f"{row['no']:06}.ndjson"),
+        )
+
+    _SELECT: str = (
+        "SELECT shards.*, jobs.resource, jobs.params, jobs.page_size, "
+        "jobs.output FROM shards JOIN jobs ON jobs.id = shards.job "
+    )
+
+    def _straggler(self, now: float) -> sqlite3.Row | None:
+        """_straggler
+
+        A running shard without a copy that has run STRAGGLER_FACTOR
+        times longer than its job's median finished shard, and at least
+        STRAGGLER_SECONDS.
+        """
+        medians = {}
+        for job, started, finished in self._db.execute(
+            "SELECT job, started_at, finished_at FROM shards "
+            "WHERE status = ?",
+            (DONE,),
+        ):
+            medians.setdefault(job, []).append(finished - started)
+        for row in self._db.execute(
+            self._SELECT + "WHERE status = ? AND copies = 1 "
+            "ORDER BY started_at",
+            (RUNNING,),
+        ):
+            times = medians.get(row["job"])
+            if not times:
+                continue
+            limit = max(
+                self.STRAGGLER_FACTOR * statistics.median(times),
+                self.STRAGGLER_SECONDS,
+            )
+            if now - row["started_at"] > limit:
+                return row
+        return None
+
+    def claim(self, worker: str) -> Shard | None:
+        """claim
+
+        Lease the next pending shard, a shard whose lease ran out, or a
+        copy of a straggling shard.
+
+        Args:
+            worker (str): The claiming worker's name
+
+        Returns:
+            Shard | None: The claimed shard, or None when nothing is left
+            to claim.
+        """
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            while True:
+                row = self._db.execute(
+                    self._SELECT + "WHERE status = ? OR (status = ? AND "
+                    "lease_until < ?) ORDER BY job, no LIMIT 1",
+                    (PENDING, RUNNING, now),
+                ).fetchone()
+                if row is None or row["attempts"] < self.MAX_ATTEMPTS:
+                    break
+                self._db.execute(
+                    "UPDATE shards SET status = ?, error = ? WHERE id = ?",
+                    (FAILED, row["error"] or "lease expired", row["id"]),
+                )
+            if row is not None:
+                self._db.execute(
+                    "UPDATE shards SET status = ?, owner = ?, "
+                    "lease_until = ?, started_at = ?, "
+                    "attempts = attempts + 1, copies = 1 WHERE id = ?",
+                    (
+                        RUNNING,
+                        worker,
+                        now + self.lease_seconds,
+                        now,
+                        row["id"],
+                    ),
+                )
+                return self._shard(row)
+            row = self._straggler(now)
+            if row is not None:
+                self._db.execute(
+                    "UPDATE shards SET copies = copies + 1 WHERE id = ?",
+                    (row["id"],),
+                )
+                return self._shard(row)
+        return None
+
+    def renew(self, shard: Shard, worker: str) -> None:
+        """renew
+
+        Extend the lease of a shard the worker owns.
+        """
+        with self._db:
+            self._db.execute(
+                "UPDATE shards SET lease_until = ? "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (time.time() + self.lease_seconds, shard.id, worker, RUNNING),
+            )
+
+    def complete(self, shard: Shard, worker: str, records: int) -> bool:
+        """complete
+
+        Mark a shard done.
+
+        Returns:
+            bool: False if another copy of the shard finished first.
+        """
+        with self._db:
+            updated = self._db.execute(
+                "UPDATE shards SET status = ?, owner = ?, records = ?, "
+                "finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (
+                    DONE,
+                    worker,
+                    records,
+                    time.time(),
+                    shard.id,
+                    RUNNING,
+                    PENDING,
+                ),
+            )
+        return updated.rowcount == 1
+
+    def fail(
+        self, shard: Shard, worker: str, error: str, retry: bool = True
+    ) -> None:
+        """fail
+
+        Record a failed attempt. The shard is queued again while it has
+        attempts left and the error is worth retrying. Failures of a
+        straggler's copy are ignored.
+        """
+        with self._db:
+            self._db.execute(
+                "UPDATE shards SET status = CASE WHEN ? AND attempts < ? "
+                "THEN ? ELSE ? END, error = ?, owner = NULL "
+                "WHERE id = ? AND owner = ? AND status = ?",
+                (
+                    retry,
+                    self.MAX_ATTEMPTS,
+                    PENDING,
+                    FAILED,
+                    error,
+                    shard.id,
+                    worker,
+                    RUNNING,
+                ),
+            )
+
+    def active(self, job: int = None) -> bool:
+        """active
+
+        Whether any shard, of ``job`` or of any job, is pending or running.
+        """
+        query = "SELECT 1 FROM shards WHERE status IN (?, ?)"
+        args = [PENDING, RUNNING]
+        if job is not None:
+            query += " AND job = ?"
+            args.append(job)
+        row = self._db.execute(query + " LIMIT 1", args).fetchone()
+        return row is not None
+
+    def status(self, job: int) -> dict[str, int]:
+        """status
+
+        Shard counts of a job by status, and the records written.
+        """
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0, "records": 0}
+        for status, shards, records in self._db.execute(
+            "SELECT status, COUNT(*), SUM(records) FROM shards "
+            "WHERE job = ? GROUP BY status",
+            (job,),
+        ):
+            counts[status] = shards
+            counts["records"] += records or 0
+        return counts
+
+    def shards(self, job: int) -> list[dict[str, any]]:
+        """shards
+
+        Every shard of a job, in page order.
+        """
+        return [
+            {**dict(row), "path": self._shard(row).path}
+            for row in self._db.execute(
+                self._SELECT + "WHERE job = ? ORDER BY no", (job,)
+            )
+        ]
+
+
+def run_shard(
+    api: object, queue: ShardQueue, shard: Shard, worker: str
+) -> int:
+    """run_shard
+
+    Fetch a shard's pages and write its records to the shard's file.
+    Records are written to a temporary file first, so the shard file is
+    either complete or missing.
+
+    Returns:
+        int: Records written.
+    """
+    resource = api.get_resource(shard.resource)
+    spec = resource.list_spec.merge(shard.params)
+    tmp = f"{shard.path}.{worker.replace(':', '-')}.tmp"
+    records = 0
+    page_no = shard.first_page
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            while shard.last_page is None or page_no <= shard.last_page:
+                page = resource.get_page(
+                    auth=api.get_credentials(),
+                    page_no=page_no,
+                    page_size=shard.page_size,
+                    priority=BULK,
+                    spec=spec,
+                )[0]
+                f.write(
+                    "".join(
+                        json.dumps(r, separators=(",", ":")) + "\n"
+                        for r in page
+                    )
+                )
+                records += len(page)
+                queue.renew(shard, worker)
+                if len(page) < shard.page_size:
+                    break
+                page_no += 1
+        os.replace(tmp, shard.path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return records
+
+
+def work(
+    queue: str,
+    worker: str = None,
+    api: object = None,
+    wait: bool = True,
+    poll: float = 1.0,
+) -> int:
+    """work
+
+    Work through a queue's shards until none are pending or running. This
+    is the entry point of worker processes and of ``halo-psa work``.
+
+    Args:
+        queue (str): The queue file
+        worker (str, optional): The worker's name. Defaults to host:pid.
+        api (HaloAPI, optional): The API to fetch with. Defaults to a new
+        one configured from the settings.
+        wait (bool, optional): Keep polling while other workers still run
+        shards that may be retried or copied. Defaults to True.
+        poll (float, optional): Seconds between polls. Defaults to 1.0.
+
+    Returns:
+        int: Shards this worker finished first.
+    """
+    if api is None:
+        from halo_psa.api import HaloAPI
+
+        api = HaloAPI()
+    worker = worker or worker_name()
+    queue = ShardQueue(queue)
+    done = 0
+    try:
+        while True:
+            shard = queue.claim(worker)
+            if shard is None:
+                if not wait or not queue.active():
+                    return done
+                time.sleep(poll)
+                continue
+            try:
+                records = run_shard(api, queue, shard, worker)
+            except Exception as err:
+                retry = not isinstance(err, TransportError) or err.retryable
+                queue.fail(shard, worker, repr(err), retry)
+                continue
+            done += queue.complete(shard, worker, records)
+    finally:
+        queue.close()
+
+
+class ShardedSync:
+    """
+    ShardedSync
+    ===========
+
+    Plans a sharded sync of one resource, runs local worker processes and
+    merges the shard files.
+
+    The coordinator probes the record count with a one record page, plans
+    shards of ``shard_pages`` pages and starts ``processes`` workers. If
+    the local workers exit while shards remain, or there are none, the
+    coordinator works through the remaining shards itself, alongside any
+    workers on other machines.
+
+    Example:
+    --------
+
+        >>> sync = ShardedSync(Halo, "assets", processes=8).run()
+        >>> for page in sync.pages():
+        >>>     write(page)
+
+    """
+
+    PROCESSES: int = settings.SYNC_PROCESSES
+    """Local worker processes (0 for one per CPU)"""
+    SHARD_PAGES: int = settings.SYNC_SHARD_PAGES
+    """Pages per shard"""
+    QUEUE: str = os.path.join(settings.SYNC_DIR, "halo_sync.db")
+    """Default queue file"""
+
+    def __init__(
+        self,
+        api: object,
+        resource: str,
+        queue: str = QUEUE,
+        processes: int = PROCESSES,
+        shard_pages: int = SHARD_PAGES,
+        page_size: int = None,
+        params: dict[str, any] = None,
+        output: str = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            api (HaloAPI): The API used to plan the job.
+            resource (str): The resource's name.
+            queue (str, optional): The queue file. Defaults to QUEUE.
+            processes (int, optional): Local worker processes, 0 for one
+            per CPU, None to work in this process. Defaults to PROCESSES.
+            shard_pages (int, optional): Pages per shard.
+            Defaults to SHARD_PAGES.
+            page_size (int, optional): Records per page.
+            Defaults to the resource's PAGE_SIZE.
+            params (dict[str, any], optional): Query parameters.
+            output (str, optional): Directory of the shard files.
+            Defaults to a directory next to the queue file.
+        """
+        self.api = api
+        self.resource = api.get_resource(resource.lower())
+        self.queue: ShardQueue = ShardQueue(queue)
+        self.processes: int = (
+            (processes or os.cpu_count() or 1) if processes is not None else 0
+        )
+        self.shard_pages: int = max(shard_pages, 1)
+        self.page_size: int = (
+            page_size
+            or getattr(self.resource, "PAGE_SIZE", 0)
+            or Paginator.DEFAULT_PAGE_SIZE
+        )
+        self.params: dict[str, any] = params or {}
+        self.output: str = output
+        self.job: int = None
+
+    def plan(self) -> int:
+        """plan
+
+        Probe the record count and queue the job's shards.
+
+        Returns:
+            int: The job's id.
+        """
+        spec = self.resource.list_spec.merge(self.params)
+        _, total, _ = self.resource.get_page(
+            auth=self.api.get_credentials(),
+            page_no=1,
+            page_size=1,
+            spec=spec,
+        )
+        self.job = self.queue.plan(
+            self.resource.RESOURCE_NAME,
+            self.page_size,
+            self.shard_pages,
+            total,
+            self.params,
+            self.output,
+        )
+        return self.job
+
+    def run(self, poll: float = 1.0) -> "ShardedSync":
+        """run
+
+        Plan the job if needed, run the local workers and wait until every
+        shard is done.
+
+        Raises:
+            SyncError: Shards failed after every attempt.
+
+        Returns:
+            ShardedSync: This sync, ready to be merged.
+        """
+        if self.job is None:
+            self.plan()
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=work, args=(self.queue.path,), daemon=True)
+            for _ in range(self.processes)
+        ]
+        for process in workers:
+            process.start()
+        try:
+            while self.queue.active(self.job):
+                if not any(process.is_alive() for process in workers):
+                    # no local workers (left): work through the shards here
+                    work(self.queue.path, api=self.api, poll=poll)
+                    break
+                time.sleep(poll)
+        finally:
+            for process in workers:
+                process.join(poll)
+                if process.is_alive():
+                    process.terminate()
+        shards = self.queue.shards(self.job)
+        failed = [s for s in shards if s["status"] == FAILED]
+        if failed:
+            raise SyncError(failed)
+        return self
+
+    def status(self) -> dict[str, int]:
+        """status
+
+        Shard counts by status, and the records written so far.
+        """
+        return self.queue.status(self.job)
+
+    def paths(self) -> list[str]:
+        """paths
+
+        The shard files, in page order.
+        """
+        return [shard["path"] for shard in self.queue.shards(self.job)]
+
+    def pages(self) -> Iterator[list[dict[str, any]]]:
+        """pages
+
+        Yield the merged records, one page at a time.
+        """
+        page = []
+        for path in self.paths():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    page.append(json.loads(line))
+                    if len(page) == self.page_size:
+                        yield page
+                        page = []
+        if page:
+            yield page
+
+    def records(self) -> Iterator[dict[str, any]]:
+        """records
+
+        Yield the merged records.
+        """
+        for page in self.pages():
+            yield from page
+
+    def merge(self, path: str) -> str:
+        """merge
+
+        Concatenate the shard files into one NDJSON file, without decoding
+        the records.
+
+        Returns:
+            str: ``path``
+        """
+        with open(path, "wb") as out:
+            for shard in self.paths():
+                with open(shard, "rb") as f:
+                    shutil.copyfileobj(f, out)
+        return path
+
+    def cleanup(self) -> None:
+        """cleanup
+
+        Remove the job's shard files.
+        """
+        for path in self.paths():
+            if os.path.exists(path):
+                os.remove(path)
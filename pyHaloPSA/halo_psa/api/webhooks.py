@@ -0,0 +1,568 @@
+"""
+Webhooks
+========
+
+Keep a :class:`HaloAPI`'s local caches fresh from HaloPSA webhooks instead
+of polling.
+
+Point a HaloPSA webhook at a :class:`WebhookServer`, or mount
+:class:`WebhookReceiver` in an ASGI application. Each accepted event
+updates the matching resource's index and prefetch cache, and can be
+forwarded to a local mirror with ``on_batch``. Bursts are applied in
+batches, one change per record. Events that carry only an id are
+reconciled by fetching the record, and every ``reconcile_seconds`` the
+indexes are reloaded in full to repair anything a missed event left
+behind.
+
+Accepted payloads:
+------------------
+
+A JSON object, or a list of them, in either shape::
+
+    {"resource": "clients", "action": "updated", "record": {"id": 12, ...}}
+    {"event": "Client Deleted", "object_id": 12}
+    {"event": "Asset Updated", "asset": {"id": 8, ...}}
+
+The resource is taken from ``resource``, from the event name, with the
+page name in singular or plural form ("Ticket Updated", "Clients
+Updated"), or else from a key naming the resource's page (``client``,
+``asset``, ...). An action or event name containing "delete" removes the
+record.
+
+Validation:
+-----------
+
+When a secret is set, a request must carry one of:
+
+    X-Halo-Signature: ``sha256=`` and the hex HMAC-SHA256 of the body.
+    Authorization: ``Bearer <secret>``, or Basic auth with the secret as
+    the password.
+
+"""
+
+# python
+import base64
+import hashlib
+import hmac
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Callable, NamedTuple
+
+# Py-HaloPSA
+from halo_psa.config import settings
+from halo_psa.core.scheduler import DEFAULT
+from halo_psa.core.transport import TransportError
+
+SIGNATURE_HEADER: str = "x-halo-signature"
+"""Header carrying the HMAC signature of the body"""
+
+
+class WebhookEvent(NamedTuple):
+    """A change to one record."""
+
+    resource: str
+    """Name of the changed resource"""
+    pk: int
+    """Id of the changed record"""
+    deleted: bool = False
+    """The record was deleted"""
+    record: dict = None
+    """The record's new data, when the payload included it"""
+
+
+def sign(body: bytes, secret: str) -> str:
+    """sign
+
+    The ``X-Halo-Signature`` value for ``body``, for sending events from
+    tests or local tools.
+    """
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def _same(given: str, expected: str) -> bool:
+    return hmac.compare_digest(given.encode(), expected.encode())
+
+
+class WebhookReceiver:
+    """
+    WebhookReceiver
+    ===============
+
+    Validates webhook requests, queues their events and applies them to an
+    API's caches in batches from a background thread.
+
+    Example:
+    --------
+
+        >>> receiver = Halo.webhooks(secret="s3cret")
+        >>> with WebhookServer(receiver, port=8080):
+        >>>     serve_forever()
+
+    Events can be applied without a server or thread, e.g. in tests::
+
+        >>> body = json.dumps({"event": "Client Deleted", "object_id": 12})
+        >>> receiver.handle(body.encode(), {"X-Halo-Signature": sign(...)})
+        (202, 'accepted 1 events')
+        >>> receiver.flush()
+
+    """
+
+    BATCH_SECONDS: float = settings.WEBHOOK_BATCH_SECONDS
+    """Seconds to collect a burst of events before applying them"""
+    RECONCILE_SECONDS: float = settings.WEBHOOK_RECONCILE_SECONDS
+    """Seconds between full reloads of the indexes (0 to disable)"""
+    MAX_BATCH: int = 1000
+    """Most events applied in one batch"""
+    MAX_QUEUE: int = 10000
+    """Most events waiting to be applied before requests are refused"""
+
+    def __init__(
+        self,
+        api: object,
+        secret: str = settings.WEBHOOK_SECRET,
+        batch_seconds: float = BATCH_SECONDS,
+        reconcile_seconds: float = RECONCILE_SECONDS,
+        on_batch: Callable[[list[WebhookEvent]], None] = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            api (HaloAPI): The API whose caches are updated.
+            secret (str, optional): Shared secret, or "" to accept unsigned
+            requests. Defaults to WEBHOOK_SECRET.
+            batch_seconds (float, optional): Seconds to collect a burst.
+            Defaults to BATCH_SECONDS.
+            reconcile_seconds (float, optional): Seconds between full
+            reloads. Defaults to RECONCILE_SECONDS.
+            on_batch (Callable[[list[WebhookEvent]], None], optional):
+            Called with each applied batch, after records were fetched,
+            e.g. to update a local mirror.
+        """
+        self._api = api
+        self.secret: str = secret
+        self.batch_seconds: float = batch_seconds
+        self.reconcile_seconds: float = reconcile_seconds
+        self.on_batch: Callable[[list[WebhookEvent]], None] = on_batch
+        self._queue: Queue = Queue(self.MAX_QUEUE)
+        self._stop: Event = Event()
+        self._thread: Thread = None
+        self._lock: Lock = Lock()
+        self._reconciled_at: float = monotonic()
+        self._pending_reconcile: set[str] = set()
+        self._stats: dict[str, int] = dict.fromkeys(
+            (
+                "received",
+                "rejected",
+                "applied",
+                "batches",
+                "fetched",
+                "reconciles",
+                "errors",
+            ),
+            0,
+        )
+
+    # Requests
+
+    def verify(self, body: bytes, headers: dict[str, str]) -> bool:
+        """verify
+
+        ``True`` if the request carries a valid signature or credentials,
+        or no secret is set.
+        """
+        if not self.secret:
+            return True
+        headers = {k.lower(): v for k, v in headers.items()}
+        signature = headers.get(SIGNATURE_HEADER)
+        if signature:
+            return _same(signature, sign(body, self.secret))
+        scheme, _, value = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            return _same(value, self.secret)
+        if scheme.lower() == "basic":
+            try:
+                decoded = base64.b64decode(value).decode()
+            except ValueError:
+                return False
+            password = decoded.partition(":")[2]
+            return _same(password, self.secret)
+        return False
+
+    def _resource_of(self, payload: dict) -> tuple[str, dict] | None:
+        """_resource_of
+
+        The resource named by a payload, and the record it carries. The
+        event name decides the resource, and only that resource's key is
+        read as the record; payloads often embed related records, such as
+        an asset's ``client``. Keys are matched only when the event names
+        no resource.
+
+        Raises:
+            ValueError: ``resource`` is not a known resource name.
+        """
+        name = payload.get("resource")
+        if name is not None:
+            if not isinstance(name, str):
+                raise ValueError("Webhook event resource is not a name")
+            return self._api.get_resource(name.lower()).RESOURCE_NAME, None
+        forms: dict[str, str] = {}
+        for name in self._api.list_resources():
+            page = self._api.get_resource(name).RESOURCE_PAGE.lower()
+            singular = page.removesuffix("s")
+            forms[singular] = forms[f"{singular}s"] = name
+        event = str(payload.get("event", "")).lower()
+        for word in re.findall(r"[a-z]+", event):
+            if word in forms:
+                name = forms[word]
+                for form, named in forms.items():
+                    if named == name and isinstance(payload.get(form), dict):
+                        return name, payload[form]
+                return name, None
+        for form, name in forms.items():
+            if isinstance(payload.get(form), dict):
+                return name, payload[form]
+        return None
+
+    def parse(self, body: bytes) -> list[WebhookEvent]:
+        """parse
+
+        Read the events of a webhook body.
+
+        Raises:
+            ValueError: The body is not JSON, or an event names no known
+            resource or record id.
+        """
+        payload = json.loads(body)
+        payloads = payload if isinstance(payload, list) else [payload]
+        events = []
+        for payload in payloads:
+            if not isinstance(payload, dict):
+                raise ValueError("Webhook event is not an object")
+            found = self._resource_of(payload)
+            if found is None:
+                raise ValueError("Webhook event names no known resource")
+            resource, record = found
+            record = payload.get("record", record)
+            if record is not None and not isinstance(record, dict):
+                raise ValueError("Webhook event record is not an object")
+            if record:
+                pk = record.get("id")
+            else:
+                pk = payload.get("object_id", payload.get("id"))
+            if pk is None:
+                raise ValueError("Webhook event has no record id")
+            try:
+                pk = int(pk)
+            except (TypeError, ValueError) as err:
+                raise ValueError(
+                    f"Webhook event record id ({pk}) is not a number"
+                ) from err
+            action = str(payload.get("action") or payload.get("event", ""))
+            deleted = "delete" in action.lower()
+            events.append(
+                WebhookEvent(
+                    resource, pk, deleted, None if deleted else record
+                )
+            )
+        return events
+
+    def submit(self, events: list[WebhookEvent]) -> None:
+        """submit
+
+        Queue events to be applied.
+
+        Raises:
+            queue.Full: Too many events are waiting.
+        """
+        for event in events:
+            self._queue.put_nowait(event)
+        with self._lock:
+            self._stats["received"] += len(events)
+
+    def handle(self, body: bytes, headers: dict[str, str]) -> tuple[int, str]:
+        """handle
+
+        Validate and queue a webhook request.
+
+        Returns:
+            tuple[int, str]: The HTTP status and message to answer with.
+        """
+        if not self.verify(body, headers):
+            with self._lock:
+                self._stats["rejected"] += 1
+            return 401, "invalid signature"
+        try:
+            events = self.parse(body)
+        except ValueError as err:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return 400, str(err)
+        try:
+            self.submit(events)
+        except Full:
+            # HaloPSA retries failed deliveries
+            return 503, "queue full"
+        return 202, f"accepted {len(events)} events"
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        """__call__
+
+        ASGI entry point accepting webhook POST requests.
+        """
+        if scope["type"] != "http":
+            return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        if scope["method"] != "POST":
+            status, text = 405, "method not allowed"
+        else:
+            headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+            status, text = self.handle(body, headers)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": text.encode()})
+
+    # Applying
+
+    def _fetch(self, event: WebhookEvent) -> WebhookEvent:
+        """_fetch
+
+        Fetch the record of an id-only event. A missing record is treated
+        as deleted.
+        """
+        r = self._api.get_resource(event.resource)
+        response = r.request(
+            auth=self._api.get_credentials(), pk=event.pk, priority=DEFAULT
+        )
+        with self._lock:
+            self._stats["fetched"] += 1
+        if response.status_code == 404:
+            return event._replace(deleted=True)
+        response.raise_for_status()
+        return event._replace(record=response.json())
+
+    def apply(self, events: list[WebhookEvent]) -> list[WebhookEvent]:
+        """apply
+
+        Apply a batch of events to the indexes and prefetch cache. Only the
+        last event of each record is applied.
+
+        Returns:
+            list[WebhookEvent]: The applied events, with fetched records.
+        """
+        latest: dict[tuple[str, int], WebhookEvent] = {}
+        for event in events:
+            latest[(event.resource, event.pk)] = event
+        applied = []
+        for event in latest.values():
+            if not event.deleted and event.record is None:
+                try:
+                    event = self._fetch(event)
+                except TransportError:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                        self._pending_reconcile.add(event.resource)
+                    continue
+            index = self._api.get_index(event.resource)
+            prefetcher = self._api.prefetcher
+            if event.deleted:
+                if index is not None:
+                    index.remove(event.pk)
+                prefetcher.remove(event.resource, event.pk)
+            else:
+                if index is not None:
+                    index.upsert(event.record)
+                prefetcher.upsert(event.resource, event.record)
+            applied.append(event)
+        with self._lock:
+            self._stats["applied"] += len(applied)
+            self._stats["batches"] += 1
+        if self.on_batch is not None and applied:
+            self.on_batch(applied)
+        return applied
+
+    def _drain(self, wait: float) -> list[WebhookEvent]:
+        """_drain
+
+        Collect queued events: wait up to ``wait`` seconds for the first,
+        then up to ``batch_seconds`` for the rest of the burst.
+        """
+        try:
+            events = [self._queue.get(timeout=wait)]
+        except Empty:
+            return []
+        deadline = monotonic() + self.batch_seconds
+        while len(events) < self.MAX_BATCH:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                events.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return events
+
+    def flush(self) -> list[WebhookEvent]:
+        """flush
+
+        Apply every queued event now.
+        """
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return self.apply(events) if events else []
+
+    def reconcile(self, resources: list[str] = None) -> None:
+        """reconcile
+
+        Reload the indexes of ``resources`` (default: all indexed
+        resources) in full and drop their prefetch caches.
+        """
+        names = resources or self._api.list_indexes()
+        for name in names:
+            index = self._api.get_index(name)
+            if index is not None:
+                index.refresh(force=True)
+            self._api.prefetcher.clear(name)
+        with self._lock:
+            self._stats["reconciles"] += 1
+            self._pending_reconcile.difference_update(names)
+        if resources is None:
+            self._reconciled_at = monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            events = self._drain(self.batch_seconds)
+            try:
+                if events:
+                    self.apply(events)
+                if self._pending_reconcile:
+                    self.reconcile(sorted(self._pending_reconcile))
+                due = monotonic() - self._reconciled_at
+                if self.reconcile_seconds and due > self.reconcile_seconds:
+                    self.reconcile()
+            except Exception:
+                with self._lock:
+                    self._stats["errors"] += 1
+            # the indexes are kept current by events, not by their max_age
+            for name in self._api.list_indexes():
+                self._api.get_index(name).touch()
+
+    def start(self) -> "WebhookReceiver":
+        """start
+
+        Apply queued events from a background thread.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """stop
+
+        Stop the background thread after applying queued events.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> dict[str, int]:
+        """stats
+
+        Event counters and the number of queued events.
+        """
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self, status: int, text: str) -> None:
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        self._respond(
+            *self.server.receiver.handle(body, dict(self.headers.items()))
+        )
+
+    def do_GET(self) -> None:
+        self._respond(405, "method not allowed")
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class WebhookServer:
+    """
+    WebhookServer
+    =============
+
+    Serves a :class:`WebhookReceiver` with the standard library HTTP
+    server and runs its background thread. Use it as a context manager.
+    Put it behind a TLS terminating proxy when it is reachable from the
+    internet.
+    """
+
+    def __init__(
+        self,
+        receiver: WebhookReceiver,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.receiver: WebhookReceiver = receiver
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.receiver = receiver
+        self._thread: Thread = None
+
+    @property
+    def url(self) -> str:
+        """Url to configure in HaloPSA."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "WebhookServer":
+        self.receiver.start()
+        self._thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.receiver.stop()
+
+    def __enter__(self) -> "WebhookServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
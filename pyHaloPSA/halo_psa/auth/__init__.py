@@ -1,12 +1,16 @@
 from datetime import datetime, timedelta
 
-# 3rd party
-import requests
-
-
 # Py-HaloPSA
 from halo_psa.config import settings
 from halo_psa.core import BaseData
+from halo_psa.core.deadline import Deadline, request_timeout
+from halo_psa.core.metrics import Metrics
+from halo_psa.core.request_spec import Items, freeze
+from halo_psa.core.transport import (
+    BaseTransport,
+    TransportTimeout,
+    default_transport,
+)
 
 _AUTH_URL = settings.AUTH_URL
 _CLIENT_ID = settings.CLIENT_ID
@@ -62,6 +66,8 @@ class HaloAuth:
         auth_params: BaseData = _AUTH_PARAMS,
         expire_on: datetime = _EXPIRE_ON,
         logged_in: bool = _LOGGED_IN,
+        transport: BaseTransport = None,
+        metrics: Metrics = None,
         **extra,
     ):
         """__init__
@@ -81,31 +87,50 @@ class HaloAuth:
             Defaults to _EXPIRE_ON.
             logged_in (bool, optional): Signifies that HaloAuth has an active
             auth token. Defaults to _LOGGED_IN.
+            transport (BaseTransport, optional): HTTP backend for the
+            authentication request. Defaults to the shared transport.
+            metrics (Metrics, optional): Counters for authentication
+            requests, recorded as "auth". Defaults to new counters.
         """
 
         # set initial attributes
         self._auth_url = auth_url
         self._auth_headers = auth_headers
         self._query_headers = headers
+        self._compiled_headers: Items = None
         self._auth_params = auth_params
         self._expire_on = expire_on
         self._logged_in = logged_in
+        self.transport: BaseTransport = transport or default_transport()
+        self.metrics: Metrics = metrics or Metrics()
 
         if extra:
             for k, v in extra.items():
                 setattr(self, k, v)
 
-    def _authenticate(self) -> None | str:
+    def _authenticate(self, deadline: Deadline = None) -> None | str:
         """authenticate
 
         authentication request to HaloPSA
+
+        Raises:
+            DeadlineExceeded: ``deadline`` passed before a token was issued
         """
         params: dict[str, str] = self.auth_params
         headers: dict[str, str] = self.auth_headers
 
-        response = requests.post(
-            url=self.auth_url, headers=headers, data=params
-        )  #: collect the response data from authentication
+        try:
+            response = self.transport.post(
+                url=self.auth_url,
+                headers=headers,
+                data=params,
+                timeout=request_timeout(deadline, "authentication"),
+            )  #: collect the response data from authentication
+        except TransportTimeout as err:
+            if deadline is None or not deadline.expired:
+                raise
+            raise deadline.exceeded("authentication") from err
+        self.metrics.record("auth", response)
 
         if response.status_code == 200:  #: login successful
             data = response.json()
@@ -131,15 +156,15 @@ class HaloAuth:
         # check the expire date is later than now
         return datetime.now() > self.expire_on
 
-    def connect(self):
+    def connect(self, deadline: Deadline = None):
         """connect
 
         Checks to determine if the API is authenticated.
         If not, it calls :func:`self._authenticate()` to retrieve an active
-        connection to the API endpoint.
+        connection to the API endpoint, within ``deadline`` if given.
         """
         if (self.logged_in is False) or self._is_expired():
-            self._authenticate()
+            self._authenticate(deadline)
 
     @property
     def auth_url(self) -> str:
@@ -178,9 +203,12 @@ class HaloAuth:
     def query_headers(self) -> dict[str, str]:
         """query_headers
 
-        Request headers for an API call
+        Request headers for an API call. They are compiled once per token;
+        each call returns a new dict.
         """
-        return self._query_headers()
+        if self._compiled_headers is None:
+            self._compiled_headers = freeze(self._query_headers())
+        return dict(self._compiled_headers)
 
     @query_headers.setter
     def query_headers(self, headers: dict[str, str]) -> None:
@@ -190,6 +218,7 @@ class HaloAuth:
         """
         for k, v in headers.items():
             self._query_headers.add(k, v)
+        self._compiled_headers = None
 
     @property
     def auth_params(self) -> dict[str, str]:
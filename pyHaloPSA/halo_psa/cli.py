@@ -0,0 +1,361 @@
+"""
+CLI
+===
+
+The ``halo-psa`` console script: stream HaloPSA resources to NDJSON or CSV.
+
+Records are written page by page as they arrive, so dumps of any size run
+in constant memory and can be piped into other tools. Progress and a
+throughput summary go to stderr.
+
+Usage::
+
+    halo-psa resources
+    halo-psa dump assets --concurrency 8 > assets.ndjson
+    halo-psa dump clients --format csv --fields id,name -o clients.csv
+    halo-psa dump assets --filter includeinactive=false | jq .id
+    halo-psa plan tickets --filter includeinactive=false
+    halo-psa sync assets --processes 8 -o assets.ndjson
+    halo-psa work /shared/halo_sync.db
+
+Connection settings are read from the environment or a ``.env`` file, as
+for the library.
+"""
+
+# python
+import argparse
+import os
+import shutil
+import sys
+import time
+from typing import IO
+
+# Py-HaloPSA
+from halo_psa.api import HaloAPI
+from halo_psa.api.planner import STRATEGIES
+from halo_psa.api.sync import ShardedSync, SyncError, work
+from halo_psa.core.pipeline import FORMATS, FileSink, Pipeline
+
+PROGRESS_SECONDS: float = 1.0
+"""Seconds between progress updates"""
+
+
+def _filters(values: list[str], allowed: dict[str, any]) -> dict[str, str]:
+    """_filters
+
+    Parse ``name=value`` filters, checked against the resource's
+    LIST_PARAMS.
+
+    Raises:
+        ValueError: Malformed filter, or filter not in LIST_PARAMS
+    """
+    filters = {}
+    for value in values or ():
+        name, sep, raw = value.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Filter ({value}) is not name=value")
+        if name not in allowed:
+            raise ValueError(
+                f"Filter ({name}) not found",
+                f"options include: {sorted(allowed)}",
+            )
+        filters[name] = raw
+    return filters
+
+
+class _Progress:
+    """_Progress
+
+    Progress line and summary on stderr.
+    """
+
+    def __init__(self, quiet: bool) -> None:
+        self.quiet: bool = quiet
+        self.live: bool = not quiet and sys.stderr.isatty()
+        self.start: float = time.perf_counter()
+        self._shown: float = 0.0
+
+    def update(self, records: int, total: int | None) -> None:
+        now = time.perf_counter()
+        if not self.live or now - self._shown < PROGRESS_SECONDS:
+            return
+        self._shown = now
+        of = f"/{total}" if total else ""
+        rate = records / max(now - self.start, 1e-9)
+        sys.stderr.write(f"\r{records}{of} records, {rate:,.0f}/s ")
+        sys.stderr.flush()
+
+    def summary(
+        self, resource: str, pages: int, records: int, metrics: dict
+    ) -> None:
+        if self.quiet:
+            return
+        seconds = time.perf_counter() - self.start
+        wire = metrics.get("wire_bytes", 0)
+        sys.stderr.write(
+            ("\n" if self.live else "")
+            + f"{resource}: {records} records in {pages} pages, "
+            f"{seconds:.1f}s, {records / max(seconds, 1e-9):,.0f} records/s, "
+            f"{wire / 2**20:.1f} MiB received\n"
+        )
+
+
+def _dump(
+    api: HaloAPI,
+    args: argparse.Namespace,
+    out: IO[str],
+    resource: object,
+    filters: dict[str, str],
+) -> int:
+    pages = api.paginate(
+        resource.RESOURCE_NAME,
+        params=filters,
+        page_size=args.page_size,
+        auto_tune=args.auto_tune,
+        concurrency=args.concurrency,
+    )
+    fields = args.fields.split(",") if args.fields else None
+    writer = FileSink(out, args.format, fields)
+    progress = _Progress(args.quiet)
+
+    def write(records: list[dict]) -> None:
+        writer.write(records)
+        progress.update(pipeline.records + len(records), pages.record_count)
+
+    # fetching, decoding and writing overlap
+    pipeline = Pipeline(pages, write)
+    pipeline.run()
+    writer.close()
+    progress.summary(
+        resource.RESOURCE_NAME,
+        pages.pages,
+        pipeline.records,
+        api.metrics.get(resource.RESOURCE_NAME),
+    )
+    return 0
+
+
+def _sync(api: HaloAPI, args: argparse.Namespace) -> int:
+    try:
+        resource = api.get_resource(args.resource.lower())
+        filters = _filters(args.filter, resource.LIST_PARAMS)
+    except ValueError as err:
+        sys.stderr.write(f"halo-psa: {' '.join(err.args)}\n")
+        return 2
+    start = time.perf_counter()
+    sync = api.sync(
+        args.resource,
+        queue=args.queue,
+        processes=args.processes,
+        shard_pages=args.shard_pages,
+        page_size=args.page_size,
+        params=filters,
+    )
+    try:
+        sync.run()
+    except SyncError as err:
+        for shard in err.failed:
+            sys.stderr.write(
+                f"halo-psa: shard {shard['no']} (pages "
+                f"{shard['first_page']}-{shard['last_page']}): "
+                f"{shard['error']}\n"
+            )
+        return 1
+    if args.output == "-":
+        for path in sync.paths():
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, sys.stdout.buffer)
+        sys.stdout.flush()
+    else:
+        sync.merge(args.output)
+    status = sync.status()
+    if not args.keep:
+        sync.cleanup()
+    if not args.quiet:
+        seconds = time.perf_counter() - start
+        sys.stderr.write(
+            f"{resource.RESOURCE_NAME}: {status['records']} records in "
+            f"{status['done']} shards, {seconds:.1f}s, "
+            f"{status['records'] / max(seconds, 1e-9):,.0f} records/s\n"
+        )
+    return 0
+
+
+def _plan(api: HaloAPI, args: argparse.Namespace, out: IO[str]) -> int:
+    try:
+        resource = api.get_resource(args.resource.lower())
+        filters = _filters(args.filter, resource.LIST_PARAMS)
+        plan = api.plan(
+            args.resource,
+            params=filters,
+            fields=args.fields.split(",") if args.fields else None,
+            strategy=args.strategy,
+            page_size=args.page_size,
+            concurrency=args.concurrency,
+        )
+    except ValueError as err:
+        sys.stderr.write(f"halo-psa: {' '.join(err.args)}\n")
+        return 2
+    out.write(plan.summary() + "\n")
+    return 0
+
+
+def _resources(api: HaloAPI, out: IO[str]) -> int:
+    for name in api.list_resources():
+        params = sorted(api.get_resource(name).LIST_PARAMS)
+        out.write(f"{name}: {', '.join(params)}\n")
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="halo-psa", description=__doc__.split("\n\n")[1]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser(
+        "resources", help="list resources and their filter names"
+    )
+    dump = commands.add_parser("dump", help="stream a resource's records")
+    dump.add_argument("resource", help="e.g. clients, agents, assets")
+    dump.add_argument("-f", "--format", choices=FORMATS, default="ndjson")
+    dump.add_argument(
+        "-o", "--output", default="-", help="output file (default stdout)"
+    )
+    dump.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="pages in flight"
+    )
+    dump.add_argument("-p", "--page-size", type=int, help="records per page")
+    dump.add_argument(
+        "--auto-tune",
+        action="store_true",
+        help="adjust the page size from observed latency",
+    )
+    dump.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=VALUE",
+        help="a LIST_PARAMS filter, may be repeated",
+    )
+    dump.add_argument("--fields", help="comma separated fields to keep")
+    dump.add_argument(
+        "-q", "--quiet", action="store_true", help="no progress or summary"
+    )
+    plan = commands.add_parser(
+        "plan", help="estimate the requests and time a dump would take"
+    )
+    plan.add_argument("resource", help="e.g. clients, agents, assets")
+    plan.add_argument(
+        "--strategy", choices=STRATEGIES, help="default: the cheapest"
+    )
+    plan.add_argument(
+        "-c", "--concurrency", type=int, help="most pages in flight"
+    )
+    plan.add_argument("-p", "--page-size", type=int, help="records per page")
+    plan.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=VALUE",
+        help="a LIST_PARAMS filter, may be repeated",
+    )
+    plan.add_argument("--fields", help="comma separated fields needed")
+    sync = commands.add_parser(
+        "sync", help="fetch a resource with several worker processes"
+    )
+    sync.add_argument("resource", help="e.g. clients, agents, assets")
+    sync.add_argument(
+        "-o", "--output", default="-", help="NDJSON file (default stdout)"
+    )
+    sync.add_argument(
+        "--queue", default=ShardedSync.QUEUE, help="work queue file"
+    )
+    sync.add_argument(
+        "--processes",
+        type=int,
+        default=ShardedSync.PROCESSES,
+        help="local worker processes, 0 for one per CPU",
+    )
+    sync.add_argument(
+        "--shard-pages",
+        type=int,
+        default=ShardedSync.SHARD_PAGES,
+        help="pages per shard",
+    )
+    sync.add_argument("-p", "--page-size", type=int, help="records per page")
+    sync.add_argument(
+        "--filter",
+        action="append",
+        metavar="NAME=VALUE",
+        help="a LIST_PARAMS filter, may be repeated",
+    )
+    sync.add_argument(
+        "--keep", action="store_true", help="keep the shard files"
+    )
+    sync.add_argument("-q", "--quiet", action="store_true", help="no summary")
+    worker = commands.add_parser(
+        "work", help="work on the shards of running syncs"
+    )
+    worker.add_argument(
+        "queue", nargs="?", default=ShardedSync.QUEUE, help="work queue file"
+    )
+    worker.add_argument(
+        "--no-wait",
+        dest="wait",
+        action="store_false",
+        help="exit as soon as no shard is pending",
+    )
+    return parser
+
+
+def _open(path: str) -> IO[str]:
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def main(argv: list[str] = None) -> int:
+    """main
+
+    Entry point of the ``halo-psa`` console script.
+
+    Returns:
+        int: The exit status.
+    """
+    args = _parser().parse_args(argv)
+    api = HaloAPI()
+    if args.command == "resources":
+        return _resources(api, sys.stdout)
+    if args.command == "plan":
+        return _plan(api, args, sys.stdout)
+    if args.command == "work":
+        work(args.queue, api=api, wait=args.wait)
+        return 0
+    if args.command == "sync":
+        try:
+            return _sync(api, args)
+        except KeyboardInterrupt:
+            return 130
+    # checked before the output is opened, which truncates it
+    try:
+        resource = api.get_resource(args.resource.lower())
+        filters = _filters(args.filter, resource.LIST_PARAMS)
+    except ValueError as err:
+        sys.stderr.write(f"halo-psa: {' '.join(err.args)}\n")
+        return 2
+    out = _open(args.output)
+    try:
+        return _dump(api, args, out, resource, filters)
+    except BrokenPipeError:
+        # the reader went away, e.g. piped into head; keep the interpreter
+        # from failing again when it flushes stdout on exit
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 0
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,75 @@ Configuration Settings:
     Defaults to "application/x-www-form-urlencoded".
     GRANT_TYPE (str): The API Authentication type.
     Defaults to "client_credentials".
+    TRANSPORT (str): The HTTP backend, "http1", "http2", "record" or
+    "replay". Defaults to "http1".
+    POOL_SIZE (int): Maximum pooled connections per host.
+    Defaults to 10.
+    COMPRESSION (bool): Ask for gzip/deflate/brotli/zstd responses.
+    Defaults to True.
+    PAGE_TARGET_SECONDS (float): Per-page latency targeted by page size
+    auto-tuning. Defaults to 2.0.
+    PAGE_MAX_BYTES (int): Largest page body auto-tuning will aim for.
+    Defaults to 33554432 (32 MiB).
+    PAGE_TUNING_FILE (str): Where learned page sizes are kept between runs.
+    Defaults to "~/.cache/halo_psa/page_sizes.json".
+    PLAN_HISTORY_FILE (str): Where request planner costs and past runs are
+    kept. Defaults to "~/.cache/halo_psa/plans.json".
+    RATE_LIMIT_REQUESTS (int): Requests the API allows per rate limit
+    window, used by plan estimates. Defaults to 700.
+    RATE_LIMIT_SECONDS (float): Seconds of a rate limit window.
+    Defaults to 300.
+    REQUEST_TIMEOUT (float): Longest wait in seconds for one request,
+    also within a longer deadline; 0 for no limit. Defaults to 60.
+    MAX_CONCURRENCY (int): Resource requests in flight per client.
+    Defaults to 16.
+    INTERACTIVE_RESERVED (int): Request slots bulk transfers may not use.
+    Defaults to 4.
+    RESOURCE_CONCURRENCY (int): Requests in flight per resource, 0 for no
+    limit. Defaults to 0.
+    TRANSFORM_PROCESSES (int): Worker processes for record transforms, 0
+    for one per CPU. Defaults to 0.
+    PIPELINE_QUEUE_SIZE (int): Pages buffered between two pipeline
+    stages. Defaults to 4.
+    MEMORY_BUDGET_MB (float): MiB that page requests in flight may hold,
+    bodies and parsed records; 0 for no limit. Defaults to 0.
+    HEDGE (bool): Send a duplicate of a slow single record request and use
+    the first response. Defaults to False.
+    HEDGE_PERCENTILE (float): Percentile of recent response times after
+    which a request is hedged. Defaults to 95.
+    HEDGE_MAX_EXTRA (float): Most hedged requests, as a share of all
+    requests. Defaults to 0.05.
+    SNAPSHOT_DIR (str): Where resource snapshots are written.
+    Defaults to "~/.cache/halo_psa/snapshots".
+    SNAPSHOT_MAX_AGE (float): Seconds before a snapshot is refreshed.
+    Defaults to 3600.
+    HISTORY_PATH (str): The history store of resource record versions.
+    Defaults to "~/.cache/halo_psa/history.db".
+    WEBHOOK_SECRET (str): Shared secret webhook requests are validated
+    with; empty accepts unsigned requests. Defaults to "".
+    WEBHOOK_BATCH_SECONDS (float): Seconds a burst of webhook events is
+    collected before it is applied. Defaults to 0.5.
+    WEBHOOK_RECONCILE_SECONDS (float): Seconds between full reloads of
+    webhook fed indexes, 0 to disable. Defaults to 3600.
+    SYNC_DIR (str): Where sharded sync queues and shard files are kept.
+    Defaults to "~/.cache/halo_psa/sync".
+    SYNC_PROCESSES (int): Local worker processes of a sharded sync, 0 for
+    one per CPU. Defaults to 0.
+    SYNC_SHARD_PAGES (int): Pages per sync shard. Defaults to 10.
+    SYNC_LEASE_SECONDS (float): Seconds a worker holds a shard without
+    progress before it is given to another worker. Defaults to 120.
+    PROFILE (bool): Profile API calls and write a report at exit.
+    Defaults to False.
+    PROFILE_INTERVAL (float): Seconds between profiler stack samples.
+    Defaults to 0.005.
+    PROFILE_MEMORY (bool): Track allocations while profiling.
+    Defaults to True.
+    PROFILE_OUTPUT (str): Profile report path, without the extension.
+    Defaults to "halo_profile".
+    CASSETTE (str): Traffic file used by the record and replay transports.
+    Defaults to "halo_cassette.jsonl".
+    REPLAY_LATENCY_SCALE (float): Multiplier for recorded response times
+    when replaying; 0 replays without delays. Defaults to 1.0.
 
 Computed Settings Values:
 -------------------------
@@ -62,6 +131,121 @@ CONTENT_TYPE: str = config(
     default="application/x-www-form-urlencoded",
     cast=str,
 )
+TRANSPORT: str = config("TRANSPORT", default="http1")
+POOL_SIZE: int = config("POOL_SIZE", default=10, cast=int)
+COMPRESSION: bool = config("COMPRESSION", default=True, cast=bool)
+PAGE_TARGET_SECONDS: float = config(
+    "PAGE_TARGET_SECONDS",
+    default=2.0,
+    cast=float,
+)
+PAGE_MAX_BYTES: int = config("PAGE_MAX_BYTES", default=32 * 2**20, cast=int)
+PAGE_TUNING_FILE: str = config(
+    "PAGE_TUNING_FILE",
+    default="~/.cache/halo_psa/page_sizes.json",
+)
+PLAN_HISTORY_FILE: str = config(
+    "PLAN_HISTORY_FILE",
+    default="~/.cache/halo_psa/plans.json",
+)
+RATE_LIMIT_REQUESTS: int = config(
+    "RATE_LIMIT_REQUESTS",
+    default=700,
+    cast=int,
+)
+RATE_LIMIT_SECONDS: float = config(
+    "RATE_LIMIT_SECONDS",
+    default=300.0,
+    cast=float,
+)
+REQUEST_TIMEOUT: float = config(
+    "REQUEST_TIMEOUT",
+    default=60.0,
+    cast=float,
+)
+MAX_CONCURRENCY: int = config("MAX_CONCURRENCY", default=16, cast=int)
+INTERACTIVE_RESERVED: int = config(
+    "INTERACTIVE_RESERVED",
+    default=4,
+    cast=int,
+)
+RESOURCE_CONCURRENCY: int = config(
+    "RESOURCE_CONCURRENCY",
+    default=0,
+    cast=int,
+)
+TRANSFORM_PROCESSES: int = config(
+    "TRANSFORM_PROCESSES",
+    default=0,
+    cast=int,
+)
+PIPELINE_QUEUE_SIZE: int = config(
+    "PIPELINE_QUEUE_SIZE",
+    default=4,
+    cast=int,
+)
+MEMORY_BUDGET_MB: float = config(
+    "MEMORY_BUDGET_MB",
+    default=0.0,
+    cast=float,
+)
+HEDGE: bool = config("HEDGE", default=False, cast=bool)
+HEDGE_PERCENTILE: float = config(
+    "HEDGE_PERCENTILE",
+    default=95.0,
+    cast=float,
+)
+HEDGE_MAX_EXTRA: float = config(
+    "HEDGE_MAX_EXTRA",
+    default=0.05,
+    cast=float,
+)
+SNAPSHOT_DIR: str = config(
+    "SNAPSHOT_DIR",
+    default="~/.cache/halo_psa/snapshots",
+)
+SNAPSHOT_MAX_AGE: float = config(
+    "SNAPSHOT_MAX_AGE",
+    default=3600.0,
+    cast=float,
+)
+HISTORY_PATH: str = config(
+    "HISTORY_PATH",
+    default="~/.cache/halo_psa/history.db",
+)
+WEBHOOK_SECRET: str = config("WEBHOOK_SECRET", default="")
+WEBHOOK_BATCH_SECONDS: float = config(
+    "WEBHOOK_BATCH_SECONDS",
+    default=0.5,
+    cast=float,
+)
+WEBHOOK_RECONCILE_SECONDS: float = config(
+    "WEBHOOK_RECONCILE_SECONDS",
+    default=3600.0,
+    cast=float,
+)
+SYNC_DIR: str = config("SYNC_DIR", default="~/.cache/halo_psa/sync")
+SYNC_PROCESSES: int = config("SYNC_PROCESSES", default=0, cast=int)
+SYNC_SHARD_PAGES: int = config("SYNC_SHARD_PAGES", default=10, cast=int)
+SYNC_LEASE_SECONDS: float = config(
+    "SYNC_LEASE_SECONDS",
+    default=120.0,
+    cast=float,
+)
+PROFILE: bool = config("PROFILE", default=False, cast=bool)
+PROFILE_INTERVAL: float = config(
+    "PROFILE_INTERVAL",
+    default=0.005,
+    cast=float,
+)
+PROFILE_MEMORY: bool = config("PROFILE_MEMORY", default=True, cast=bool)
+PROFILE_OUTPUT: str = config("PROFILE_OUTPUT", default="halo_profile")
+CASSETTE: str = config("CASSETTE", default="halo_cassette.jsonl")
+REPLAY_LATENCY_SCALE: float = config(
+    "REPLAY_LATENCY_SCALE",
+    default=1.0,
+    cast=float,
+)
 
 # Compile pyHaloPSA settings
 AUTH_URL: str = f"{BASE_URL}/{AUTH_PAGE}"
@@ -5,8 +5,46 @@ Utils
 Utility methods and objects used in the HaloPSA API module.
 """
 
+from .analytics import ColumnTable
 from .base_data import BaseData
 from .base_resource import BaseResource
+from .cassette import RecordingTransport, ReplayTransport
+from .deadline import Deadline, DeadlineExceeded
+from .hedging import HedgePolicy
+from .history import HistoryStore
+from .index import ResourceIndex
+from .memory import MemoryGovernor
+from .pagination import Paginator
+from .pipeline import (
+    CallbackSink,
+    FileSink,
+    Pipeline,
+    Sink,
+    SQLiteSink,
+)
+from .profiling import Profiler
+from .request_spec import RequestSpec
+from .snapshot import Snapshot, write_snapshot
+from .transform import TransformPool
+from .tuning import PageSizeTuner
+from .window_scan import WindowScan
 
 BaseData.description = BaseData.__doc__
 BaseResource.description = BaseResource.__doc__
+ResourceIndex.description = ResourceIndex.__doc__
+Paginator.description = Paginator.__doc__
+PageSizeTuner.description = PageSizeTuner.__doc__
+TransformPool.description = TransformPool.__doc__
+Snapshot.description = Snapshot.__doc__
+RequestSpec.description = RequestSpec.__doc__
+Profiler.description = Profiler.__doc__
+Deadline.description = Deadline.__doc__
+WindowScan.description = WindowScan.__doc__
+ColumnTable.description = ColumnTable.__doc__
+Pipeline.description = Pipeline.__doc__
+FileSink.description = FileSink.__doc__
+SQLiteSink.description = SQLiteSink.__doc__
+CallbackSink.description = CallbackSink.__doc__
+MemoryGovernor.description = MemoryGovernor.__doc__
+HedgePolicy.description = HedgePolicy.__doc__
+HistoryStore.description = HistoryStore.__doc__
@@ -0,0 +1,427 @@
+"""
+Analytics
+=========
+
+Columnar tables of resource records for fast local rollups.
+
+Records are loaded once into one NumPy array per field. Numbers and
+booleans are stored as they are, with a mask of missing values; strings are
+dictionary encoded, as an array of integer codes into the field's distinct
+values. Filters and group-by counts then run as array operations over the
+codes instead of Python loops over dicts, so counting 100k assets per
+client, site and type takes milliseconds.
+
+Requires NumPy. Install it with ``pip install "pyHaloPSA[analytics]"``.
+
+"""
+
+# python
+from typing import Iterable
+
+# 3rd party
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+TYPES: tuple[str, ...] = ("int", "float", "bool", "str")
+"""Field types a table can hold, as in SNAPSHOT_FIELDS"""
+
+AGGREGATES: tuple[str, ...] = ("sum", "mean", "min", "max")
+"""Aggregations of :func:`ColumnTable.aggregate`"""
+
+
+def _dense_unique(codes: "np.ndarray") -> tuple["np.ndarray", "np.ndarray"]:
+    """_dense_unique
+
+    ``np.unique(codes, return_inverse=True)`` for integers. When the values
+    span a range not much larger than the array, they are counted with
+    ``bincount`` instead of sorted.
+    """
+    if not len(codes):
+        return codes, codes
+    low, high = int(codes.min()), int(codes.max())
+    if high - low > 4 * len(codes) + 1024:
+        return np.unique(codes, return_inverse=True)
+    offsets = codes - low
+    present = np.flatnonzero(np.bincount(offsets))
+    positions = np.zeros(high - low + 1, dtype=np.int64)
+    positions[present] = np.arange(len(present))
+    return present + low, positions[offsets]
+
+
+class ColumnTable:
+    """
+    ColumnTable
+    ===========
+
+    Resource records held column by column in NumPy arrays.
+
+    Columns are typed by a fields mapping like a resource's
+    ``SNAPSHOT_FIELDS``; other record fields are dropped. ``table[name]``
+    returns a column as an array, strings decoded, for building filter
+    masks. Group keys and filters on string columns work on the codes and
+    only decode the distinct values in the result.
+
+    Example:
+    --------
+
+        >>> assets = halo.table("assets")
+        >>> assets.count_by("client_name", top=3)
+        {'Client 12': 240, 'Client 7': 238, 'Client 101': 236}
+        >>> active = assets.filter(inactive=False)
+        >>> active.count_by("supplier_id", "client_id")[(4, 12)]
+        3
+        >>> assets.filter(assets["site_id"] > 40).count_by("assettype_name")
+        {'Type 1': 1673, 'Type 2': 1672, ...}
+
+    """
+
+    def __init__(
+        self,
+        fields: dict[str, str],
+        data: dict[str, "np.ndarray"],
+        valid: dict[str, "np.ndarray"],
+        categories: dict[str, "np.ndarray"],
+    ) -> None:
+        """__init__
+
+        Tables are built with :func:`from_records` or :func:`from_pages`.
+
+        Args:
+            fields (dict[str, str]): Field names mapped to their type.
+            data (dict[str, np.ndarray]): Values of each field; codes into
+            ``categories`` for strings, -1 when missing.
+            valid (dict[str, np.ndarray]): Masks of present values, for
+            numbers and booleans.
+            categories (dict[str, np.ndarray]): Distinct values of each
+            string field.
+        """
+        self.fields: dict[str, str] = fields
+        self._data: dict[str, np.ndarray] = data
+        self._valid: dict[str, np.ndarray] = valid
+        self._categories: dict[str, np.ndarray] = categories
+
+    @classmethod
+    def from_pages(
+        cls, pages: Iterable[list[dict[str, any]]], fields: dict[str, str]
+    ) -> "ColumnTable":
+        """from_pages
+
+        Load pages of records, e.g. a :class:`Paginator`, without keeping
+        the pages.
+
+        Args:
+            pages (Iterable[list[dict[str, any]]]): The record pages.
+            fields (dict[str, str]): Field names mapped to their type, one
+            of "int", "float", "bool" or "str".
+
+        Raises:
+            ImportError: NumPy is not installed
+            ValueError: Field type not in the types list
+
+        Returns:
+            ColumnTable: The loaded table.
+        """
+        if np is None:
+            raise ImportError(
+                "Analytics require numpy.",
+                'Install it with: pip install "pyHaloPSA[analytics]"',
+            )
+        for name, kind in fields.items():
+            if kind not in TYPES:
+                raise ValueError(
+                    f"Field type ({kind}) of {name} not found",
+                    f"options include: {list(TYPES)}",
+                )
+        values: dict[str, list] = {name: [] for name in fields}
+        lookups: dict[str, dict[str, int]] = {
+            name: {} for name, kind in fields.items() if kind == "str"
+        }
+        for page in pages:
+            for name, column in values.items():
+                lookup = lookups.get(name)
+                if lookup is None:
+                    column.extend(record.get(name) for record in page)
+                    continue
+                for record in page:
+                    value = record.get(name)
+                    if value is None:
+                        column.append(-1)
+                        continue
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(lookup)
+                    column.append(code)
+        data, valid, categories = {}, {}, {}
+        for name, kind in fields.items():
+            column = values.pop(name)
+            if kind == "str":
+                data[name] = np.array(column, dtype=np.int32)
+                categories[name] = np.array(
+                    [str(value) for value in lookups[name]], dtype=object
+                )
+                continue
+            valid[name] = np.fromiter(
+                (value is not None for value in column),
+                dtype=bool,
+                count=len(column),
+            )
+            dtype = {"int": np.int64, "float": np.float64, "bool": bool}[kind]
+            data[name] = np.fromiter(
+                (0 if value is None else value for value in column),
+                dtype=dtype,
+                count=len(column),
+            )
+        return cls(dict(fields), data, valid, categories)
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[dict[str, any]], fields: dict[str, str]
+    ) -> "ColumnTable":
+        """from_records
+
+        Load records, e.g. the list returned by :func:`HaloAPI.get` or an
+        opened :class:`Snapshot`. See :func:`from_pages`.
+        """
+        if not isinstance(records, list):
+            records = list(records)
+        return cls.from_pages([records], fields)
+
+    def __len__(self) -> int:
+        return len(next(iter(self._data.values()), ()))
+
+    def _field(self, name: str) -> str:
+        kind = self.fields.get(name)
+        if kind is None:
+            raise ValueError(
+                f"Field ({name}) not found",
+                f"options include: {list(self.fields)}",
+            )
+        return kind
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        """__getitem__
+
+        A column as an array. Strings are decoded, with None for missing
+        values; missing numbers read as 0 (NaN for floats), see
+        :func:`valid`.
+        """
+        if self._field(name) != "str":
+            if self.fields[name] != "float":
+                return self._data[name]
+            return np.where(self._valid[name], self._data[name], np.nan)
+        categories = np.append(self._categories[name], None)
+        return categories[self._data[name]]
+
+    def valid(self, name: str) -> "np.ndarray":
+        """valid
+
+        The mask of records that have a value for ``name``.
+        """
+        if self._field(name) == "str":
+            return self._data[name] >= 0
+        return self._valid[name]
+
+    def _equals(self, name: str, value: any) -> "np.ndarray":
+        """_equals
+
+        The mask of records whose ``name`` is ``value``, or one of the
+        values of a list, tuple or set. None matches missing values.
+        """
+        many = isinstance(value, (list, tuple, set, frozenset))
+        wanted = list(value) if many else [value]
+        mask = np.zeros(len(self), dtype=bool)
+        if None in wanted:
+            mask |= ~self.valid(name)
+            wanted = [item for item in wanted if item is not None]
+        if not wanted:
+            return mask
+        if self.fields[name] == "str":
+            categories = self._categories[name]
+            codes = np.flatnonzero(np.isin(categories, wanted))
+            return mask | np.isin(self._data[name], codes)
+        return mask | (self._valid[name] & np.isin(self._data[name], wanted))
+
+    def filter(
+        self, mask: "np.ndarray" = None, **equals: any
+    ) -> "ColumnTable":
+        """filter
+
+        The records matching ``mask`` and every ``field=value`` condition.
+        A value can be a list, tuple or set of accepted values.
+
+        Example::
+
+            >>> assets.filter(client_id=[4, 12], inactive=False)
+            >>> assets.filter(assets["assettype_name"] == "Laptop")
+
+        Returns:
+            ColumnTable: A table of the matching records.
+        """
+        keep = (
+            np.ones(len(self), dtype=bool)
+            if mask is None
+            else np.asarray(mask, dtype=bool)
+        )
+        for name, value in equals.items():
+            self._field(name)
+            keep &= self._equals(name, value)
+        return ColumnTable(
+            self.fields,
+            {name: data[keep] for name, data in self._data.items()},
+            {name: valid[keep] for name, valid in self._valid.items()},
+            self._categories,
+        )
+
+    def _groups(self, name: str) -> tuple["np.ndarray", list]:
+        """_groups
+
+        Group codes of a field, 0 for missing values, and the value of
+        each code.
+        """
+        if self._field(name) == "str":
+            data = self._data[name]
+            present = np.flatnonzero(np.bincount(data[data >= 0]))
+            values = self._categories[name][present]
+            order = np.argsort(values, kind="stable")
+            # code -1 (missing) maps to group 0, other codes in value order
+            groups = np.zeros(len(self._categories[name]) + 1, np.int64)
+            groups[present[order] + 1] = np.arange(1, len(present) + 1)
+            return groups[data + 1], [None, *values[order].tolist()]
+        valid = self._valid[name]
+        data = self._data[name][valid]
+        if self.fields[name] == "float":
+            values, inverse = np.unique(data, return_inverse=True)
+        else:
+            values, inverse = _dense_unique(data.astype(np.int64))
+        codes = np.zeros(len(valid), dtype=np.int64)
+        codes[valid] = inverse.ravel() + 1
+        return codes, [None, *values.tolist()]
+
+    def _group_by(
+        self, keys: tuple[str, ...]
+    ) -> tuple["np.ndarray", "np.ndarray", list]:
+        """_group_by
+
+        The group of every record, the groups present and their keys.
+        """
+        if not keys:
+            raise ValueError("No group keys", "pass at least one field name")
+        codes, labels = zip(*(self._groups(name) for name in keys))
+        sizes = tuple(len(values) for values in labels)
+        combined = np.ravel_multi_index(codes, sizes)
+        groups, inverse = _dense_unique(combined)
+        positions = np.unravel_index(groups, sizes)
+        if len(keys) == 1:
+            names = [labels[0][i] for i in positions[0].tolist()]
+        else:
+            names = list(
+                zip(
+                    *(
+                        [values[i] for i in position.tolist()]
+                        for values, position in zip(labels, positions)
+                    )
+                )
+            )
+        return inverse.ravel(), groups, names
+
+    def count_by(self, *keys: str, top: int = None) -> dict[any, int]:
+        """count_by
+
+        Count records per value of one field, or per combination of values
+        of several fields. Missing values are grouped under None.
+
+        Args:
+            *keys (str): The fields to group by.
+            top (int, optional): Keep only the ``top`` largest groups,
+            largest first. Defaults to every group, in key order.
+
+        Returns:
+            dict[any, int]: Counts keyed by the field's value, or by a
+            tuple of values with several fields.
+        """
+        inverse, groups, names = self._group_by(keys)
+        counts = np.bincount(inverse, minlength=len(groups))
+        if top is None:
+            return dict(zip(names, counts.tolist()))
+        order = np.argsort(-counts, kind="stable")[:top]
+        return {names[i]: int(counts[i]) for i in order.tolist()}
+
+    def aggregate(
+        self, *keys: str, column: str, how: str = "sum"
+    ) -> dict[any, float]:
+        """aggregate
+
+        Aggregate a numeric column per group of ``keys``, skipping missing
+        values.
+
+        Example::
+
+            >>> tickets.aggregate("client_name", column="priority_id",
+            >>>                   how="mean")
+
+        Args:
+            *keys (str): The fields to group by.
+            column (str): The numeric field aggregated.
+            how (str, optional): One of "sum", "mean", "min" or "max".
+            Defaults to "sum".
+
+        Raises:
+            ValueError: Aggregation not in the aggregates list
+
+        Returns:
+            dict[any, float]: Results keyed like :func:`count_by`; groups
+            without values read NaN for mean, min and max.
+        """
+        if how not in AGGREGATES:
+            raise ValueError(
+                f"Aggregation ({how}) not found",
+                f"options include: {list(AGGREGATES)}",
+            )
+        if self._field(column) == "str":
+            raise ValueError(
+                f"Field ({column}) is not numeric",
+                "aggregate an int, float or bool field",
+            )
+        inverse, groups, names = self._group_by(keys)
+        valid = self._valid[column]
+        inverse = inverse[valid]
+        values = self._data[column][valid].astype(np.float64)
+        if how in ("sum", "mean"):
+            result = np.bincount(inverse, values, minlength=len(groups))
+            if how == "mean":
+                counts = np.bincount(inverse, minlength=len(groups))
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    result = result / counts
+        else:
+            start = np.inf if how == "min" else -np.inf
+            result = np.full(len(groups), start)
+            ufunc = np.minimum if how == "min" else np.maximum
+            ufunc.at(result, inverse, values)
+            result[np.isinf(result)] = np.nan
+        return dict(zip(names, result.tolist()))
+
+    def unique(self, name: str) -> list:
+        """unique
+
+        The distinct values of a field, sorted, without missing values.
+        """
+        return self._groups(name)[1][1:]
+
+    def to_records(self) -> list[dict[str, any]]:
+        """to_records
+
+        The table as a list of dicts, missing values as None.
+        """
+        columns = {}
+        for name, kind in self.fields.items():
+            values = self[name].tolist()
+            if kind != "str":
+                valid = self._valid[name].tolist()
+                values = [v if ok else None for v, ok in zip(values, valid)]
+            columns[name] = values
+        return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+    def __repr__(self) -> str:
+        return f"ColumnTable({len(self)} records, fields={list(self.fields)})"
@@ -67,13 +67,15 @@ class BaseData:
     def add(self, name: str, value: any) -> None:
         """add
 
-        Add new data to the instance.
+        Add new data to the instance, replacing the value of an existing
+        name.
 
         Args:
             name (str): The data's name
             value (str): The data's value
         """
-        self.data_list.append(name)
+        if name not in self.data_list:
+            self.data_list.append(name)
         self.__setattr__(name, value)
 
     def list_options(self) -> list[str]:
@@ -1,5 +1,20 @@
-import requests
+from functools import partial
+from typing import Callable
+
 from halo_psa.config import settings
+from .deadline import Deadline, DeadlineExceeded, request_timeout
+from .hedging import HedgePolicy
+from .memory import MemoryGovernor
+from .metrics import Metrics
+from .profiling import Profiler, phase
+from .request_spec import RequestSpec
+from .scheduler import BULK, DEFAULT, RequestScheduler
+from .transport import (
+    BaseTransport,
+    TransportResponse,
+    TransportTimeout,
+    default_transport,
+)
 
 RESOURCE_URL: str = settings.RESOURCE_SERVER
 
@@ -19,17 +34,33 @@ class BaseResource:
         When subclassing `BaseResource` be sure to include
         the following class attributes:
 
+        RESOURCE_NAME (str): The name used by :class:`HaloAPI` and metrics
         RESOURCE_PAGE (str): The Resource url page name
         RESOURCE_DATA (str): Response dictionary key that contains resource
             record data.
         LIST_PARAMS (dict[str, any]): Query parameters for a GET request.
 
+    Optional Class Attributes:
+    --------------------------
+
+        RELATIONS (dict[str, tuple[str, str]]): Related resources that can be
+            prefetched, mapped as ``{name: (foreign_key, resource)}``.
+        SEARCH_FIELDS (tuple[str, ...]): Record fields matched by a local
+            ``search`` lookup. Defaults to ``("name",)``.
+        SNAPSHOT_FIELDS (dict[str, str]): Record fields kept in a binary
+            snapshot, mapped to "int", "float", "bool" or "str".
+            Defaults to ``{"id": "int", "name": "str"}``.
+        DATE_FIELD (str): Record date field filtered by ``startdate`` and
+            ``enddate``; resources with one can be read in time windows.
+            Defaults to None.
+
     Example:
     --------
     
     A suppliers resource::
 
         >>> class SuppliersResource(BaseResource):
+        >>>     RESOURCE_NAME: str = "suppliers"
         >>>     RESOURCE_PAGE: str = "Supplier"
         >>>     RESOURCE_DATA: str = "suppliers"
         >>>     PAGENATE: bool = False
@@ -64,21 +95,48 @@ class BaseResource:
 
     """
 
+    RESOURCE_NAME: str = ...
+    """Name of the resource used by HaloAPI and metrics"""
     RESOURCE_PAGE: str = ...
     """Page  name for the resource"""
     RESOURCE_DATA: str = ...
     """name of the response container with resource items"""
     LIST_PARAMS: dict[str, any] = ...
     """query parameters for a get request to the resource"""
+    RELATIONS: dict[str, tuple[str, str]] = {}
+    """related resources mapped as {name: (foreign_key, resource)}"""
+    SEARCH_FIELDS: tuple[str, ...] = ("name",)
+    """record fields matched by a local search lookup"""
+    SNAPSHOT_FIELDS: dict[str, str] = {"id": "int", "name": "str"}
+    """record fields and types kept in a binary snapshot"""
+    DATE_FIELD: str = None
+    """record date field filtered by startdate and enddate"""
 
     def __init__(
         self,
         page: str = RESOURCE_PAGE,
         data_group: str = RESOURCE_DATA,
+        transport: BaseTransport = None,
+        metrics: Metrics = None,
+        scheduler: RequestScheduler = None,
+        profiler: Profiler = None,
+        governor: MemoryGovernor = None,
+        hedge: HedgePolicy = None,
         **extra,
     ):
         self._page: str = page
         self._data_group: str = data_group
+        self.transport: BaseTransport = transport or default_transport()
+        self.metrics: Metrics = metrics or Metrics()
+        self.scheduler: RequestScheduler = scheduler
+        self.profiler: Profiler = profiler
+        self.governor: MemoryGovernor = governor
+        self.hedge: HedgePolicy = hedge
+        self.spec: RequestSpec = RequestSpec(page)
+        """Compiled request for the resource's url"""
+        list_params = self.LIST_PARAMS if self.LIST_PARAMS is not ... else {}
+        self.list_spec: RequestSpec = RequestSpec(page, list_params)
+        """Compiled request with the default LIST_PARAMS"""
         if extra:
             for k, v in extra.items():
                 setattr(self, k, v)
@@ -97,7 +155,7 @@ class BaseResource:
         Returns:
             list | dict: Response data
         """
-        return requests.get(
+        return self.transport.get(
             url=self.page,
             headers=headers,
             params=query,
@@ -145,26 +203,144 @@ class BaseResource:
         """Response container with list data."""
         return self._data_group
 
-    def get(
+    def compile(
+        self,
+        pk: int = None,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+    ) -> RequestSpec:
+        """compile
+
+        The resource's request spec with per-call overrides. The compiled
+        spec is reused as is when there are no overrides.
+
+        Args:
+            pk (int, optional): An id of a specific resource object
+            headers (dict[str, str], optional): Request headers
+            params (dict[str, any], optional): Request query parameters
+
+        Returns:
+            RequestSpec: The request to send
+        """
+        spec = self.spec if pk is None else self.spec.with_pk(pk)
+        return spec.merge(params=params, headers=headers)
+
+    def request(
         self,
         auth: dict[str, str],
         headers: dict[str, str] = None,
         params: dict[str, str] = None,
         pk: int = None,
-    ):
-        # set the url
-        _url: str = self._build_url(pk=pk)
+        priority: int | str = DEFAULT,
+        spec: RequestSpec = None,
+        operation: str = "get",
+        deadline: Deadline = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        """request
 
-        # set the auth headers
-        _headers: dict[str, str] = auth
-        # add any additional headers
-        if headers:
-            _headers.update(headers)
+        Send a GET request to the resource and record it in the metrics.
+        With a scheduler, the request waits for a slot in its priority lane.
+        With a hedge policy, operations it hedges send a duplicate request
+        when the response is slow; both are recorded in the metrics.
+
+        Args:
+            auth (dict[str, str]): Authorization headers
+            headers (dict[str, str], optional): Request headers
+            params (dict[str, str], optional): Request query parameters
+            pk (int, optional): An id of a specific resource object
+            priority (int | str, optional): Scheduling priority
+            spec (RequestSpec, optional): A precompiled request, used
+            instead of ``headers``, ``params`` and ``pk``
+            operation (str, optional): The operation the request is
+            profiled under. Defaults to "get".
+            deadline (Deadline, optional): Bounds the wait for a slot and
+            the request.
+            on_headers (Callable[[dict[str, str]], None], optional): Called
+            with the response headers before the body is read.
+
+        Raises:
+            DeadlineExceeded: ``deadline`` passed before the response
+
+        Returns:
+            TransportResponse: The undecoded response
+        """
+        name = self.RESOURCE_NAME
+        with phase(self.profiler, name, operation, "headers"):
+            if spec is None:
+                spec = self.compile(pk=pk, headers=headers, params=params)
+            url, headers = spec.full_url, spec.header_dict(auth)
+
+        # wait for a request slot
+        if self.scheduler is not None:
+            step = f"waiting for a request slot for {name}"
+            with phase(self.profiler, name, operation, "schedule"):
+                try:
+                    self.scheduler.acquire(
+                        priority,
+                        name,
+                        None if deadline is None else deadline.timeout(step),
+                    )
+                except DeadlineExceeded:
+                    raise
+                except TransportTimeout as err:
+                    raise deadline.exceeded(step) from err
+
+        def send() -> TransportResponse:
+            response = self.transport.get(
+                url=url,
+                headers=headers,
+                timeout=request_timeout(deadline, f"the {name} request"),
+                # only passed when used, for custom transports
+                **({"on_headers": on_headers} if on_headers else {}),
+            )
+            self.metrics.record(name, response)
+            return response
+
+        def hedged(won: bool) -> None:
+            self.metrics.increment(name, "hedges")
+            if won:
+                self.metrics.increment(name, "hedge_wins")
 
         # get the response data
-        response = requests.get(
-            url=_url, headers=_headers, params=params
-        ).json()
+        try:
+            with phase(self.profiler, name, operation, "network"):
+                if self.hedge is None or not self.hedge.hedges_operation(
+                    operation
+                ):
+                    response = send()
+                else:
+                    response = self.hedge.send(name, send, hedged)
+        except DeadlineExceeded:
+            raise
+        except TransportTimeout as err:
+            if deadline is None or not deadline.expired:
+                raise
+            raise deadline.exceeded(f"the {name} request") from err
+        finally:
+            if self.scheduler is not None:
+                self.scheduler.release(priority, name)
+        return response
+
+    def get(
+        self,
+        auth: dict[str, str],
+        headers: dict[str, str] = None,
+        params: dict[str, str] = None,
+        pk: int = None,
+        priority: int | str = DEFAULT,
+        deadline: Deadline = None,
+    ):
+        response = self.request(
+            auth=auth,
+            headers=headers,
+            params=params,
+            pk=pk,
+            priority=priority,
+            deadline=deadline,
+        )
+        with phase(self.profiler, self.RESOURCE_NAME, "get", "decode"):
+            response = response.json()
 
         if type(response) is dict:
             if len(response.keys()) == 2:
@@ -173,3 +349,149 @@ class BaseResource:
                 return response[data]
             return response
         return response
+
+    def get_page(
+        self,
+        auth: dict[str, str],
+        page_no: int,
+        page_size: int,
+        headers: dict[str, str] = None,
+        params: dict[str, str] = None,
+        priority: int | str = BULK,
+        spec: RequestSpec = None,
+        deadline: Deadline = None,
+    ) -> tuple[list[dict], int | None, TransportResponse]:
+        """get_page
+
+        Request one page of resource records.
+
+        Args:
+            auth (dict[str, str]): Authorization headers
+            page_no (int): The page number, starting at 1
+            page_size (int): Records per page
+            headers (dict[str, str], optional): Request headers
+            params (dict[str, str], optional): Request query parameters
+            priority (int | str, optional): Scheduling priority
+            spec (RequestSpec, optional): A precompiled request the page
+            parameters are added to, used instead of ``headers`` and
+            ``params``
+            deadline (Deadline, optional): Bounds the page request
+
+        Raises:
+            HTTPStatusError: The server answered with an error status
+            DeadlineExceeded: ``deadline`` passed before the page arrived
+
+        Returns:
+            tuple[list[dict], int | None, TransportResponse]: The page's
+            records, the total record count (``None`` if the resource does
+            not report one) and the response.
+        """
+        response = self.fetch_page(
+            auth=auth,
+            page_no=page_no,
+            page_size=page_size,
+            headers=headers,
+            params=params,
+            priority=priority,
+            spec=spec,
+            deadline=deadline,
+        )
+        return (*self.decode_page(response), response)
+
+    def fetch_page(
+        self,
+        auth: dict[str, str],
+        page_no: int,
+        page_size: int,
+        headers: dict[str, str] = None,
+        params: dict[str, str] = None,
+        priority: int | str = BULK,
+        spec: RequestSpec = None,
+        deadline: Deadline = None,
+    ) -> TransportResponse:
+        """fetch_page
+
+        Request one page of resource records without decoding it, for
+        callers that decode pages on another thread. Takes the arguments
+        of :func:`get_page`.
+
+        With a memory governor, the request first waits until the page's
+        estimated size fits in the memory budget; the page holds its share
+        of the budget until :func:`decode_page` or until the response is
+        discarded.
+
+        Raises:
+            HTTPStatusError: The server answered with an error status
+            DeadlineExceeded: ``deadline`` passed before the page arrived
+
+        Returns:
+            TransportResponse: The page's response, see :func:`decode_page`.
+        """
+        name = self.RESOURCE_NAME
+        governor = self.governor
+        reservation = None
+        if governor is not None:
+            step = f"waiting for memory budget for {name}"
+            with phase(self.profiler, name, "page", "schedule"):
+                try:
+                    reservation = governor.acquire(
+                        name,
+                        page_size,
+                        None if deadline is None else deadline.timeout(step),
+                    )
+                except DeadlineExceeded:
+                    raise
+                except TransportTimeout as err:
+                    raise deadline.exceeded(step) from err
+        with phase(self.profiler, self.RESOURCE_NAME, "page", "headers"):
+            if spec is None:
+                spec = self.compile(headers=headers, params=params)
+            spec = spec.merge(
+                {
+                    "pageinate": True,
+                    "page_size": page_size,
+                    "page_no": page_no,
+                }
+            )
+        try:
+            response = self.request(
+                auth=auth,
+                priority=priority,
+                spec=spec,
+                operation="page",
+                deadline=deadline,
+                on_headers=(
+                    None
+                    if reservation is None
+                    else partial(governor.headers, reservation)
+                ),
+            )
+            if reservation is not None:
+                governor.hold(reservation, response)
+            response.raise_for_status()
+        except BaseException:
+            if reservation is not None:
+                governor.release(reservation)
+            raise
+        return response
+
+    def decode_page(
+        self, response: TransportResponse
+    ) -> tuple[list[dict], int | None]:
+        """decode_page
+
+        Parse a page fetched by :func:`fetch_page`.
+
+        Returns:
+            tuple[list[dict], int | None]: The page's records and the total
+            record count (``None`` if the resource does not report one).
+        """
+        with phase(self.profiler, self.RESOURCE_NAME, "page", "decode"):
+            data = response.json()
+        if isinstance(data, list):
+            records, total = data, None
+        else:
+            records, total = data[self.data_group], data.get("record_count")
+        if self.governor is not None:
+            self.governor.decoded(response, len(records))
+        return records, total
@@ -0,0 +1,328 @@
+"""
+Cassette
+========
+
+Record real HaloPSA traffic once and replay it offline.
+
+A cassette is a JSON lines file. The first line describes the recording and
+every following line is one request/response pair, with the response body
+zlib compressed (base64 encoded). Credentials are redacted: authorization
+headers, the authentication form and the tokens it returns. Resource
+payloads are recorded as they are.
+
+Record a run, then benchmark against the recording::
+
+    TRANSPORT=record CASSETTE=assets.jsonl python sync.py
+    TRANSPORT=replay CASSETTE=assets.jsonl REPLAY_LATENCY_SCALE=0.5 \\
+        python sync.py
+
+"""
+
+# python
+import base64
+import json
+import time
+import zlib
+from collections import deque
+from threading import Lock
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .transport import (
+    BaseTransport,
+    RequestsTransport,
+    TransportError,
+    TransportResponse,
+    TransportTimeout,
+    register_transport,
+)
+
+VERSION: int = 1
+"""Cassette format version"""
+
+REDACTED: str = "REDACTED"
+"""Replacement for secret values"""
+
+REDACT_HEADERS: tuple[str, ...] = ("authorization", "cookie", "set-cookie")
+"""Header names whose values are never written"""
+
+REDACT_FIELDS: tuple[str, ...] = (
+    "client_secret",
+    "password",
+    "refresh_token",
+)
+"""Authentication form fields whose values are never written"""
+
+REDACT_TOKENS: tuple[str, ...] = (
+    "access_token",
+    "refresh_token",
+    "id_token",
+)
+"""Token response fields whose values are never written"""
+
+
+def _redact_headers(headers: dict[str, str]) -> dict[str, str]:
+    return {
+        k: REDACTED if k.lower() in REDACT_HEADERS else v
+        for k, v in (headers or {}).items()
+    }
+
+
+def _redact_fields(
+    data: dict[str, any] | None, fields: tuple[str, ...] = REDACT_FIELDS
+) -> dict[str, any] | None:
+    if not isinstance(data, dict):
+        return data
+    return {k: REDACTED if k in fields else v for k, v in data.items()}
+
+
+def _redact_tokens(content: bytes) -> bytes:
+    """_redact_tokens
+
+    Redact the tokens of an authentication response. Other bodies are
+    kept as is.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    redacted = _redact_fields(data, REDACT_TOKENS)
+    if redacted == data:
+        return content
+    return json.dumps(redacted).encode()
+
+
+def _query(
+    url: str, params: dict[str, any] = None
+) -> tuple[str, list[list[str]]]:
+    """_query
+
+    The url without its query string, and the query parameters from both
+    as sorted string pairs, the way they are sent.
+    """
+    parts = urlsplit(url)
+    pairs = [[k, v] for k, v in parse_qsl(parts.query)]
+    pairs += [[k, str(v)] for k, v in (params or {}).items() if v is not None]
+    return parts._replace(query="").geturl(), sorted(pairs)
+
+
+def _match_key(method: str, url: str, params: list[list[str]]) -> str:
+    return json.dumps([method.upper(), url, params])
+
+
+@register_transport
+class RecordingTransport(BaseTransport):
+    """
+    RecordingTransport
+    ==================
+
+    Sends requests through ``inner`` and appends every request/response
+    pair to a cassette file. Failed requests are recorded too, so replays
+    reproduce them.
+    """
+
+    NAME: str = "record"
+
+    def __init__(
+        self,
+        path: str = settings.CASSETTE,
+        inner: BaseTransport = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            path (str, optional): Cassette file to write.
+            Defaults to the CASSETTE setting.
+            inner (BaseTransport, optional): Transport that sends the
+            requests. Defaults to a new RequestsTransport.
+        """
+        self.path: str = path
+        self.inner: BaseTransport = inner or RequestsTransport()
+        self._lock: Lock = Lock()
+        self._start: float = time.monotonic()
+        self._file = open(path, "w")
+        self._write(
+            {
+                "version": VERSION,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            }
+        )
+
+    def _write(self, entry: dict[str, any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        data: dict[str, any] = None,
+        timeout: float = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        base_url, query = _query(url, params)
+        entry = {
+            "at": round(time.monotonic() - self._start, 6),
+            "method": method.upper(),
+            "url": base_url,
+            "params": query,
+            "headers": _redact_headers(headers),
+            "data": _redact_fields(data),
+        }
+        started = time.perf_counter()
+        try:
+            response = self.inner.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                data=data,
+                timeout=timeout,
+                on_headers=on_headers,
+            )
+        except TransportError as err:
+            entry["error"] = {
+                "timeout": isinstance(err, TransportTimeout),
+                "message": str(err),
+                "elapsed": round(time.perf_counter() - started, 6),
+            }
+            self._write(entry)
+            raise
+        body = response.content
+        if data is not None:
+            # only authentication sends a form; its response holds tokens
+            body = _redact_tokens(body)
+        body = zlib.compress(body)
+        entry["response"] = {
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": _redact_headers(response.headers),
+            "body": base64.b64encode(body).decode(),
+            "elapsed": round(response.elapsed, 6),
+            "http_version": response.http_version,
+            "wire_bytes": response.wire_bytes,
+        }
+        self._write(entry)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.inner.close()
+
+
+@register_transport
+class ReplayTransport(BaseTransport):
+    """
+    ReplayTransport
+    ===============
+
+    Answers requests from a cassette without touching the network.
+
+    Requests are matched on method, url and query parameters. Repeated
+    requests are answered with the recorded responses in order, starting
+    over once they are used up, so a short recording can drive a long
+    benchmark. Each response is delayed by its recorded time multiplied by
+    ``latency_scale``.
+
+    Raises:
+        TransportError: No recorded request matches.
+    """
+
+    NAME: str = "replay"
+
+    def __init__(
+        self,
+        path: str = settings.CASSETTE,
+        latency_scale: float = settings.REPLAY_LATENCY_SCALE,
+    ) -> None:
+        """__init__
+
+        Args:
+            path (str, optional): Cassette file to read.
+            Defaults to the CASSETTE setting.
+            latency_scale (float, optional): Multiplier for recorded
+            response times; 0 disables delays.
+            Defaults to the REPLAY_LATENCY_SCALE setting.
+        """
+        self.path: str = path
+        self.latency_scale: float = latency_scale
+        self._lock: Lock = Lock()
+        self._recorded: dict[str, list[dict]] = {}
+        self._queues: dict[str, deque] = {}
+        with open(path) as f:
+            header = json.loads(f.readline())
+            if header.get("version") != VERSION:
+                raise ValueError(
+                    f"Cassette version ({header.get('version')}) "
+                    "is not supported"
+                )
+            for line in f:
+                entry = json.loads(line)
+                key = _match_key(
+                    entry["method"], entry["url"], entry["params"]
+                )
+                self._recorded.setdefault(key, []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._recorded.values())
+
+    def _next(self, key: str) -> dict[str, any] | None:
+        with self._lock:
+            if key not in self._recorded:
+                return None
+            queue = self._queues.get(key)
+            if not queue:
+                queue = self._queues[key] = deque(self._recorded[key])
+            return queue.popleft()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        data: dict[str, any] = None,
+        timeout: float = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        entry = self._next(_match_key(method, *_query(url, params)))
+        if entry is None:
+            raise _Unrecorded(f"No recorded response for {method} {url}")
+        error = entry.get("error")
+        elapsed = (error or entry.get("response"))["elapsed"]
+        delay = elapsed * self.latency_scale
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TransportTimeout(f"Replayed request exceeded {timeout}s")
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            if error["timeout"]:
+                raise TransportTimeout(error["message"])
+            raise TransportError(error["message"])
+        response = entry["response"]
+        if on_headers is not None:
+            on_headers({k.lower(): v for k, v in response["headers"].items()})
+        return TransportResponse(
+            status_code=response["status_code"],
+            reason=response["reason"],
+            headers=response["headers"],
+            content=zlib.decompress(base64.b64decode(response["body"])),
+            elapsed=delay,
+            http_version=response["http_version"],
+            wire_bytes=response["wire_bytes"],
+        )
+
+
+class _Unrecorded(TransportError):
+    @property
+    def retryable(self) -> bool:
+        return False
@@ -0,0 +1,167 @@
+"""
+Deadline
+========
+
+End-to-end time budgets for API calls.
+
+A :class:`Deadline` is created once per public call and passed down to
+every step that can wait: the token refresh, the wait for a request slot,
+each request and retry, and each page. Every step waits at most the time
+left, and no new step starts once the budget is spent, so the whole call
+returns within its budget instead of each step having its own timeout.
+
+"""
+
+# python
+from time import monotonic, sleep
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .transport import TransportTimeout
+
+
+class DeadlineExceeded(TransportTimeout):
+    """
+    DeadlineExceeded
+    ================
+
+    A call ran out of its time budget. It is never retried.
+
+    Attributes:
+
+        partial (list | None): Records fetched before the budget ran out,
+        when the call collects records.
+
+    """
+
+    def __init__(self, message: str, partial: list = None) -> None:
+        super().__init__(message)
+        self.partial: list | None = partial
+
+    @property
+    def retryable(self) -> bool:
+        return False
+
+
+class Deadline:
+    """
+    Deadline
+    ========
+
+    A point in time a call must finish by.
+
+    Example:
+    --------
+
+        >>> deadline = Deadline(2.0)
+        >>> halo.get("clients", pk=12, deadline=deadline)
+        >>> deadline.remaining()
+        1.73
+
+    Public :class:`HaloAPI` calls also take the budget in seconds::
+
+        >>> halo.lookup("agents", "Jack", deadline=2.0)
+
+    """
+
+    __slots__ = ("seconds", "expires_at")
+
+    REQUEST_TIMEOUT: float = settings.REQUEST_TIMEOUT
+    """Longest wait for one request, whatever the budget left"""
+
+    def __init__(self, seconds: float) -> None:
+        """__init__
+
+        Args:
+            seconds (float): The budget, from now.
+        """
+        self.seconds: float = seconds
+        self.expires_at: float = monotonic() + seconds
+
+    @classmethod
+    def of(cls, value: "float | Deadline | None") -> "Deadline | None":
+        """of
+
+        A deadline from a budget in seconds, an existing deadline (used as
+        is, so nested calls share one budget) or None for no deadline.
+        """
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self) -> float:
+        """remaining
+
+        Seconds left, never below 0.
+        """
+        return max(self.expires_at - monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is spent."""
+        return monotonic() >= self.expires_at
+
+    def check(self, step: str) -> None:
+        """check
+
+        Raise before starting ``step`` if the budget is spent.
+
+        Raises:
+            DeadlineExceeded: No time is left.
+        """
+        if self.expired:
+            raise DeadlineExceeded(
+                f"Deadline of {self.seconds:g}s exceeded before {step}"
+            )
+
+    def timeout(self, step: str, limit: float = None) -> float:
+        """timeout
+
+        The time ``step`` may wait: the time left, capped at ``limit``.
+
+        Raises:
+            DeadlineExceeded: No time is left.
+        """
+        self.check(step)
+        remaining = self.remaining()
+        return remaining if limit is None else min(remaining, limit)
+
+    def sleep(self, seconds: float, step: str) -> None:
+        """sleep
+
+        Sleep before ``step``, e.g. a retry backoff.
+
+        Raises:
+            DeadlineExceeded: ``step`` could not start in time.
+        """
+        if seconds >= self.remaining():
+            raise DeadlineExceeded(
+                f"Deadline of {self.seconds:g}s exceeded before {step}"
+            )
+        sleep(seconds)
+
+    def exceeded(self, step: str, partial: list = None) -> DeadlineExceeded:
+        """exceeded
+
+        The error for a ``step`` that ran out of time.
+        """
+        return DeadlineExceeded(
+            f"Deadline of {self.seconds:g}s exceeded during {step}", partial
+        )
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.seconds:g}s, {self.remaining():.3f}s left)"
+
+
+def request_timeout(deadline: Deadline | None, step: str) -> float | None:
+    """request_timeout
+
+    The timeout of one request: REQUEST_TIMEOUT, capped at the time left
+    before ``deadline``. None when there is neither.
+    """
+    limit = Deadline.REQUEST_TIMEOUT or None
+    if deadline is None:
+        return limit
+    return deadline.timeout(step, limit)
@@ -0,0 +1,249 @@
+"""
+Hedging
+=======
+
+Cut the tail latency of idempotent GET requests with hedged requests.
+
+When a response has not arrived by a percentile of the resource's recent
+latencies, a duplicate request is sent and whichever answers first is
+used. Most requests finish before the hedge delay and cost nothing extra;
+the few stuck behind a slow server are rescued by the duplicate, which
+usually lands on a faster one.
+
+Hedges are capped at a share of all requests, so a server that is slow
+for everyone does not get twice the load. Only operations listed in
+``operations`` are hedged; by default single record ``get`` calls, not
+page fetches.
+
+"""
+
+# python
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from threading import Lock
+from typing import Callable
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .transport import TransportResponse
+
+
+class HedgePolicy:
+    """
+    HedgePolicy
+    ===========
+
+    When to send a duplicate request, and how many.
+
+    The hedge delay of a resource is the ``percentile`` of its last
+    ``WINDOW`` response times; no request is hedged until ``MIN_SAMPLES``
+    have been seen. A hedge is only sent while hedges stay below
+    ``max_extra`` of the requests sent.
+
+    Example:
+    --------
+
+        >>> halo = HaloAPI(hedge=HedgePolicy(percentile=95, max_extra=0.05))
+        >>> for pk in ids:
+        >>>     halo.get("clients", pk=pk)
+        >>> halo.hedge.stats()
+        {'requests': 1000, 'hedges': 41, 'hedge_rate': 0.041, 'wins': 33,
+         ...}
+
+    """
+
+    PERCENTILE: float = settings.HEDGE_PERCENTILE
+    """Percentile of recent latency a response may take before a hedge"""
+    MAX_EXTRA: float = settings.HEDGE_MAX_EXTRA
+    """Most hedges, as a share of the requests sent"""
+    OPERATIONS: tuple[str, ...] = ("get",)
+    """Request operations that may be hedged"""
+    WINDOW: int = 200
+    """Recent response times kept per resource"""
+    MIN_SAMPLES: int = 20
+    """Response times needed before a resource is hedged"""
+    MIN_DELAY: float = 0.005
+    """Shortest hedge delay in seconds"""
+    WORKERS: int = 32
+    """Threads sending hedged requests"""
+
+    def __init__(
+        self,
+        percentile: float = PERCENTILE,
+        max_extra: float = MAX_EXTRA,
+        operations: tuple[str, ...] = OPERATIONS,
+    ) -> None:
+        """__init__
+
+        Args:
+            percentile (float, optional): Percentile of recent latency
+            after which a hedge is sent. Defaults to PERCENTILE.
+            max_extra (float, optional): Most hedges as a share of
+            requests. Defaults to MAX_EXTRA.
+            operations (tuple[str, ...], optional): Request operations
+            that may be hedged. Defaults to OPERATIONS.
+        """
+        self.percentile: float = percentile
+        self.max_extra: float = max_extra
+        self.operations: tuple[str, ...] = tuple(operations)
+        self._lock: Lock = Lock()
+        self._latency: dict[str, deque[float]] = {}
+        self._executor: ThreadPoolExecutor = None
+        self.requests: int = 0
+        """Requests sent through the policy, hedges excluded"""
+        self.hedges: int = 0
+        """Hedges sent"""
+        self.wins: int = 0
+        """Hedges that answered first"""
+        self.skipped: int = 0
+        """Hedges not sent because of the load cap"""
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The threads requests are sent from, started on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.WORKERS, thread_name_prefix="halo-hedge"
+                )
+            return self._executor
+
+    def hedges_operation(self, operation: str) -> bool:
+        """hedges_operation
+
+        Whether requests of ``operation`` are hedged.
+        """
+        return operation in self.operations
+
+    def observe(self, resource: str, seconds: float) -> None:
+        """observe
+
+        Record the response time of a request to ``resource``.
+        """
+        with self._lock:
+            latency = self._latency.get(resource)
+            if latency is None:
+                latency = self._latency[resource] = deque(maxlen=self.WINDOW)
+            latency.append(seconds)
+
+    def delay(self, resource: str) -> float | None:
+        """delay
+
+        Seconds to wait for a response before hedging, or None while too
+        few response times are known.
+        """
+        with self._lock:
+            latency = sorted(self._latency.get(resource, ()))
+        if len(latency) < self.MIN_SAMPLES:
+            return None
+        index = min(
+            int(len(latency) * self.percentile / 100), len(latency) - 1
+        )
+        return max(latency[index], self.MIN_DELAY)
+
+    def _allow(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_extra * self.requests:
+                self.skipped += 1
+                return False
+            self.hedges += 1
+            return True
+
+    def _timed(
+        self, resource: str, send: Callable[[], TransportResponse]
+    ) -> TransportResponse:
+        response = send()
+        self.observe(resource, response.elapsed)
+        return response
+
+    def send(
+        self,
+        resource: str,
+        send: Callable[[], TransportResponse],
+        on_hedge: Callable[[bool], None] = None,
+    ) -> TransportResponse:
+        """send
+
+        Send a request, and a duplicate if no response arrives within the
+        hedge delay. The first response wins; a failure only counts when
+        both requests fail.
+
+        Args:
+            resource (str): The resource's name
+            send (Callable[[], TransportResponse]): Sends the request. It
+            may be called twice, from different threads.
+            on_hedge (Callable[[bool], None], optional): Called when a
+            hedge was sent, with whether it won.
+
+        Raises:
+            TransportError: The request, and its hedge if sent, failed.
+
+        Returns:
+            TransportResponse: The first response.
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.delay(resource)
+        if delay is None:
+            return self._timed(resource, send)
+        primary = self.executor.submit(self._timed, resource, send)
+        done, _ = wait((primary,), timeout=delay)
+        if done or not self._allow():
+            return primary.result()
+        hedge = self.executor.submit(self._timed, resource, send)
+        pending: set[Future] = {primary, hedge}
+        error: BaseException = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in (primary, hedge):
+                if future not in done:
+                    continue
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                won = future is hedge
+                if won:
+                    with self._lock:
+                        self.wins += 1
+                if on_hedge is not None:
+                    on_hedge(won)
+                return future.result()
+        raise error
+
+    def stats(self) -> dict[str, any]:
+        """stats
+
+        Requests, hedge rate and wins, and the current hedge delay of each
+        resource.
+        """
+        with self._lock:
+            resources = list(self._latency)
+            stats = {
+                "requests": self.requests,
+                "hedges": self.hedges,
+                "hedge_rate": (
+                    self.hedges / self.requests if self.requests else 0.0
+                ),
+                "wins": self.wins,
+                "win_rate": self.wins / self.hedges if self.hedges else 0.0,
+                "skipped": self.skipped,
+            }
+        stats["delay"] = {name: self.delay(name) for name in resources}
+        return stats
+
+    def close(self) -> None:
+        """close
+
+        Stop the sending threads, once requests in flight finish.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
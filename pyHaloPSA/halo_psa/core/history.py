@@ -0,0 +1,481 @@
+"""
+History
+=======
+
+A compact, queryable history of resource records, kept in SQLite.
+
+Each commit of a resource's records is a version. The first version stores
+every record in full; later versions only store the records that were
+added, changed or removed, as zlib compressed deltas of the fields that
+changed. Unchanged records cost nothing, so the store grows with the
+changes made in HaloPSA rather than with the number of copies taken.
+
+A record's state at any version is its last full copy with the deltas
+after it applied in order. To keep that chain short, a full copy is stored
+again once a record has ``CHECKPOINT`` deltas. The latest state of every
+record is kept with a digest of it, so a commit only decodes the records
+whose digest changed.
+
+Tables:
+-------
+
+    versions: One row per commit: resource, time and change counts.
+    changes: One row per added, changed or removed record of a version,
+    indexed by ``(resource, record, version)``.
+    current: The latest state and digest of every record.
+
+Example:
+--------
+
+    >>> store = HistoryStore("~/audit/halo_history.db")
+    >>> store.commit("clients", Halo.iter_records("clients"))
+    {'version': 12, 'records': 4210, 'added': 3, 'changed': 17, ...}
+    >>> store.as_of("clients", "2026-03-31")[42]["name"]
+    'Contoso Ltd'
+    >>> [(c["taken_at"], c["change"]) for c in store.history("clients", 42)]
+    [(1767225600.0, 'added'), (1772409600.0, 'changed')]
+
+"""
+
+# python
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from datetime import datetime
+from threading import Lock
+from typing import Iterable, Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+FULL: str = "full"
+"""Change row holding a complete record"""
+DELTA: str = "delta"
+"""Change row holding the fields set and unset since the previous row"""
+REMOVED: str = "removed"
+"""Change row marking a record as removed"""
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS versions (
+    id INTEGER PRIMARY KEY,
+    resource TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    records INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    changed INTEGER NOT NULL,
+    removed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_taken ON versions (resource, taken_at);
+CREATE TABLE IF NOT EXISTS changes (
+    resource TEXT NOT NULL,
+    record INTEGER NOT NULL,
+    version INTEGER NOT NULL REFERENCES versions (id),
+    kind TEXT NOT NULL,
+    data BLOB,
+    PRIMARY KEY (resource, record, version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS current (
+    resource TEXT NOT NULL,
+    record INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    chain INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (resource, record)
+) WITHOUT ROWID;
+"""
+
+
+def _encode(value: any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _pack(value: any) -> bytes:
+    return zlib.compress(_encode(value), 9)
+
+
+def _unpack(data: bytes) -> any:
+    return json.loads(zlib.decompress(data))
+
+
+def _delta(old: dict, new: dict) -> dict[str, any]:
+    return {
+        "set": {k: v for k, v in new.items() if k not in old or old[k] != v},
+        "unset": [k for k in old if k not in new],
+    }
+
+
+def _apply(record: dict, delta: dict[str, any]) -> dict:
+    record = {**record, **delta["set"]}
+    for name in delta["unset"]:
+        record.pop(name, None)
+    return record
+
+
+def _timestamp(value: datetime | str | float) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.rstrip("Z"))
+    return value.timestamp()
+
+
+class HistoryStore:
+    """
+    HistoryStore
+    ============
+
+    Versions of resource records, stored as deltas, with "as of" and
+    per-record history queries.
+
+    A commit compares records with the latest version by their ``key``
+    field. Records missing from a commit are marked removed, unless the
+    commit is partial (``complete=False``), e.g. an incremental sync.
+
+    Example:
+    --------
+
+        >>> store = Halo.history
+        >>> Halo.record_history("assets")
+        >>> store.as_of("assets", datetime(2026, 1, 1))
+
+    """
+
+    PATH: str = settings.HISTORY_PATH
+    """Default history database"""
+    CHECKPOINT: int = 32
+    """Deltas of a record before a full copy is stored again"""
+
+    def __init__(self, path: str = PATH, checkpoint: int = CHECKPOINT):
+        """__init__
+
+        Args:
+            path (str, optional): The history database, created if
+            missing. Defaults to HISTORY_PATH.
+            checkpoint (int, optional): Deltas of a record before a full
+            copy is stored again. Defaults to CHECKPOINT.
+        """
+        self.path: str = os.path.expanduser(path)
+        self.checkpoint: int = max(checkpoint, 1)
+        if self.path != ":memory:":
+            folder = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(folder, exist_ok=True)
+        self._lock: Lock = Lock()
+        self._db: sqlite3.Connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def commit(
+        self,
+        resource: str,
+        records: Iterable[dict[str, any]],
+        taken_at: datetime | str | float = None,
+        key: str = "id",
+        complete: bool = True,
+    ) -> dict[str, int]:
+        """commit
+
+        Store the records of a resource as a new version.
+
+        Args:
+            resource (str): The resource's name
+            records (Iterable[dict[str, any]]): The records, e.g. from
+            :func:`HaloAPI.iter_records`.
+            taken_at (datetime | str | float, optional): When the records
+            were fetched. Defaults to now.
+            key (str, optional): Integer field identifying a record.
+            Defaults to "id".
+            complete (bool, optional): Whether ``records`` is the whole
+            resource, so missing records were removed. Defaults to True.
+
+        Returns:
+            dict[str, int]: The version's id and its record and change
+            counts.
+        """
+        taken_at = time.time() if taken_at is None else _timestamp(taken_at)
+        with self._lock, self._db:
+            db = self._db
+            known = {
+                record: (digest, chain)
+                for record, digest, chain in db.execute(
+                    "SELECT record, digest, chain FROM current "
+                    "WHERE resource = ?",
+                    (resource,),
+                )
+            }
+            version = db.execute(
+                "INSERT INTO versions (resource, taken_at, records, added, "
+                "changed, removed) VALUES (?, ?, 0, 0, 0, 0)",
+                (resource, taken_at),
+            ).lastrowid
+            changes: list[tuple] = []
+            current: list[tuple] = []
+            seen: set[int] = set()
+            added = changed = 0
+            for item in records:
+                record = int(item[key])
+                if record in seen:
+                    continue
+                seen.add(record)
+                raw = _encode(item)
+                digest = hashlib.blake2b(raw, digest_size=16).digest()
+                previous = known.get(record)
+                if previous is not None and previous[0] == digest:
+                    continue
+                data = zlib.compress(raw, 9)
+                if previous is None:
+                    added += 1
+                    kind, change, chain = FULL, data, 0
+                elif previous[1] + 1 >= self.checkpoint:
+                    changed += 1
+                    kind, change, chain = FULL, data, 0
+                else:
+                    changed += 1
+                    (old,) = db.execute(
+                        "SELECT data FROM current "
+                        "WHERE resource = ? AND record = ?",
+                        (resource, record),
+                    ).fetchone()
+                    kind = DELTA
+                    change = _pack(_delta(_unpack(old), item))
+                    chain = previous[1] + 1
+                changes.append((resource, record, version, kind, change))
+                current.append((resource, record, digest, chain, data))
+            removed = [r for r in known if r not in seen] if complete else []
+            changes.extend(
+                (resource, record, version, REMOVED, None)
+                for record in removed
+            )
+            db.executemany(
+                "INSERT INTO changes (resource, record, version, kind, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                changes,
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO current "
+                "(resource, record, digest, chain, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                current,
+            )
+            db.executemany(
+                "DELETE FROM current WHERE resource = ? AND record = ?",
+                [(resource, record) for record in removed],
+            )
+            count = len(known) + added - len(removed)
+            db.execute(
+                "UPDATE versions SET records = ?, added = ?, changed = ?, "
+                "removed = ? WHERE id = ?",
+                (count, added, changed, len(removed), version),
+            )
+        return {
+            "version": version,
+            "records": count,
+            "added": added,
+            "changed": changed,
+            "removed": len(removed),
+            "stored_bytes": sum(len(c[4] or b"") for c in changes),
+        }
+
+    def versions(self, resource: str) -> list[dict[str, any]]:
+        """versions
+
+        The versions of a resource, oldest first.
+        """
+        rows = self._db.execute(
+            "SELECT id, taken_at, records, added, changed, removed "
+            "FROM versions WHERE resource = ? ORDER BY id",
+            (resource,),
+        )
+        names = ("version", "taken_at", "records")
+        names += ("added", "changed", "removed")
+        return [dict(zip(names, row)) for row in rows]
+
+    def version_at(
+        self, resource: str, when: datetime | str | float
+    ) -> int | None:
+        """version_at
+
+        The latest version of a resource taken at or before ``when``, or
+        None if there is none.
+        """
+        (version,) = self._db.execute(
+            "SELECT MAX(id) FROM versions "
+            "WHERE resource = ? AND taken_at <= ?",
+            (resource, _timestamp(when)),
+        ).fetchone()
+        return version
+
+    def _replay(self, rows: Iterable[tuple]) -> Iterator[tuple]:
+        """_replay
+
+        Rebuild states from ``(record, version, kind, data)`` rows sorted
+        by record and version, yielding each row with the state after it.
+        """
+        last, state = None, None
+        for record, version, kind, data in rows:
+            if record != last:
+                last, state = record, None
+            if kind == FULL:
+                state = _unpack(data)
+            elif kind == DELTA:
+                state = _apply(state, _unpack(data))
+            else:
+                state = None
+            yield record, version, kind, state
+
+    def as_of(
+        self, resource: str, when: datetime | str | float = None
+    ) -> dict[int, dict[str, any]]:
+        """as_of
+
+        The records of a resource as they were at ``when``: the state
+        stored by the latest version taken at or before it.
+
+        Args:
+            resource (str): The resource's name
+            when (datetime | str | float, optional): A datetime, an ISO
+            date or a unix time. Defaults to the latest version.
+
+        Returns:
+            dict[int, dict[str, any]]: Records by key; empty before the
+            first version.
+        """
+        if when is None:
+            rows = self._db.execute(
+                "SELECT record, data FROM current WHERE resource = ?",
+                (resource,),
+            )
+            return {record: _unpack(data) for record, data in rows}
+        version = self.version_at(resource, when)
+        if version is None:
+            return {}
+        # each record's rows from its last full copy up to the version
+        rows = self._db.execute(
+            "SELECT c.record, c.version, c.kind, c.data FROM changes c "
+            "WHERE c.resource = ? AND c.version <= ? AND c.version >= ("
+            "  SELECT MAX(f.version) FROM changes f"
+            "  WHERE f.resource = c.resource AND f.record = c.record"
+            "  AND f.version <= ? AND f.kind != ?"
+            ") ORDER BY c.record, c.version",
+            (resource, version, version, DELTA),
+        )
+        states: dict[int, dict[str, any]] = {}
+        for record, _, _, state in self._replay(rows):
+            if state is None:
+                states.pop(record, None)
+            else:
+                states[record] = state
+        return states
+
+    def get(
+        self, resource: str, record: int, when: datetime | str | float = None
+    ) -> dict[str, any] | None:
+        """get
+
+        One record as it was at ``when``, or None if it did not exist.
+        Defaults to its latest state.
+        """
+        history = self.history(resource, record, until=when)
+        return history[-1]["record"] if history else None
+
+    def history(
+        self,
+        resource: str,
+        record: int,
+        until: datetime | str | float = None,
+    ) -> list[dict[str, any]]:
+        """history
+
+        Every change of one record, oldest first.
+
+        Args:
+            resource (str): The resource's name
+            record (int): The record's key
+            until (datetime | str | float, optional): Only changes taken
+            at or before this time. Defaults to all.
+
+        Returns:
+            list[dict[str, any]]: One entry per change, with its
+            ``version``, ``taken_at``, ``change`` ("added", "changed" or
+            "removed"), the ``fields`` that changed and the ``record``
+            after the change (None once removed).
+        """
+        query = (
+            "SELECT c.record, c.version, c.kind, c.data, v.taken_at "
+            "FROM changes c JOIN versions v ON v.id = c.version "
+            "WHERE c.resource = ? AND c.record = ?"
+        )
+        args: tuple = (resource, int(record))
+        if until is not None:
+            query += " AND v.taken_at <= ?"
+            args += (_timestamp(until),)
+        rows = self._db.execute(query + " ORDER BY c.version", args).fetchall()
+        taken = {row[1]: row[4] for row in rows}
+        entries: list[dict[str, any]] = []
+        previous: dict[str, any] = None
+        for _, version, kind, state in self._replay(r[:4] for r in rows):
+            if state is None:
+                change, fields = "removed", sorted(previous or ())
+            elif previous is None:
+                change, fields = "added", sorted(state)
+            else:
+                delta = _delta(previous, state)
+                change = "changed"
+                fields = sorted([*delta["set"], *delta["unset"]])
+            entries.append(
+                {
+                    "version": version,
+                    "taken_at": taken[version],
+                    "change": change,
+                    "fields": fields,
+                    "record": state,
+                }
+            )
+            previous = state
+        return entries
+
+    def stats(self, resource: str = None) -> dict[str, any]:
+        """stats
+
+        Versions, change rows and stored bytes, for one resource or all.
+        """
+        where, args = "", ()
+        if resource:
+            where, args = "WHERE resource = ?", (resource,)
+        versions, first, last = self._db.execute(
+            f"SELECT COUNT(*), MIN(taken_at), MAX(taken_at) FROM versions "
+            f"{where}",
+            args,
+        ).fetchone()
+        rows, stored = self._db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM changes "
+            f"{where}",
+            args,
+        ).fetchone()
+        records, latest = self._db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM current "
+            f"{where}",
+            args,
+        ).fetchone()
+        return {
+            "versions": versions,
+            "first": first,
+            "last": last,
+            "records": records,
+            "changes": rows,
+            "history_bytes": stored,
+            "current_bytes": latest,
+        }
@@ -0,0 +1,250 @@
+"""
+Index
+=====
+
+In-memory secondary indexes over a loaded resource snapshot.
+
+A :class:`ResourceIndex` keeps every record of a resource in memory with
+hash indexes on ``id`` and any configured fields, plus a trigram index that
+answers HaloPSA's ``search`` (case-insensitive "contains") semantics locally.
+"""
+
+# python
+from threading import RLock
+from time import monotonic
+from typing import Callable
+
+
+def _trigrams(text: str) -> set[str]:
+    """_trigrams
+
+    Split ``text`` into its set of three character substrings.
+    """
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ResourceIndex:
+    """
+    ResourceIndex
+    =============
+
+    A locally searchable copy of a resource's records.
+
+    Records are loaded with ``loader`` and reloaded once they are older than
+    ``max_age`` seconds. Reloads are incremental: only records that were
+    added, changed or removed are re-indexed.
+
+    Example:
+    --------
+
+    Index agents by email and search them by name::
+
+        >>> index = ResourceIndex(
+        >>>     lambda: Halo.get_all("agents"),
+        >>>     fields=["email"],
+        >>>     search_fields=["name", "email"],
+        >>> )
+        >>> index.search("jack")
+        [{'id': 69, 'name': 'Jack Sparrow', ...}]
+        >>> index.find("email", "jack@blackpearl.com")
+        [{'id': 69, 'name': 'Jack Sparrow', ...}]
+
+    """
+
+    MAX_AGE: float = 300.0
+    """Seconds a loaded snapshot may be used before it is refreshed"""
+
+    def __init__(
+        self,
+        loader: Callable[[], list[dict]],
+        fields: list[str] = None,
+        search_fields: list[str] = None,
+        max_age: float = MAX_AGE,
+        key: str = "id",
+    ) -> None:
+        """__init__
+
+        Args:
+            loader (Callable[[], list[dict]]): Returns the resource's records.
+            fields (list[str], optional): Fields with an exact match hash
+            index. Defaults to None.
+            search_fields (list[str], optional): Fields matched by
+            :func:`search`. Defaults to ``["name"]``.
+            max_age (float, optional): Staleness bound in seconds.
+            Defaults to MAX_AGE.
+            key (str, optional): The records' primary key. Defaults to "id".
+        """
+        self._loader = loader
+        self.key: str = key
+        self.fields: tuple[str, ...] = tuple(fields or ())
+        self.search_fields: tuple[str, ...] = tuple(search_fields or ("name",))
+        self.max_age: float = max_age
+        self.loaded_at: float = None
+        self._lock: RLock = RLock()
+        self._records: dict[any, dict] = {}
+        self._order: dict[any, int] = {}
+        self._hash: dict[str, dict[any, set]] = {f: {} for f in self.fields}
+        self._text: dict[any, str] = {}
+        self._grams: dict[str, set] = {}
+
+    # Indexing
+
+    def _text_of(self, record: dict) -> str:
+        """_text_of
+
+        Lowercased search text of a record, one line per search field.
+        """
+        values = (record.get(f) for f in self.search_fields)
+        return "\n".join(str(v).lower() for v in values if v is not None)
+
+    def _add(self, pk: any, record: dict) -> None:
+        self._records[pk] = record
+        self._order.setdefault(pk, len(self._order))
+        for field in self.fields:
+            value = record.get(field)
+            self._hash[field].setdefault(value, set()).add(pk)
+        text = self._text_of(record)
+        self._text[pk] = text
+        for gram in _trigrams(text):
+            self._grams.setdefault(gram, set()).add(pk)
+
+    def _drop(self, pk: any) -> None:
+        record = self._records.pop(pk, None)
+        if record is None:
+            return
+        for field in self.fields:
+            ids = self._hash[field].get(record.get(field))
+            if ids is not None:
+                ids.discard(pk)
+                if not ids:
+                    del self._hash[field][record.get(field)]
+        for gram in _trigrams(self._text.pop(pk, "")):
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(pk)
+                if not ids:
+                    del self._grams[gram]
+
+    def upsert(self, record: dict) -> None:
+        """upsert
+
+        Add ``record`` to the index, replacing a record with the same key.
+        """
+        pk = record[self.key]
+        with self._lock:
+            current = self._records.get(pk)
+            if current == record:
+                return
+            self._drop(pk)
+            self._add(pk, record)
+
+    def remove(self, pk: any) -> None:
+        """remove
+
+        Remove the record with key ``pk`` from the index.
+        """
+        with self._lock:
+            self._drop(pk)
+            self._order.pop(pk, None)
+
+    def load(self, records: list[dict]) -> None:
+        """load
+
+        Apply a full snapshot of records. Unchanged records are kept as is
+        and records missing from ``records`` are removed.
+        """
+        with self._lock:
+            seen = set()
+            for record in records:
+                seen.add(record[self.key])
+                self.upsert(record)
+            for pk in [pk for pk in self._records if pk not in seen]:
+                self.remove(pk)
+            self._order = {
+                pk: i for i, pk in enumerate(r[self.key] for r in records)
+            }
+            self.loaded_at = monotonic()
+
+    def refresh(self, force: bool = False) -> None:
+        """refresh
+
+        Reload the snapshot from ``loader`` if it is stale or ``force``.
+        """
+        if force or self.is_stale:
+            self.load(self._loader())
+
+    def touch(self) -> None:
+        """touch
+
+        Mark the index as fresh without reloading it, for when another
+        source, such as webhooks, keeps it up to date.
+        """
+        with self._lock:
+            if self.loaded_at is not None:
+                self.loaded_at = monotonic()
+
+    # Status
+
+    @property
+    def is_stale(self) -> bool:
+        """is_stale
+
+        ``True`` if the index was never loaded or is older than max_age.
+        """
+        if self.loaded_at is None:
+            return True
+        return monotonic() - self.loaded_at > self.max_age
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # Queries
+
+    def _sorted(self, pks: set) -> list[dict]:
+        order = self._order
+        return [self._records[pk] for pk in sorted(pks, key=order.get)]
+
+    def get(self, pk: any) -> dict | None:
+        """get
+
+        Get a record by its primary key.
+        """
+        self.refresh()
+        return self._records.get(pk)
+
+    def find(self, field: str, value: any) -> list[dict]:
+        """find
+
+        Get the records whose ``field`` equals ``value``.
+
+        Raises:
+            ValueError: ``field`` is not indexed.
+        """
+        if field not in self._hash:
+            raise ValueError(
+                f"Field ({field}) is not indexed",
+                f"options include: {list(self.fields)}",
+            )
+        self.refresh()
+        with self._lock:
+            return self._sorted(self._hash[field].get(value, set()))
+
+    def search(self, value: str) -> list[dict]:
+        """search
+
+        Get the records with a search field containing ``value``,
+        ignoring case, like the API's ``search`` parameter.
+        """
+        self.refresh()
+        needle = str(value).lower()
+        with self._lock:
+            if len(needle) < 3:
+                candidates = self._records.keys()
+            else:
+                postings = [
+                    self._grams.get(g, set()) for g in _trigrams(needle)
+                ]
+                candidates = set.intersection(*sorted(postings, key=len))
+            text = self._text
+            found = {pk for pk in candidates if needle in text[pk]}
+            return self._sorted(found)
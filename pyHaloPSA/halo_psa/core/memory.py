@@ -0,0 +1,298 @@
+"""
+Memory
+======
+
+Keep the memory held by concurrent page fetches within a budget.
+
+Every page request reserves its expected footprint before it is sent: the
+body and the records parsed from it, which take several times the body's
+size. A request only starts while the reservations in flight fit in the
+budget, so large pages fetched in parallel lower the effective concurrency
+instead of exhausting memory. The first request in flight is always
+admitted, so a page larger than the whole budget still goes through, one
+at a time.
+
+Estimates are learned per resource: body bytes per record and the
+compression ratio, from the pages read so far. When the response headers
+arrive, the reservation is resized to the Content-Length, and when the
+body is read, to its actual size; the reservation is released once the
+page is decoded.
+
+"""
+
+# python
+import weakref
+from threading import Condition
+from time import monotonic
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .transport import TransportResponse, TransportTimeout
+
+
+class Reservation:
+    """
+    Reservation
+    ===========
+
+    Bytes held by one request.
+
+    Attributes:
+
+        resource (str): The resource's name
+        records (int): Records the request may return
+        bytes (int | None): Bytes currently reserved, None once released
+
+    """
+
+    __slots__ = ("resource", "records", "bytes", "__weakref__")
+
+    def __init__(self, resource: str, records: int, size: int) -> None:
+        self.resource: str = resource
+        self.records: int = records
+        self.bytes: int | None = size
+
+    def __repr__(self) -> str:
+        return f"Reservation({self.resource}, {self.bytes} bytes)"
+
+
+class MemoryGovernor:
+    """
+    MemoryGovernor
+    ==============
+
+    Admits page requests while their estimated footprint fits a budget.
+
+    Requests are admitted in arrival order, so a large page waiting for
+    room is not starved by smaller ones behind it.
+
+    Example:
+    --------
+
+        >>> halo = HaloAPI(governor=MemoryGovernor(512 * 2**20))
+        >>> halo.get_all("assets", concurrency=16,
+        >>>              params={"includedetails": True})
+        >>> halo.governor.stats()
+        {'budget': 536870912, 'in_flight': 0, 'peak': 529163510, ...}
+
+    """
+
+    BUDGET: int = int(settings.MEMORY_BUDGET_MB * 2**20)
+    """Bytes that requests in flight may hold (0 for no limit)"""
+    DECODE_FACTOR: float = 5.0
+    """Size of parsed records relative to their JSON body"""
+    RECORD_BYTES: int = 2048
+    """Body bytes per record assumed before a resource's first page"""
+    SMOOTHING: float = 0.3
+    """Weight of the newest page in the learned sizes"""
+
+    def __init__(
+        self,
+        budget: int = BUDGET,
+        decode_factor: float = DECODE_FACTOR,
+    ) -> None:
+        """__init__
+
+        Args:
+            budget (int, optional): Bytes that requests in flight may
+            hold. Defaults to BUDGET, from MEMORY_BUDGET_MB.
+            decode_factor (float, optional): Size of parsed records
+            relative to their body. Defaults to DECODE_FACTOR.
+        """
+        self.budget: int = budget
+        self.decode_factor: float = decode_factor
+        self._cond: Condition = Condition()
+        self._queue: list[Reservation] = []
+        self._held: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._record_bytes: dict[str, float] = {}
+        self._ratio: dict[str, float] = {}
+        self.in_flight: int = 0
+        """Bytes reserved by requests in flight"""
+        self.active: int = 0
+        """Requests in flight"""
+        self.peak: int = 0
+        """Most bytes reserved at once"""
+        self.peak_active: int = 0
+        """Most requests in flight at once"""
+        self.admitted: int = 0
+        """Requests admitted so far"""
+        self.delayed: int = 0
+        """Requests that waited for room in the budget"""
+        self.waited: float = 0.0
+        """Seconds requests spent waiting for room"""
+
+    def _footprint(self, body: float) -> int:
+        return int(body * (1 + self.decode_factor))
+
+    def estimate(self, resource: str, records: int) -> int:
+        """estimate
+
+        Expected footprint of a page of ``records`` records.
+        """
+        per_record = self._record_bytes.get(resource, self.RECORD_BYTES)
+        return self._footprint(per_record * max(records, 1))
+
+    def _fits(self, reservation: Reservation) -> bool:
+        if self._queue[0] is not reservation:
+            return False
+        if not self.budget or not self.active:
+            return True
+        return self.in_flight + reservation.bytes <= self.budget
+
+    def acquire(
+        self, resource: str, records: int, timeout: float = None
+    ) -> Reservation:
+        """acquire
+
+        Wait until a page of ``records`` records fits in the budget and
+        reserve it.
+
+        Args:
+            resource (str): The resource's name
+            records (int): Records the page may return
+            timeout (float, optional): Seconds to wait at most.
+
+        Raises:
+            TransportTimeout: No room was free within ``timeout``.
+
+        Returns:
+            Reservation: Pass it to :func:`hold` or :func:`release`.
+        """
+        reservation = Reservation(
+            resource, records, self.estimate(resource, records)
+        )
+        start = monotonic()
+        with self._cond:
+            self._queue.append(reservation)
+            try:
+                if not self._fits(reservation):
+                    self.delayed += 1
+                while not self._fits(reservation):
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (monotonic() - start)
+                        if remaining <= 0:
+                            raise TransportTimeout(
+                                "Timed out waiting for memory budget"
+                            )
+                    self._cond.wait(remaining)
+            finally:
+                self._queue.remove(reservation)
+                self._cond.notify_all()
+            self.in_flight += reservation.bytes
+            self.active += 1
+            self.admitted += 1
+            self.waited += monotonic() - start
+            self.peak = max(self.peak, self.in_flight)
+            self.peak_active = max(self.peak_active, self.active)
+        return reservation
+
+    def _resize(self, reservation: Reservation, size: int) -> None:
+        with self._cond:
+            if reservation.bytes is None:
+                return
+            self.in_flight += size - reservation.bytes
+            reservation.bytes = size
+            self.peak = max(self.peak, self.in_flight)
+            self._cond.notify_all()
+
+    def headers(
+        self, reservation: Reservation, headers: dict[str, str]
+    ) -> None:
+        """headers
+
+        Resize a reservation from the response's Content-Length, before
+        its body is read. A compressed body is scaled by the resource's
+        compression ratio; until one is known, the length can only raise
+        the estimate.
+        """
+        length = headers.get("content-length")
+        if not length or not length.isdigit():
+            return
+        size = self._footprint(int(length))
+        if headers.get("content-encoding", "identity") != "identity":
+            ratio = self._ratio.get(reservation.resource)
+            if ratio is None:
+                size = max(size, reservation.bytes or 0)
+            else:
+                size = self._footprint(int(length) * ratio)
+        self._resize(reservation, size)
+
+    def hold(
+        self, reservation: Reservation, response: TransportResponse
+    ) -> None:
+        """hold
+
+        Resize a reservation to the body read and keep it until the page
+        is decoded (see :func:`decoded`), or the response is discarded.
+        """
+        resource = reservation.resource
+        if response.wire_bytes and response.content:
+            ratio = len(response.content) / response.wire_bytes
+            self._ratio[resource] = self._smooth(
+                self._ratio.get(resource), ratio
+            )
+        self._resize(reservation, self._footprint(len(response.content)))
+        self._held[response] = (
+            reservation,
+            weakref.finalize(response, self.release, reservation),
+        )
+
+    def decoded(self, response: TransportResponse, records: int) -> None:
+        """decoded
+
+        Learn the body bytes per record of a decoded page and release its
+        reservation.
+        """
+        held = self._held.pop(response, None)
+        if held is None:
+            return
+        reservation, release = held
+        resource = reservation.resource
+        if records:
+            self._record_bytes[resource] = self._smooth(
+                self._record_bytes.get(resource),
+                len(response.content) / records,
+            )
+        release()
+
+    def _smooth(self, current: float | None, value: float) -> float:
+        if current is None:
+            return value
+        return self.SMOOTHING * value + (1 - self.SMOOTHING) * current
+
+    def release(self, reservation: Reservation) -> None:
+        """release
+
+        Return the bytes of a reservation. Releasing twice has no effect.
+        """
+        with self._cond:
+            if reservation.bytes is None:
+                return
+            self.in_flight -= reservation.bytes
+            self.active -= 1
+            reservation.bytes = None
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, any]:
+        """stats
+
+        Budget, bytes and requests in flight, peaks and waits.
+        """
+        with self._cond:
+            return {
+                "budget": self.budget,
+                "in_flight": self.in_flight,
+                "active": self.active,
+                "waiting": len(self._queue),
+                "peak": self.peak,
+                "peak_active": self.peak_active,
+                "admitted": self.admitted,
+                "delayed": self.delayed,
+                "avg_wait": (
+                    self.waited / self.admitted if self.admitted else 0.0
+                ),
+                "record_bytes": dict(self._record_bytes),
+            }
@@ -0,0 +1,98 @@
+"""
+Metrics
+=======
+
+Per-resource request counters for a :class:`HaloAPI` instance.
+"""
+
+# python
+from threading import Lock
+
+
+class Metrics:
+    """
+    Metrics
+    =======
+
+    Thread safe counters grouped by resource name.
+
+    Recorded Counters:
+    ------------------
+
+        requests (int): Requests sent.
+        errors (int): Responses with a status code of 400 or above.
+        wire_bytes (int): Response body bytes as transferred (compressed).
+        body_bytes (int): Response body bytes after decompression.
+        elapsed (float): Total seconds spent waiting for responses.
+
+    Example:
+    --------
+
+    Bandwidth saved by compression::
+
+        >>> Halo.get("assets")
+        >>> Halo.metrics.summary()["assets"]
+        {'requests': 1, 'errors': 0, 'wire_bytes': 91822,
+         'body_bytes': 1423310, 'elapsed': 0.84, 'compression_ratio': 15.5}
+
+    """
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self._data: dict[str, dict[str, float]] = {}
+
+    def increment(self, resource: str, name: str, value: float = 1) -> None:
+        """increment
+
+        Add ``value`` to the ``name`` counter of ``resource``.
+        """
+        with self._lock:
+            counters = self._data.setdefault(resource, {})
+            counters[name] = counters.get(name, 0) + value
+
+    def record(self, resource: str, response: object) -> None:
+        """record
+
+        Record a :class:`TransportResponse` for ``resource``.
+        """
+        with self._lock:
+            counters = self._data.setdefault(resource, {})
+            for name, value in (
+                ("requests", 1),
+                ("errors", 0 if response.ok else 1),
+                ("wire_bytes", response.wire_bytes),
+                ("body_bytes", len(response.content)),
+                ("elapsed", response.elapsed),
+            ):
+                counters[name] = counters.get(name, 0) + value
+
+    def get(self, resource: str) -> dict[str, float]:
+        """get
+
+        A copy of the counters recorded for ``resource``.
+        """
+        with self._lock:
+            return dict(self._data.get(resource, {}))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """summary
+
+        A copy of every resource's counters, with the compression ratio
+        (decompressed bytes per transferred byte) where bytes were recorded.
+        """
+        with self._lock:
+            data = {k: dict(v) for k, v in self._data.items()}
+        for counters in data.values():
+            if counters.get("wire_bytes"):
+                counters["compression_ratio"] = round(
+                    counters["body_bytes"] / counters["wire_bytes"], 2
+                )
+        return data
+
+    def reset(self) -> None:
+        """reset
+
+        Clear all counters.
+        """
+        with self._lock:
+            self._data.clear()
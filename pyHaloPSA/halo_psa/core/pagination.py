@@ -0,0 +1,362 @@
+"""
+Pagination
+==========
+
+Iterate over every record of a resource one page at a time.
+"""
+
+# python
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from time import sleep
+from typing import Callable, Iterator
+
+# local
+from .base_resource import BaseResource
+from .deadline import Deadline
+from .profiling import phase
+from .request_spec import RequestSpec
+from .scheduler import BULK
+from .transport import TransportError, TransportResponse
+from .tuning import PageSizeTuner
+
+
+class Paginator:
+    """
+    Paginator
+    =========
+
+    Requests consecutive pages of a resource using HaloPSA's ``pageinate``,
+    ``page_size`` and ``page_no`` parameters and yields each page's records.
+    The resource's ``LIST_PARAMS``, ``params`` and ``headers`` are compiled
+    into one :class:`RequestSpec` up front; each page only adds its page
+    parameters.
+
+    Failed pages are retried up to ``RETRIES`` times, with exponential
+    backoff, when the failure is retryable. With ``concurrency`` above 1,
+    the pages after the first are fetched in parallel at a fixed size and
+    still yielded in order; resources that do not report a record count
+    are read one page at a time. With a :class:`PageSizeTuner`,
+    the page size is adjusted between pages from the measured latency,
+    body size and error rate; the page number is recomputed from the
+    records already read, so changing size never skips or repeats records.
+
+    Example:
+    --------
+
+        >>> pages = Paginator(assets, Halo.get_credentials, page_size=1000)
+        >>> for page in pages:
+        >>>     print(len(page))
+        1000
+        ...
+        >>> pages.record_count
+        23514
+
+    """
+
+    RETRIES: int = 2
+    """Times a failed page is retried"""
+    BACKOFF: float = 0.5
+    """Seconds to wait before the first retry, doubled for each retry"""
+    DEFAULT_PAGE_SIZE: int = 100
+    """Page size for resources without a PAGE_SIZE"""
+
+    def __init__(
+        self,
+        resource: BaseResource,
+        auth: Callable[[], dict[str, str]],
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        page_size: int = None,
+        tuner: PageSizeTuner = None,
+        priority: int | str = BULK,
+        concurrency: int = 1,
+        deadline: Deadline = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            resource (BaseResource): The resource to page through.
+            auth (Callable[[], dict[str, str]]): Returns current
+            authorization headers; it is called before every page.
+            headers (dict[str, str], optional): Request headers.
+            params (dict[str, any], optional): Request query parameters,
+            overriding the resource's LIST_PARAMS. ``None`` removes one.
+            page_size (int, optional): Records per page. Defaults to the
+            resource's PAGE_SIZE, or DEFAULT_PAGE_SIZE.
+            tuner (PageSizeTuner, optional): Adjusts the page size between
+            pages when provided. Defaults to None.
+            priority (int | str, optional): Scheduling priority of the page
+            requests. Defaults to BULK.
+            concurrency (int, optional): Pages fetched at once.
+            Defaults to 1.
+            deadline (Deadline, optional): Time budget of the whole
+            iteration, covering every page and retry. When it runs out,
+            iteration stops with :class:`DeadlineExceeded` after the pages
+            already yielded. Defaults to None.
+        """
+        self.resource: BaseResource = resource
+        self.auth: Callable[[], dict[str, str]] = auth
+        self.headers: dict[str, str] = headers
+        self.params: dict[str, any] = dict(params or {})
+        self.page_size: int = (
+            page_size
+            or getattr(resource, "PAGE_SIZE", 0)
+            or self.DEFAULT_PAGE_SIZE
+        )
+        self.tuner: PageSizeTuner = tuner
+        self.priority: int | str = priority
+        self.concurrency: int = max(concurrency, 1)
+        self.deadline: Deadline = deadline
+        self.spec: RequestSpec = resource.list_spec.merge(
+            params=self.params, headers=headers
+        )
+        self.key: str = (
+            tuner.key(resource.RESOURCE_NAME, dict(self.spec.params))
+            if tuner
+            else None
+        )
+        self.record_count: int = None
+        """Total records reported by the first page"""
+        self.pages: int = 0
+        """Pages read so far"""
+        self.records: int = 0
+        """Records read so far"""
+
+    @staticmethod
+    def _aligned(target: int, current: int, offset: int) -> int:
+        """_aligned
+
+        The size closest to ``target`` whose page boundary falls on
+        ``offset``. Shrinking by powers of two always aligns; growing waits
+        until ``offset`` is a multiple of the larger size.
+        """
+        while target > current and offset % target:
+            target //= 2
+        return target
+
+    def _next_size(self, size: int, offset: int) -> int:
+        if self.tuner is None:
+            return size
+        return self._aligned(self.tuner.suggest(self.key, size), size, offset)
+
+    def _fetch(self, page_no: int, size: int) -> tuple[list, int, object]:
+        resource = self.resource
+        with phase(resource.profiler, resource.RESOURCE_NAME, "page", "auth"):
+            auth = self.auth()
+        return resource.get_page(
+            auth=auth,
+            page_no=page_no,
+            page_size=size,
+            priority=self.priority,
+            spec=self.spec,
+            deadline=self.deadline,
+        )
+
+    def _backoff(self, attempt: int) -> None:
+        """_backoff
+
+        Wait before a retry, unless the deadline would pass first.
+        """
+        seconds = self.BACKOFF * 2**attempt
+        if self.deadline is None:
+            sleep(seconds)
+        else:
+            self.deadline.sleep(seconds, f"retry {attempt + 1} of a page")
+
+    def _fetch_response(self, page_no: int, size: int) -> TransportResponse:
+        resource = self.resource
+        with phase(resource.profiler, resource.RESOURCE_NAME, "page", "auth"):
+            auth = self.auth()
+        return resource.fetch_page(
+            auth=auth,
+            page_no=page_no,
+            page_size=size,
+            priority=self.priority,
+            spec=self.spec,
+            deadline=self.deadline,
+        )
+
+    def _retrying(self, fetch: Callable[[int, int], any], *page) -> any:
+        """_retrying
+
+        Call ``fetch(page_no, size)``, retrying retryable failures.
+        """
+        attempt = 0
+        while True:
+            try:
+                return fetch(*page)
+            except TransportError as err:
+                if not err.retryable or attempt >= self.RETRIES:
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+
+    def _fetch_retrying(self, page_no: int, size: int) -> list[dict]:
+        """_fetch_retrying
+
+        Fetch a page, retrying retryable failures. Used by parallel
+        fetches, which do not adjust the page size.
+        """
+        return self._retrying(self._fetch, page_no, size)[0]
+
+    def _parallel(
+        self, size: int, offset: int, total: int, raw: bool = False
+    ) -> Iterator[list[dict] | TransportResponse]:
+        """_parallel
+
+        Fetch the remaining pages ``concurrency`` at a time, in order, as
+        records or, when ``raw``, as undecoded responses.
+        """
+        pages = iter(range(offset // size + 1, -(-total // size) + 1))
+        pending: deque[Future] = deque()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            try:
+                while True:
+                    for page_no in islice(
+                        pages, self.concurrency - len(pending)
+                    ):
+                        if raw:
+                            future = pool.submit(
+                                self._retrying,
+                                self._fetch_response,
+                                page_no,
+                                size,
+                            )
+                        else:
+                            future = pool.submit(
+                                self._fetch_retrying, page_no, size
+                            )
+                        pending.append(future)
+                    if not pending:
+                        return
+                    page = pending.popleft().result()
+                    self.pages += 1
+                    if raw:
+                        yield page
+                        continue
+                    self.records += len(page)
+                    if page:
+                        yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def responses(self) -> Iterator[list[dict] | TransportResponse]:
+        """responses
+
+        Iterate like the paginator, but yield the pages after the first as
+        undecoded responses, for a caller that decodes them on another
+        thread (see :func:`BaseResource.decode_page`). The first page is
+        yielded as records, since its record count decides the pages to
+        fetch; so are all pages of resources without a record count. With
+        a tuner, the page size is adjusted between pages as when iterating.
+
+        Yields:
+            list[dict] | TransportResponse: Records, or a page's response.
+        """
+        size = self.page_size
+        if self.tuner is not None:
+            size = self.tuner.suggest(self.key, size)
+        offset = 0
+        attempt = 0
+        first = True
+        total = None
+        try:
+            while True:
+                page_no = offset // size + 1
+                # pages of a known record count are decoded by the caller
+                raw = not first and total is not None
+                try:
+                    if raw:
+                        response = self._fetch_response(page_no, size)
+                    else:
+                        records, total, response = self._fetch(page_no, size)
+                except TransportError as err:
+                    if not err.retryable or attempt >= self.RETRIES:
+                        raise
+                    self._backoff(attempt)
+                    attempt += 1
+                    if self.tuner is not None:
+                        self.tuner.observe(self.key, size, 0, 0.0, 0, True)
+                        size = self._next_size(size, offset)
+                    continue
+                attempt = 0
+                # every page but the last of a known count is full
+                count = min(size, total - offset) if raw else len(records)
+                if self.tuner is not None:
+                    self.tuner.observe(
+                        self.key,
+                        size,
+                        count,
+                        response.elapsed,
+                        len(response.content),
+                    )
+                self.pages += 1
+                offset += count
+                if raw:
+                    yield response
+                else:
+                    self.records += count
+                    self.record_count = total
+                    if records or first:
+                        yield records
+                first = False
+                if count < size or (total is not None and offset >= total):
+                    return
+                size = self._next_size(size, offset)
+                if self.concurrency > 1 and total is not None:
+                    yield from self._parallel(size, offset, total, raw=True)
+                    return
+        finally:
+            if self.tuner is not None:
+                self.tuner.save()
+
+    def __iter__(self) -> Iterator[list[dict]]:
+        size = self.page_size
+        if self.tuner is not None:
+            size = self.tuner.suggest(self.key, size)
+        offset = 0
+        attempt = 0
+        try:
+            while True:
+                page_no = offset // size + 1
+                try:
+                    records, total, response = self._fetch(page_no, size)
+                except TransportError as err:
+                    if not err.retryable or attempt >= self.RETRIES:
+                        raise
+                    self._backoff(attempt)
+                    attempt += 1
+                    if self.tuner is not None:
+                        self.tuner.observe(self.key, size, 0, 0.0, 0, True)
+                        size = self._next_size(size, offset)
+                    continue
+                attempt = 0
+                if self.tuner is not None:
+                    self.tuner.observe(
+                        self.key,
+                        size,
+                        len(records),
+                        response.elapsed,
+                        len(response.content),
+                    )
+                self.pages += 1
+                self.records += len(records)
+                self.record_count = total
+                offset += len(records)
+                if records:
+                    yield records
+                # without a record count, read until a short or empty page
+                if len(records) < size or (
+                    total is not None and offset >= total
+                ):
+                    return
+                size = self._next_size(size, offset)
+                if self.concurrency > 1 and total is not None:
+                    yield from self._parallel(size, offset, total)
+                    return
+        finally:
+            if self.tuner is not None:
+                self.tuner.save()
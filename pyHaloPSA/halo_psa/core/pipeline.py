@@ -0,0 +1,634 @@
+"""
+Pipeline
+========
+
+Stream a resource through fetch, decode, transform and sink stages that
+run at the same time.
+
+Each stage runs in its own thread and hands pages to the next through a
+bounded queue. While the sink writes one page, the next is being
+transformed, the one after that decoded and more are being fetched, so
+network, CPU and disk work overlap instead of taking turns. When a stage
+falls behind, the queue in front of it fills up and the stages before it
+wait, so memory stays bounded by the queue sizes however fast the others
+are.
+
+Every stage records the time it spent working, waiting for input
+(starved) and waiting to hand on its output (blocked by back-pressure).
+The stage with the most working time is the bottleneck.
+
+"""
+
+# python
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+from time import perf_counter
+from typing import IO, Callable, Iterable, Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .pagination import Paginator
+from .transform import Transform, TransformPool, _apply
+from .transport import TransportResponse
+
+STAGES: tuple[str, ...] = ("fetch", "decode", "transform", "sink")
+"""Pipeline stages, in the order pages pass through them"""
+
+FORMATS: tuple[str, ...] = ("ndjson", "csv")
+"""File sink formats"""
+
+POLL: float = 0.1
+"""Seconds between checks for a failed stage while waiting on a queue"""
+
+_DONE = object()
+"""Marks the end of a stage's output"""
+
+
+class _Stopped(Exception):
+    """_Stopped
+
+    Another stage failed; this one stops without output.
+    """
+
+
+class StageStats:
+    """
+    StageStats
+    ==========
+
+    Throughput counters of one pipeline stage.
+
+    Attributes:
+
+        name (str): The stage's name, one of STAGES
+        pages (int): Pages the stage handed on
+        records (int): Records the stage handed on; the fetch stage hands
+        on undecoded pages and counts none
+        bytes (int): Response bytes received, for the fetch stage
+        busy (float): Seconds spent working
+        starved (float): Seconds spent waiting for input
+        blocked (float): Seconds spent waiting for the next stage
+
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.pages: int = 0
+        self.records: int = 0
+        self.bytes: int = 0
+        self.busy: float = 0.0
+        self.starved: float = 0.0
+        self.blocked: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        """Records handed on per second of work."""
+        return self.records / self.busy if self.busy else 0.0
+
+    def as_dict(self) -> dict[str, any]:
+        """as_dict
+
+        The counters, with the records per second of work.
+        """
+        return {
+            "pages": self.pages,
+            "records": self.records,
+            "bytes": self.bytes,
+            "busy": self.busy,
+            "starved": self.starved,
+            "blocked": self.blocked,
+            "records_per_second": self.records_per_second,
+        }
+
+
+class Sink:
+    """
+    Sink
+    ====
+
+    Where a pipeline writes its records. Subclasses implement
+    :func:`write`, and :func:`close` when they hold resources.
+    A sink is written to and closed from the pipeline's sink thread only.
+
+    """
+
+    def write(self, records: list[dict[str, any]]) -> None:
+        """write
+
+        Write one page of records.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """close
+
+        Flush and release the sink once every page is written.
+        """
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CallbackSink(Sink):
+    """
+    CallbackSink
+    ============
+
+    Passes each page of records to a function.
+
+    Example:
+    --------
+
+        >>> halo.pipeline("assets", CallbackSink(upload)).run()
+
+    """
+
+    def __init__(self, callback: Callable[[list[dict]], None]) -> None:
+        self.callback: Callable[[list[dict]], None] = callback
+
+    def write(self, records: list[dict[str, any]]) -> None:
+        self.callback(records)
+
+
+class FileSink(Sink):
+    """
+    FileSink
+    ========
+
+    Writes records to a file as NDJSON or CSV.
+
+    The CSV columns are ``fields``, or the keys of the first record; nested
+    values are written as JSON.
+
+    Example:
+    --------
+
+        >>> halo.pipeline("assets", FileSink("assets.csv", "csv")).run()
+
+    """
+
+    def __init__(
+        self,
+        out: str | IO[str],
+        fmt: str = "ndjson",
+        fields: list[str] = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            out (str | IO[str]): A file path, or an open text stream that
+            is left open.
+            fmt (str, optional): One of FORMATS. Defaults to "ndjson".
+            fields (list[str], optional): The fields written.
+            Defaults to every field.
+
+        Raises:
+            ValueError: Format not in the formats list
+        """
+        if fmt not in FORMATS:
+            raise ValueError(
+                f"Format ({fmt}) not found", f"options include: {FORMATS}"
+            )
+        self.path: str = out if isinstance(out, str) else None
+        self.out: IO[str] = None if self.path else out
+        self.fmt: str = fmt
+        self.fields: list[str] = fields
+        self._csv: csv.DictWriter = None
+
+    def _row(self, record: dict) -> dict:
+        return {
+            k: json.dumps(v) if isinstance(v, (dict, list)) else v
+            for k, v in record.items()
+        }
+
+    def write(self, records: list[dict[str, any]]) -> None:
+        if self.out is None:
+            self.out = open(self.path, "w", newline="", encoding="utf-8")
+        if self.fields and self.fmt == "ndjson":
+            records = [{f: r.get(f) for f in self.fields} for r in records]
+        if self.fmt == "ndjson":
+            self.out.write(
+                "".join(
+                    json.dumps(r, separators=(",", ":")) + "\n"
+                    for r in records
+                )
+            )
+            return
+        if not records:
+            return
+        if self._csv is None:
+            # columns come from the first record unless given
+            self._csv = csv.DictWriter(
+                self.out,
+                self.fields or list(records[0]),
+                extrasaction="ignore",
+            )
+            self._csv.writeheader()
+        self._csv.writerows(self._row(r) for r in records)
+
+    def close(self) -> None:
+        if self.out is None:
+            return
+        if self.path:
+            self.out.close()
+            self.out = None
+        else:
+            self.out.flush()
+
+
+class SQLiteSink(Sink):
+    """
+    SQLiteSink
+    ==========
+
+    Upserts records into a SQLite table, one transaction per page.
+
+    With ``fields`` (e.g. a resource's ``SNAPSHOT_FIELDS``) each field is
+    a column; otherwise the table holds the record id and the record as
+    JSON. Records are replaced by ``key``, so a sink can be rerun over the
+    same table.
+
+    Example:
+    --------
+
+        >>> sink = SQLiteSink("halo.db", "assets", Assets.SNAPSHOT_FIELDS)
+        >>> halo.pipeline("assets", sink).run()
+
+    """
+
+    COLUMN_TYPES: dict[str, str] = {
+        "int": "INTEGER",
+        "float": "REAL",
+        "bool": "INTEGER",
+        "str": "TEXT",
+    }
+    """Field types mapped to SQLite column types"""
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        fields: dict[str, str] = None,
+        key: str = "id",
+    ) -> None:
+        """__init__
+
+        Args:
+            path (str): The database file.
+            table (str): The table, created if missing.
+            fields (dict[str, str], optional): Field names mapped to their
+            type, one of "int", "float", "bool" or "str".
+            Defaults to the record id and the record as JSON.
+            key (str, optional): Primary key field. Defaults to "id".
+
+        Raises:
+            ValueError: Field type not in the column types list
+        """
+        for name, kind in (fields or {}).items():
+            if kind not in self.COLUMN_TYPES:
+                raise ValueError(
+                    f"Field type ({kind}) of {name} not found",
+                    f"options include: {list(self.COLUMN_TYPES)}",
+                )
+        self.path: str = os.path.expanduser(path)
+        self.table: str = table
+        self.fields: dict[str, str] = fields
+        self.key: str = key
+        self._db: sqlite3.Connection = None
+        self._insert: str = None
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        table = f'"{self.table}"'
+        if self.fields:
+            types = {
+                name: self.COLUMN_TYPES[kind]
+                for name, kind in self.fields.items()
+            }
+        else:
+            types = {self.key: "INTEGER", "data": "TEXT"}
+        columns = [f'"{name}"' for name in types]
+        definitions = [
+            f"{column} {kind}" + (" PRIMARY KEY" if name == self.key else "")
+            for column, (name, kind) in zip(columns, types.items())
+        ]
+        db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)})"
+        )
+        self._insert = (
+            f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        return db
+
+    def _row(self, record: dict[str, any]) -> tuple:
+        if not self.fields:
+            return record.get(self.key), json.dumps(record)
+        return tuple(
+            json.dumps(value) if isinstance(value, (dict, list)) else value
+            for value in map(record.get, self.fields)
+        )
+
+    def write(self, records: list[dict[str, any]]) -> None:
+        if self._db is None:
+            self._db = self._open()
+        with self._db:
+            self._db.executemany(self._insert, map(self._row, records))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class Pipeline:
+    """
+    Pipeline
+    ========
+
+    Runs the pages of a :class:`Paginator` through four concurrent stages:
+
+        fetch: Requests the pages, ``concurrency`` at a time.
+        decode: Parses the page bodies.
+        transform: Applies record transforms, in this thread or, with
+        ``processes``, in a :class:`TransformPool`.
+        sink: Writes the records to a :class:`Sink`.
+
+    Pages reach the sink in fetch order. At most ``queue_size`` pages wait
+    between two stages. If a stage fails, the others stop and
+    :func:`run` raises its error.
+
+    Example:
+    --------
+
+        >>> pipeline = halo.pipeline(
+        >>>     "assets", SQLiteSink("halo.db", "assets"), concurrency=4
+        >>> )
+        >>> pipeline.run()
+        >>> print(pipeline.summary())
+        stage       pages   records     MiB   busy s  starved s  ...
+        fetch          21         0    18.9     6.10       0.00  ...
+        decode         21     20000     0.0     1.87       4.31  ...
+
+    """
+
+    QUEUE_SIZE: int = settings.PIPELINE_QUEUE_SIZE
+    """Pages buffered between two stages"""
+
+    def __init__(
+        self,
+        pages: Paginator,
+        sink: Sink | Callable[[list[dict]], None],
+        transforms: Transform | Iterable[Transform] = (),
+        processes: int = None,
+        queue_size: int = QUEUE_SIZE,
+    ) -> None:
+        """__init__
+
+        Args:
+            pages (Paginator): The pages to stream.
+            sink (Sink | Callable[[list[dict]], None]): Where records are
+            written. A function is wrapped in a :class:`CallbackSink`.
+            transforms (Transform | Iterable[Transform], optional): Record
+            transforms applied in order. Defaults to none.
+            processes (int, optional): Run the transforms in this many
+            worker processes instead of the transform thread.
+            Defaults to None.
+            queue_size (int, optional): Pages buffered between two stages.
+            Defaults to QUEUE_SIZE.
+        """
+        if callable(transforms):
+            transforms = (transforms,)
+        self.pages: Paginator = pages
+        if not isinstance(sink, Sink):
+            sink = CallbackSink(sink)
+        self.sink: Sink = sink
+        self.transforms: tuple[Transform, ...] = tuple(transforms)
+        self.processes: int = processes
+        self.queue_size: int = max(queue_size, 1)
+        self.stats: dict[str, StageStats] = {
+            name: StageStats(name) for name in STAGES
+        }
+        """Throughput counters per stage"""
+        self.seconds: float = 0.0
+        """Seconds the last run took"""
+        self._stop: threading.Event = threading.Event()
+        self._errors: list[BaseException] = []
+
+    @property
+    def records(self) -> int:
+        """Records written to the sink."""
+        return self.stats["sink"].records
+
+    @property
+    def bottleneck(self) -> str:
+        """The stage that spent the most time working."""
+        return max(self.stats.values(), key=lambda stats: stats.busy).name
+
+    def _put(self, out: queue.Queue, item: any, stats: StageStats) -> None:
+        started = perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise _Stopped
+            try:
+                out.put(item, timeout=POLL)
+                break
+            except queue.Full:
+                continue
+        stats.blocked += perf_counter() - started
+
+    def _get(self, source: queue.Queue, stats: StageStats) -> any:
+        started = perf_counter()
+        while True:
+            if self._stop.is_set():
+                raise _Stopped
+            try:
+                item = source.get(timeout=POLL)
+                break
+            except queue.Empty:
+                continue
+        stats.starved += perf_counter() - started
+        return item
+
+    def _items(self, source: queue.Queue, stats: StageStats) -> Iterator[any]:
+        while (item := self._get(source, stats)) is not _DONE:
+            yield item
+
+    def _fetch(self, out: queue.Queue) -> None:
+        stats = self.stats["fetch"]
+        pages = self.pages.responses()
+        try:
+            while True:
+                started = perf_counter()
+                page = next(pages, _DONE)
+                stats.busy += perf_counter() - started
+                if page is _DONE:
+                    return
+                stats.pages += 1
+                if isinstance(page, TransportResponse):
+                    stats.bytes += len(page.content)
+                self._put(out, page, stats)
+        finally:
+            # stops the page requests still in flight
+            pages.close()
+
+    def _decode(self, source: queue.Queue, out: queue.Queue) -> None:
+        stats = self.stats["decode"]
+        resource = self.pages.resource
+        for page in self._items(source, stats):
+            started = perf_counter()
+            if isinstance(page, TransportResponse):
+                page = resource.decode_page(page)[0]
+            stats.busy += perf_counter() - started
+            stats.pages += 1
+            stats.records += len(page)
+            self._put(out, page, stats)
+
+    def _transform(self, source: queue.Queue, out: queue.Queue) -> None:
+        stats = self.stats["transform"]
+        if self.processes and self.transforms:
+            self._transform_pool(source, out, stats)
+            return
+        for page in self._items(source, stats):
+            started = perf_counter()
+            if self.transforms:
+                page = _apply(self.transforms, page)
+            stats.busy += perf_counter() - started
+            stats.pages += 1
+            stats.records += len(page)
+            self._put(out, page, stats)
+
+    def _transform_pool(
+        self, source: queue.Queue, out: queue.Queue, stats: StageStats
+    ) -> None:
+        with TransformPool(
+            self.transforms,
+            processes=self.processes,
+            max_pending=self.queue_size,
+        ) as pool:
+            batches = pool.map(self._items(source, stats))
+            while True:
+                started = perf_counter()
+                page = next(batches, _DONE)
+                stats.busy += perf_counter() - started
+                if page is _DONE:
+                    return
+                stats.pages += 1
+                stats.records += len(page)
+                self._put(out, page, stats)
+
+    def _write(self, source: queue.Queue) -> None:
+        stats = self.stats["sink"]
+        try:
+            for page in self._items(source, stats):
+                started = perf_counter()
+                if page:
+                    self.sink.write(page)
+                stats.busy += perf_counter() - started
+                stats.pages += 1
+                stats.records += len(page)
+        finally:
+            self.sink.close()
+
+    def _stage(
+        self,
+        name: str,
+        run: Callable[..., None],
+        source: queue.Queue = None,
+        out: queue.Queue = None,
+    ) -> threading.Thread:
+        """_stage
+
+        Start a stage's thread. It ends its output with _DONE, or stops
+        every stage when it fails.
+        """
+
+        def target() -> None:
+            try:
+                run(*(q for q in (source, out) if q is not None))
+                if out is not None:
+                    self._put(out, _DONE, self.stats[name])
+            except _Stopped:
+                pass
+            except BaseException as err:
+                self._errors.append(err)
+                self._stop.set()
+
+        thread = threading.Thread(target=target, name=f"halo-{name}")
+        thread.start()
+        return thread
+
+    def run(self) -> "Pipeline":
+        """run
+
+        Stream every page to the sink and wait until it is written.
+
+        Raises:
+            Exception: The first error raised by a stage, e.g. a
+            :class:`TransportError` or the sink's error.
+
+        Returns:
+            Pipeline: The pipeline, for its stats.
+        """
+        self._stop.clear()
+        self._errors.clear()
+        started = perf_counter()
+        fetched, decoded, transformed = (
+            queue.Queue(self.queue_size) for _ in range(3)
+        )
+        threads = [
+            self._stage("fetch", self._fetch, out=fetched),
+            self._stage("decode", self._decode, fetched, decoded),
+            self._stage("transform", self._transform, decoded, transformed),
+            self._stage("sink", self._write, transformed),
+        ]
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            raise
+        finally:
+            self.seconds = perf_counter() - started
+        if self._errors:
+            raise self._errors[0]
+        return self
+
+    def summary(self) -> str:
+        """summary
+
+        A table of each stage's pages, records, time split and records per
+        second of the run, with the bottleneck.
+        """
+        lines = [
+            f"{'stage':<11}{'pages':>6}{'records':>10}{'MiB':>8}"
+            f"{'busy s':>9}{'starved s':>11}{'blocked s':>11}"
+            f"{'records/s':>13}"
+        ]
+        for stats in self.stats.values():
+            # over the run, not busy time: a stage working for microseconds
+            # would otherwise report rates far past the column
+            seconds = max(stats.busy, self.seconds)
+            rate = stats.records / seconds if seconds else 0.0
+            lines.append(
+                f"{stats.name:<11}{stats.pages:>6}{stats.records:>10}"
+                f"{stats.bytes / 2**20:>8.1f}{stats.busy:>9.2f}"
+                f"{stats.starved:>11.2f}{stats.blocked:>11.2f}"
+                f"{rate:>13,.0f}"
+            )
+        lines.append(
+            f"{self.records} records in {self.seconds:.2f}s, "
+            f"bottleneck: {self.bottleneck}"
+        )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,379 @@
+"""
+Profiling
+=========
+
+Opt-in CPU and allocation profiling of API calls.
+
+Every request is split into phases: ``auth`` (token checks and renewal),
+``headers`` (building the url, query and headers), ``schedule`` (waiting
+for a request slot), ``network`` (sending and receiving) and ``decode``
+(parsing the JSON body). Each phase is timed in wall and thread CPU time,
+and its net allocations are tracked with :mod:`tracemalloc`, attributed to
+the resource and operation it ran for.
+
+A sampling thread records the stack of each thread at a fixed interval,
+labelled with the thread's current phase, or ``app`` for the main thread
+outside a request. At exit, the samples are written in the collapsed
+stack format read by ``flamegraph.pl`` and speedscope, next to a top-N
+summary.
+
+Enable it with the PROFILE setting or ``HaloAPI(profile=True)``::
+
+    PROFILE=True python sync.py
+    flamegraph.pl halo_profile.collapsed > halo_profile.svg
+    less halo_profile.txt
+
+"""
+
+# python
+import atexit
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from time import perf_counter, thread_time
+from types import CodeType
+from typing import ContextManager, Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+PHASES: tuple[str, ...] = ("auth", "headers", "schedule", "network", "decode")
+"""Request phases, in the order they run"""
+
+MAX_DEPTH: int = 64
+"""Innermost frames kept per stack sample"""
+
+
+@lru_cache(maxsize=4096)
+def _frame_name(code: CodeType) -> str:
+    return (
+        f"{code.co_name} "
+        f"({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class Profiler:
+    """
+    Profiler
+    ========
+
+    Per-phase timings, allocations and stack samples of API calls.
+
+    Phase totals are exact: wall time, CPU time of the calling thread and
+    calls. Allocations are the change in traced memory while the phase
+    ran; with concurrent requests, other threads' allocations overlap and
+    the figures are approximate. The allocation sites in the report are
+    exact.
+
+    Example:
+    --------
+
+        >>> halo = HaloAPI(profile=True)
+        >>> halo.get_all("assets")
+        >>> print(halo.profiler.summary())
+        resource   operation  phase        calls   wall s    cpu s  ...
+        assets     page       network         21    14.20     0.61  ...
+        assets     page       decode          21     1.93     1.90  ...
+
+    """
+
+    INTERVAL: float = settings.PROFILE_INTERVAL
+    """Seconds between stack samples"""
+    MEMORY: bool = settings.PROFILE_MEMORY
+    """Track allocations with tracemalloc"""
+    OUTPUT: str = settings.PROFILE_OUTPUT
+    """Report path, without the extension"""
+    TOP: int = 20
+    """Rows in each table of the summary"""
+
+    def __init__(
+        self,
+        interval: float = INTERVAL,
+        memory: bool = MEMORY,
+        output: str = OUTPUT,
+        top: int = TOP,
+    ) -> None:
+        """__init__
+
+        Args:
+            interval (float, optional): Seconds between stack samples.
+            Defaults to PROFILE_INTERVAL.
+            memory (bool, optional): Track allocations with tracemalloc.
+            Defaults to PROFILE_MEMORY.
+            output (str, optional): Report path without the extension.
+            Defaults to PROFILE_OUTPUT.
+            top (int, optional): Rows in each table of the summary.
+            Defaults to 20.
+        """
+        self.interval: float = interval
+        self.memory: bool = memory
+        self.output: str = output
+        self.top: int = top
+        self._lock: threading.Lock = threading.Lock()
+        self._active: dict[int, tuple[str, str, str]] = {}
+        self._phases: dict[tuple[str, str, str], list[float]] = {}
+        self._samples: Counter = Counter()
+        self._main: int = threading.main_thread().ident
+        self._stopped: threading.Event = threading.Event()
+        self._sampler: threading.Thread = None
+        self._started_at: float = None
+        self._seconds: float = 0.0
+        self._baseline: tracemalloc.Snapshot = None
+        self._sites: list[tracemalloc.StatisticDiff] = []
+        self._own_tracing: bool = False
+        self._written: bool = False
+
+    @property
+    def running(self) -> bool:
+        """Whether stacks are being sampled."""
+        return self._sampler is not None
+
+    def start(self) -> None:
+        """start
+
+        Start tracing allocations and sampling stacks.
+        """
+        if self.running:
+            return
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+        if tracemalloc.is_tracing():
+            self._baseline = tracemalloc.take_snapshot()
+        self._stopped.clear()
+        self._started_at = perf_counter()
+        self._sampler = threading.Thread(
+            target=self._sample, name="halo-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """stop
+
+        Stop sampling and keep the allocation sites for the report.
+        """
+        if not self.running:
+            return
+        self._stopped.set()
+        self._sampler.join()
+        self._sampler = None
+        self._seconds += perf_counter() - self._started_at
+        if self._baseline is not None and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, __file__),
+                ]
+            )
+            self._sites = snapshot.compare_to(self._baseline, "lineno")
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    @contextmanager
+    def phase(
+        self, resource: str, operation: str, name: str
+    ) -> Iterator[None]:
+        """phase
+
+        Attribute the time and allocations of a ``with`` block to a phase
+        of a resource operation.
+
+        Args:
+            resource (str): The resource's name
+            operation (str): The API operation, e.g. "get" or "page"
+            name (str): The phase, one of PHASES
+        """
+        labels = (resource, operation, name)
+        thread = threading.get_ident()
+        outer = self._active.get(thread)
+        self._active[thread] = labels
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        cpu = thread_time()
+        wall = perf_counter()
+        try:
+            yield
+        finally:
+            wall = perf_counter() - wall
+            cpu = thread_time() - cpu
+            if tracing and tracemalloc.is_tracing():
+                memory = tracemalloc.get_traced_memory()[0] - memory
+            else:
+                memory = 0
+            if outer is None:
+                del self._active[thread]
+            else:
+                self._active[thread] = outer
+            with self._lock:
+                totals = self._phases.setdefault(labels, [0, 0.0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += wall
+                totals[2] += cpu
+                totals[3] += memory
+
+    def _stack(self, frame: object) -> tuple[str, ...]:
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            # leave out the profiler's own context manager frames
+            if frame.f_code.co_filename != __file__:
+                names.append(_frame_name(frame.f_code))
+            frame = frame.f_back
+        return tuple(reversed(names))
+
+    def _sample(self) -> None:
+        me = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            active = dict(self._active)
+            frames = sys._current_frames()
+            for thread, frame in frames.items():
+                labels = active.get(thread)
+                if labels is None and thread == self._main:
+                    labels = ("app",)
+                if labels is None or thread == me:
+                    continue
+                key = (*labels, *self._stack(frame))
+                with self._lock:
+                    self._samples[key] += 1
+            del frames
+
+    @property
+    def seconds(self) -> float:
+        """Seconds profiled so far."""
+        if self.running:
+            return self._seconds + perf_counter() - self._started_at
+        return self._seconds
+
+    def phases(self) -> dict[tuple[str, str, str], dict[str, float]]:
+        """phases
+
+        Totals per ``(resource, operation, phase)``: calls, wall and CPU
+        seconds, and net allocated bytes.
+        """
+        with self._lock:
+            return {
+                labels: {
+                    "calls": calls,
+                    "wall": wall,
+                    "cpu": cpu,
+                    "alloc_bytes": alloc,
+                }
+                for labels, (calls, wall, cpu, alloc) in self._phases.items()
+            }
+
+    def collapsed(self) -> list[str]:
+        """collapsed
+
+        Stack samples as ``label;frame;frame count`` lines, the input
+        format of flamegraph.pl.
+        """
+        with self._lock:
+            samples = sorted(self._samples.items())
+        return [f"{';'.join(stack)} {count}" for stack, count in samples]
+
+    def hot_functions(self) -> list[tuple[str, int]]:
+        """hot_functions
+
+        Functions by samples in which they were running (self samples).
+        """
+        functions = Counter()
+        with self._lock:
+            for stack, count in self._samples.items():
+                functions[stack[-1]] += count
+        return functions.most_common(self.top)
+
+    def allocation_sites(self) -> list[tracemalloc.StatisticDiff]:
+        """allocation_sites
+
+        Source lines holding the most memory allocated since
+        :func:`start`, available after :func:`stop`.
+        """
+        return self._sites[: self.top]
+
+    def summary(self) -> str:
+        """summary
+
+        The top-N report: phases by wall time, hottest functions and
+        largest allocation sites.
+        """
+        samples = sum(self._samples.values())
+        lines = [
+            f"Halo profile: {self.seconds:.1f}s, {samples} samples every "
+            f"{self.interval * 1000:g} ms",
+            "",
+            f"{'resource':<11}{'operation':<11}{'phase':<10}{'calls':>7}"
+            f"{'wall s':>9}{'cpu s':>9}{'alloc KiB':>11}",
+        ]
+        phases = sorted(
+            self.phases().items(), key=lambda item: -item[1]["wall"]
+        )
+        for (resource, operation, name), totals in phases[: self.top]:
+            lines.append(
+                f"{resource:<11}{operation:<11}{name:<10}"
+                f"{totals['calls']:>7}{totals['wall']:>9.2f}"
+                f"{totals['cpu']:>9.2f}{totals['alloc_bytes'] / 1024:>11.1f}"
+            )
+        lines += ["", "Hottest functions (self samples):"]
+        for name, count in self.hot_functions():
+            lines.append(f"{count / max(samples, 1):>7.1%}  {name}")
+        if self._sites:
+            lines += ["", "Largest allocation sites:"]
+            for site in self.allocation_sites():
+                frame = site.traceback[0]
+                lines.append(
+                    f"{site.size_diff / 1024:>9.1f} KiB  "
+                    f"{frame.filename}:{frame.lineno} "
+                    f"({site.count_diff:+} blocks)"
+                )
+        return "\n".join(lines) + "\n"
+
+    def write(self, output: str = None) -> tuple[str, str]:
+        """write
+
+        Stop profiling and write ``<output>.collapsed`` and
+        ``<output>.txt``.
+
+        Args:
+            output (str, optional): Report path without the extension.
+            Defaults to the profiler's output.
+
+        Returns:
+            tuple[str, str]: The collapsed stacks and summary files.
+        """
+        self.stop()
+        output = output or self.output
+        paths = (f"{output}.collapsed", f"{output}.txt")
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in self.collapsed())
+        with open(paths[1], "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        self._written = True
+        return paths
+
+    def write_at_exit(self) -> None:
+        """write_at_exit
+
+        Write the report when the interpreter exits.
+        """
+        atexit.register(self._exit)
+
+    def _exit(self) -> None:
+        if not self._written:
+            paths = self.write()
+            sys.stderr.write(f"halo_psa profile written to {paths[1]}\n")
+
+
+def phase(
+    profiler: Profiler | None, resource: str, operation: str, name: str
+) -> ContextManager[None]:
+    """phase
+
+    :func:`Profiler.phase`, or a no-op context without a profiler.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(resource, operation, name)
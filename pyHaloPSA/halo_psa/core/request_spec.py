@@ -0,0 +1,240 @@
+"""
+Request Spec
+============
+
+Immutable, precompiled request descriptions.
+
+A resource compiles its url and default query parameters once. Each call
+merges its overrides into a new spec instead of rebuilding and mutating
+dicts, and the query string is encoded when the spec is built rather
+than by the HTTP client on every send.
+
+"""
+
+# python
+import re
+from functools import lru_cache
+from typing import Iterable, Mapping
+from urllib.parse import quote_plus
+
+Items = tuple[tuple[str, str], ...]
+"""Sorted ``(name, value)`` string pairs"""
+
+Params = dict[str, tuple[str, str]]
+"""Query parameter names mapped to ``(value, encoded "name=value")``"""
+
+
+def _encode(value: any) -> str:
+    """_encode
+
+    A query or header value as sent on the wire.
+    """
+    return value if isinstance(value, str) else str(value)
+
+
+_SAFE = re.compile(r"[A-Za-z0-9_.~-]*").fullmatch
+"""Matches strings that url encoding leaves unchanged"""
+
+
+@lru_cache(maxsize=1024)
+def _quote_name(name: str) -> str:
+    return quote_plus(name)
+
+
+def _fragment(name: str, value: str) -> str:
+    """_fragment
+
+    ``name=value`` url encoded the way requests encodes query parameters.
+    """
+    if not _SAFE(value):
+        value = quote_plus(value)
+    return f"{_quote_name(name)}={value}"
+
+
+def _items(
+    data: Mapping[str, any] | Iterable[tuple[str, any]],
+) -> Iterable[tuple[str, any]]:
+    return data.items() if isinstance(data, Mapping) else data
+
+
+def freeze(
+    data: Mapping[str, any] | Iterable[tuple[str, any]] = None,
+) -> Items:
+    """freeze
+
+    Encode a mapping into sorted string pairs, leaving out ``None`` values.
+    """
+    if not data:
+        return ()
+    return tuple(
+        sorted((k, _encode(v)) for k, v in _items(data) if v is not None)
+    )
+
+
+def _merge_params(base: Params, overrides: Mapping[str, any]) -> Params:
+    """_merge_params
+
+    ``base`` updated with ``overrides``, encoding only the overrides. A
+    ``None`` override removes the name.
+    """
+    merged = dict(base)
+    for k, v in _items(overrides):
+        if v is None:
+            merged.pop(k, None)
+            continue
+        v = _encode(v)
+        merged[k] = (v, _fragment(k, v))
+    return merged
+
+
+def _merge_headers(
+    base: dict[str, str], overrides: Mapping[str, any]
+) -> dict[str, str]:
+    merged = dict(base)
+    for k, v in _items(overrides):
+        if v is None:
+            merged.pop(k, None)
+        else:
+            merged[k] = _encode(v)
+    return merged
+
+
+class RequestSpec:
+    """
+    RequestSpec
+    ===========
+
+    The url, query parameters and headers of a request, encoded once.
+
+    Specs are immutable and hashable, so they can be shared between
+    threads and used as cache keys. Two specs are equal when they would
+    send the same request. Merging overrides into a spec only encodes the
+    overridden values; the rest of the query is reused as encoded.
+
+    Example:
+    --------
+
+        >>> spec = RequestSpec(url, {"count": 5000, "search": None})
+        >>> spec.query
+        'count=5000'
+        >>> page = spec.merge({"page_no": 2})
+        >>> page.full_url
+        'https://halo.example.com/api/Asset?count=5000&page_no=2'
+        >>> spec.merge({}) is spec
+        True
+
+    """
+
+    __slots__ = ("url", "query", "full_url", "_params", "_headers", "_hash")
+
+    def __init__(
+        self,
+        url: str,
+        params: Mapping[str, any] | Items = None,
+        headers: Mapping[str, any] | Items = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            url (str): Request url without a query string.
+            params (Mapping[str, any] | Items, optional): Query parameters;
+            ``None`` values are left out.
+            headers (Mapping[str, any] | Items, optional): Request headers;
+            ``None`` values are left out.
+        """
+        self._set(
+            url,
+            _merge_params({}, params or {}),
+            _merge_headers({}, headers or {}),
+        )
+
+    def _set(self, url: str, params: Params, headers: dict[str, str]) -> None:
+        query = "&".join(params[k][1] for k in sorted(params))
+        values = {
+            "url": url,
+            "query": query,
+            "full_url": f"{url}?{query}" if query else url,
+            "_params": params,
+            "_headers": headers,
+            "_hash": None,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def _build(
+        cls, url: str, params: Params, headers: dict[str, str]
+    ) -> "RequestSpec":
+        spec = cls.__new__(cls)
+        spec._set(url, params, headers)
+        return spec
+
+    @property
+    def params(self) -> Items:
+        """Query parameters as sorted string pairs."""
+        return tuple(sorted((k, v) for k, (v, _) in self._params.items()))
+
+    @property
+    def headers(self) -> Items:
+        """Headers as sorted string pairs."""
+        return tuple(sorted(self._headers.items()))
+
+    def merge(
+        self,
+        params: Mapping[str, any] | Items = None,
+        headers: Mapping[str, any] | Items = None,
+    ) -> "RequestSpec":
+        """merge
+
+        A spec with ``params`` and ``headers`` overriding this one's.
+        A ``None`` value removes the name. Without overrides, the same
+        spec is returned.
+        """
+        if not params and not headers:
+            return self
+        return self._build(
+            self.url,
+            _merge_params(self._params, params) if params else self._params,
+            (
+                _merge_headers(self._headers, headers)
+                if headers
+                else self._headers
+            ),
+        )
+
+    def with_pk(self, pk: int) -> "RequestSpec":
+        """with_pk
+
+        A spec for a single record of the resource, without query
+        parameters.
+        """
+        return self._build(f"{self.url}/{pk}", {}, self._headers)
+
+    def header_dict(self, auth: Mapping[str, str] = None) -> dict[str, str]:
+        """header_dict
+
+        A new headers dict for sending, starting from ``auth``.
+        """
+        headers = dict(auth or {})
+        headers.update(self._headers)
+        return headers
+
+    def __setattr__(self, name: str, value: any) -> None:
+        raise AttributeError("RequestSpec is immutable")
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(
+                self, "_hash", hash((self.full_url, self.headers))
+            )
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RequestSpec):
+            return NotImplemented
+        return (
+            self.full_url == other.full_url and self._headers == other._headers
+        )
+
+    def __repr__(self) -> str:
+        return f"RequestSpec({self.full_url!r})"
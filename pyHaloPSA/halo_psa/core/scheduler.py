@@ -0,0 +1,257 @@
+"""
+Scheduler
+=========
+
+Share a client's request concurrency between interactive and bulk work.
+
+Every resource request takes a slot from a :class:`RequestScheduler`
+before it is sent. When a slot frees up it goes to the highest priority
+waiter that its lane and resource bulkheads allow, so a single lookup does
+not queue behind thousands of page fetches, while bulk work still uses
+whatever capacity is left.
+
+Priorities:
+-----------
+
+    interactive (0): User facing calls such as ``lookup``.
+    default (1): Single ``get`` calls.
+    bulk (2): Pagination and other background transfers.
+
+"""
+
+# python
+from contextlib import contextmanager
+from itertools import count
+from threading import Condition
+from time import monotonic
+from typing import Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+# local
+from .transport import TransportTimeout
+
+INTERACTIVE: int = 0
+DEFAULT: int = 1
+BULK: int = 2
+
+PRIORITIES: dict[str, int] = {
+    "interactive": INTERACTIVE,
+    "default": DEFAULT,
+    "bulk": BULK,
+}
+"""Priority names mapped to their lane"""
+
+
+def lane_of(priority: int | str) -> int:
+    """lane_of
+
+    Resolve a priority name or number to its lane.
+
+    Raises:
+        ValueError: Priority not in the priorities list
+    """
+    if isinstance(priority, str):
+        if priority.lower() not in PRIORITIES:
+            raise ValueError(
+                f"Priority ({priority}) not found",
+                f"options include: {list(PRIORITIES)}",
+            )
+        return PRIORITIES[priority.lower()]
+    return priority
+
+
+class RequestScheduler:
+    """
+    RequestScheduler
+    ================
+
+    Priority queue and concurrency bulkheads for resource requests.
+
+    Limits:
+    -------
+
+        max_concurrency: Requests in flight across all lanes.
+        lane_limits: Requests in flight per lane. By default the bulk lane
+        leaves ``reserved`` slots free for interactive and default calls.
+        resource_limits: Requests in flight per resource name.
+
+    Example:
+    --------
+
+        >>> scheduler = RequestScheduler(max_concurrency=8, reserved=2)
+        >>> with scheduler.slot("bulk", resource="assets"):
+        >>>     send_request()
+        >>> scheduler.stats()
+        {'active': 0, 'waiting': 0, 'lanes': {...}}
+
+    """
+
+    MAX_CONCURRENCY: int = settings.MAX_CONCURRENCY
+    """Requests in flight across all lanes"""
+    RESERVED: int = settings.INTERACTIVE_RESERVED
+    """Slots the bulk lane may never use"""
+    RESOURCE_LIMIT: int = settings.RESOURCE_CONCURRENCY
+    """Default requests in flight per resource (0 for no limit)"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        reserved: int = RESERVED,
+        lane_limits: dict[int | str, int] = None,
+        resource_limits: dict[str, int] = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            max_concurrency (int, optional): Requests in flight across all
+            lanes. Defaults to MAX_CONCURRENCY.
+            reserved (int, optional): Slots kept free of bulk requests.
+            Defaults to RESERVED.
+            lane_limits (dict[int | str, int], optional): Per lane limits,
+            overriding the limit derived from ``reserved``.
+            resource_limits (dict[str, int], optional): Per resource limits.
+            Resources without one use RESOURCE_LIMIT.
+        """
+        self.max_concurrency: int = max(max_concurrency, 1)
+        self.lane_limits: dict[int, int] = {
+            INTERACTIVE: self.max_concurrency,
+            DEFAULT: self.max_concurrency,
+            BULK: max(self.max_concurrency - reserved, 1),
+        }
+        for lane, limit in (lane_limits or {}).items():
+            self.lane_limits[lane_of(lane)] = limit
+        self.resource_limits: dict[str, int] = dict(resource_limits or {})
+        self._cond: Condition = Condition()
+        self._seq = count()
+        self._waiting: list[tuple[int, int, str]] = []
+        self._active: int = 0
+        self._lanes: dict[int, int] = dict.fromkeys(self.lane_limits, 0)
+        self._resources: dict[str, int] = {}
+        self._waited: dict[int, float] = dict.fromkeys(self.lane_limits, 0.0)
+        self._granted: dict[int, int] = dict.fromkeys(self.lane_limits, 0)
+
+    def _resource_limit(self, resource: str) -> int:
+        return self.resource_limits.get(resource, self.RESOURCE_LIMIT) or 0
+
+    def _allowed(self, lane: int, resource: str) -> bool:
+        if self._active >= self.max_concurrency:
+            return False
+        if self._lanes[lane] >= self.lane_limits[lane]:
+            return False
+        limit = self._resource_limit(resource)
+        return not limit or self._resources.get(resource, 0) < limit
+
+    def _turn(self, waiter: tuple[int, int, str]) -> bool:
+        """_turn
+
+        ``True`` if ``waiter`` is the first waiter, by priority then
+        arrival, that the limits allow to start.
+        """
+        for other in sorted(self._waiting):
+            if self._allowed(other[0], other[2]):
+                return other == waiter
+        return False
+
+    def acquire(
+        self,
+        priority: int | str = DEFAULT,
+        resource: str = None,
+        timeout: float = None,
+    ) -> None:
+        """acquire
+
+        Wait for a request slot.
+
+        Args:
+            priority (int | str, optional): The request's priority.
+            Defaults to DEFAULT.
+            resource (str, optional): The resource's name.
+            timeout (float, optional): Seconds to wait at most.
+
+        Raises:
+            TransportTimeout: No slot was free within ``timeout``.
+        """
+        lane = lane_of(priority)
+        waiter = (lane, next(self._seq), resource)
+        start = monotonic()
+        with self._cond:
+            self._waiting.append(waiter)
+            try:
+                while not self._turn(waiter):
+                    remaining = None
+                    if timeout is not None:
+                        remaining = timeout - (monotonic() - start)
+                        if remaining <= 0:
+                            raise TransportTimeout(
+                                "Timed out waiting for a request slot"
+                            )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(waiter)
+                # a different waiter may be first now
+                self._cond.notify_all()
+            self._active += 1
+            self._lanes[lane] += 1
+            self._resources[resource] = self._resources.get(resource, 0) + 1
+            self._waited[lane] += monotonic() - start
+            self._granted[lane] += 1
+
+    def release(
+        self, priority: int | str = DEFAULT, resource: str = None
+    ) -> None:
+        """release
+
+        Return a slot taken by :func:`acquire`.
+        """
+        lane = lane_of(priority)
+        with self._cond:
+            self._active -= 1
+            self._lanes[lane] -= 1
+            self._resources[resource] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(
+        self,
+        priority: int | str = DEFAULT,
+        resource: str = None,
+        timeout: float = None,
+    ) -> Iterator[None]:
+        """slot
+
+        Hold a request slot for the duration of a ``with`` block.
+        See :func:`acquire` for the arguments.
+        """
+        self.acquire(priority, resource, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority, resource)
+
+    def stats(self) -> dict[str, any]:
+        """stats
+
+        Current occupancy and, per lane, the slots granted and the average
+        seconds spent waiting for them.
+        """
+        names = {lane: name for name, lane in PRIORITIES.items()}
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": len(self._waiting),
+                "lanes": {
+                    names.get(lane, lane): {
+                        "active": self._lanes[lane],
+                        "limit": self.lane_limits[lane],
+                        "granted": self._granted[lane],
+                        "avg_wait": (
+                            self._waited[lane] / self._granted[lane]
+                            if self._granted[lane]
+                            else 0.0
+                        ),
+                    }
+                    for lane in self.lane_limits
+                },
+            }
@@ -0,0 +1,402 @@
+"""
+Snapshot
+========
+
+Compact binary snapshots of resource collections, opened with ``mmap``.
+
+A snapshot is written once and then opened read-only by any number of
+processes on the host. The operating system shares the file's pages
+between them, and records are read straight from the mapping, so opening
+a snapshot costs a header read regardless of its size.
+
+Layout:
+-------
+
+All numbers are little endian.
+
+    header: Magic, version, creation time and the offsets of the sections
+    below.
+    schema: One entry per field: name, type and column offset in a row.
+    offsets: ``(id, row offset)`` pairs sorted by id, for lookups by id.
+    rows: Fixed size rows, a null bitmap followed by one column per field.
+    Strings are stored as ``(offset, length)`` into the string table.
+    strings: Deduplicated UTF-8 strings.
+
+Snapshots are replaced atomically, so processes that still have the old
+file mapped keep reading a consistent copy.
+
+"""
+
+# python
+import mmap
+import os
+import struct
+import time
+from collections.abc import Mapping
+from typing import Iterable, Iterator
+
+MAGIC: bytes = b"HALOSNAP"
+"""First bytes of every snapshot file"""
+
+VERSION: int = 1
+"""Snapshot format version"""
+
+TYPES: dict[str, str] = {
+    "int": "q",
+    "float": "d",
+    "bool": "?",
+    "str": "II",
+}
+"""Field types mapped to their struct format"""
+
+BOOL_STRINGS: dict[str, bool] = {
+    "true": True,
+    "false": False,
+    "1": True,
+    "0": False,
+    "yes": True,
+    "no": False,
+    "": False,
+}
+"""Strings accepted for bool fields, mapped to their value"""
+
+_HEADER = struct.Struct("<8sHHIdQQQQQQQII")
+_FIELD = struct.Struct("<IIBI")
+_OFFSET = struct.Struct("<qQ")
+
+
+class _Strings:
+    """_Strings
+
+    Builds a deduplicated string table.
+    """
+
+    def __init__(self) -> None:
+        self.data: bytearray = bytearray()
+        self._seen: dict[str, tuple[int, int]] = {}
+
+    def add(self, value: str) -> tuple[int, int]:
+        ref = self._seen.get(value)
+        if ref is None:
+            raw = value.encode()
+            ref = self._seen[value] = (len(self.data), len(raw))
+            self.data += raw
+        return ref
+
+
+def _cast(kind: str, value: any) -> any:
+    if kind == "int":
+        return int(value)
+    if kind == "float":
+        return float(value)
+    if kind == "bool":
+        if isinstance(value, bytes):
+            value = value.decode()
+        if not isinstance(value, str):
+            return bool(value)
+        # bool("false") is True
+        flag = value.strip().lower()
+        if flag not in BOOL_STRINGS:
+            raise ValueError(
+                f"Boolean value ({value}) not recognised",
+                f"options include: {list(BOOL_STRINGS)}",
+            )
+        return BOOL_STRINGS[flag]
+    return value if isinstance(value, str) else str(value)
+
+
+def write_snapshot(
+    path: str,
+    resource: str,
+    records: Iterable[dict[str, any]],
+    fields: dict[str, str],
+    key: str = "id",
+    created_at: float = None,
+) -> int:
+    """write_snapshot
+
+    Write records to a snapshot file, replacing it atomically.
+
+    Args:
+        path (str): The snapshot file.
+        resource (str): The resource's name, stored in the header.
+        records (Iterable[dict[str, any]]): The records to store.
+        fields (dict[str, str]): Field names mapped to their type, one of
+        "int", "float", "bool" or "str". Other record fields are dropped.
+        key (str, optional): Integer field used by :func:`Snapshot.get`.
+        Defaults to "id".
+        created_at (float, optional): Unix time the records were fetched.
+        Defaults to now.
+
+    Raises:
+        ValueError: Field type not in the types list, or a bool field's
+        string is not in BOOL_STRINGS
+
+    Returns:
+        int: Size of the snapshot in bytes.
+    """
+    for name, kind in fields.items():
+        if kind not in TYPES:
+            raise ValueError(
+                f"Field type ({kind}) of {name} not found",
+                f"options include: {list(TYPES)}",
+            )
+    names = list(fields)
+    null_bytes = (len(names) + 7) // 8
+    row = struct.Struct(
+        f"<{null_bytes}s" + "".join(TYPES[fields[n]] for n in names)
+    )
+    strings = _Strings()
+    rows = bytearray()
+    keys: list[tuple[int, int]] = []
+    for record in records:
+        nulls = bytearray(null_bytes)
+        values = []
+        for i, name in enumerate(names):
+            kind = fields[name]
+            value = record.get(name)
+            if value is None:
+                nulls[i // 8] |= 1 << i % 8
+                values.extend((0, 0) if kind == "str" else (0,))
+                continue
+            value = _cast(kind, value)
+            values.extend(strings.add(value) if kind == "str" else (value,))
+        if record.get(key) is not None:
+            keys.append((int(record[key]), len(rows)))
+        rows += row.pack(bytes(nulls), *values)
+    count = len(rows) // row.size if row.size else 0
+
+    schema = bytearray()
+    column = null_bytes
+    for name in names:
+        kind = fields[name]
+        kind_no = list(TYPES).index(kind)
+        schema += _FIELD.pack(*strings.add(name), kind_no, column)
+        column += struct.calcsize(f"<{TYPES[kind]}")
+    name_ref = strings.add(resource)
+
+    schema_offset = _HEADER.size
+    offsets_offset = schema_offset + len(schema)
+    rows_offset = offsets_offset + len(keys) * _OFFSET.size
+    strings_offset = rows_offset + len(rows)
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(names),
+        null_bytes,
+        time.time() if created_at is None else created_at,
+        count,
+        row.size,
+        schema_offset,
+        offsets_offset,
+        len(keys),
+        rows_offset,
+        strings_offset,
+        *name_ref,
+    )
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(schema)
+        for pk, offset in sorted(keys):
+            f.write(_OFFSET.pack(pk, rows_offset + offset))
+        f.write(rows)
+        f.write(strings.data)
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+class SnapshotRecord(Mapping):
+    """
+    SnapshotRecord
+    ==============
+
+    A read-only view of one snapshot row. Fields are decoded from the
+    mapping when they are accessed.
+    """
+
+    __slots__ = ("_snapshot", "_offset")
+
+    def __init__(self, snapshot: "Snapshot", offset: int) -> None:
+        self._snapshot: Snapshot = snapshot
+        self._offset: int = offset
+
+    def __getitem__(self, name: str) -> any:
+        return self._snapshot._value(self._offset, name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot._fields)
+
+    def __len__(self) -> int:
+        return len(self._snapshot._fields)
+
+    def __repr__(self) -> str:
+        return f"SnapshotRecord({dict(self)})"
+
+
+class Snapshot:
+    """
+    Snapshot
+    ========
+
+    A snapshot file mapped read-only into memory.
+
+    Example:
+    --------
+
+        >>> with Snapshot("clients.halosnap") as clients:
+        >>>     clients.get(12)["name"]
+        >>>     clients.is_stale(3600)
+        'Acme Ltd'
+        False
+
+    """
+
+    def __init__(self, path: str) -> None:
+        """__init__
+
+        Args:
+            path (str): The snapshot file.
+
+        Raises:
+            ValueError: Not a snapshot file, or an unsupported version.
+        """
+        self.path: str = os.path.expanduser(path)
+        with open(self.path, "rb") as f:
+            self._mm: mmap.mmap = mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        try:
+            (
+                magic,
+                version,
+                field_count,
+                null_bytes,
+                self.created_at,
+                self._count,
+                self._row_size,
+                schema_offset,
+                self._offsets,
+                self._keys,
+                self._rows,
+                self._strings,
+                *name_ref,
+            ) = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC:
+                raise ValueError(f"Not a snapshot file ({path})")
+            if version != VERSION:
+                raise ValueError(
+                    f"Snapshot version ({version}) is not supported"
+                )
+            self.resource: str = self._string(*name_ref)
+            """Name of the snapshot's resource"""
+            kinds = list(TYPES)
+            self._fields: dict[str, tuple[int, str, int, struct.Struct]] = {}
+            for i in range(field_count):
+                name_off, name_len, kind, column = _FIELD.unpack_from(
+                    self._mm, schema_offset + i * _FIELD.size
+                )
+                self._fields[self._string(name_off, name_len)] = (
+                    i,
+                    kinds[kind],
+                    column,
+                    struct.Struct(f"<{TYPES[kinds[kind]]}"),
+                )
+        except struct.error as err:
+            self._mm.close()
+            raise ValueError(f"Not a snapshot file ({path})") from err
+        except BaseException:
+            # the mapping is not handed to anyone, so it is closed here
+            self._mm.close()
+            raise
+
+    @property
+    def fields(self) -> dict[str, str]:
+        """Field names mapped to their type."""
+        return {name: f[1] for name, f in self._fields.items()}
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot's records were fetched."""
+        return time.time() - self.created_at
+
+    def is_stale(self, max_age: float) -> bool:
+        """is_stale
+
+        ``True`` if the snapshot is older than ``max_age`` seconds.
+        """
+        return self.age > max_age
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings + offset
+        return str(self._mm[start : start + length], "utf-8")
+
+    def _value(self, row: int, name: str) -> any:
+        if name not in self._fields:
+            raise KeyError(name)
+        i, kind, column, fmt = self._fields[name]
+        if self._mm[row + i // 8] >> i % 8 & 1:
+            return None
+        value = fmt.unpack_from(self._mm, row + column)
+        if kind == "str":
+            return self._string(*value)
+        return value[0]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> SnapshotRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("snapshot index out of range")
+        return SnapshotRecord(self, self._rows + index * self._row_size)
+
+    def __iter__(self) -> Iterator[SnapshotRecord]:
+        for index in range(self._count):
+            yield SnapshotRecord(self, self._rows + index * self._row_size)
+
+    def get(self, pk: int) -> SnapshotRecord | None:
+        """get
+
+        Find a record by id with a binary search of the offsets table.
+
+        Returns:
+            SnapshotRecord | None: The record, or None when not found.
+        """
+        lo, hi = 0, self._keys
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key, offset = _OFFSET.unpack_from(
+                self._mm, self._offsets + mid * _OFFSET.size
+            )
+            if key == pk:
+                return SnapshotRecord(self, offset)
+            if key < pk:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def to_list(self) -> list[dict[str, any]]:
+        """to_list
+
+        Decode every record into a plain dict.
+        """
+        return [dict(record) for record in self]
+
+    def close(self) -> None:
+        """close
+
+        Unmap the file. Records read from it can no longer be used.
+        """
+        self._mm.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+"""
+Transform
+=========
+
+Run CPU heavy record transforms in worker processes while pages are still
+being fetched.
+
+Transforms are plain functions taking one record and returning the new
+record, or ``None`` to drop it. They run in a process pool, so they must
+be importable at module level (not lambdas or nested functions) and the
+records they return must be picklable.
+
+"""
+
+# python
+import os
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from typing import Callable, Iterable, Iterator
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+Transform = Callable[[dict[str, any]], dict[str, any] | None]
+"""A record transform: record in, new record (or None to drop it) out"""
+
+
+def _apply(
+    transforms: tuple[Transform, ...], records: list[dict[str, any]]
+) -> list[dict[str, any]]:
+    """_apply
+
+    Worker side: run every transform over a batch of records.
+    """
+    out = []
+    for record in records:
+        for transform in transforms:
+            record = transform(record)
+            if record is None:
+                break
+        else:
+            out.append(record)
+    return out
+
+
+def _batches(
+    pages: Iterable[list[dict]], batch_size: int = None
+) -> Iterator[list[dict]]:
+    """_batches
+
+    Split pages into batches of at most ``batch_size`` records, or pass
+    them through as they are.
+    """
+    for page in pages:
+        if not batch_size or len(page) <= batch_size:
+            yield page
+            continue
+        for start in range(0, len(page), batch_size):
+            yield page[start : start + batch_size]
+
+
+class TransformPool:
+    """
+    TransformPool
+    =============
+
+    Applies record transforms to pages of records in a process pool.
+
+    Each batch is sent to a worker as a single task, so records are
+    pickled once per batch rather than once per record. At most
+    ``max_pending`` batches are queued or running at a time; until one
+    finishes, the next page is not requested from the source, so a fast
+    fetch cannot pile up pages in memory ahead of the transforms.
+
+    Results are yielded in fetch order when ``ordered``, otherwise as soon
+    as each batch is done.
+
+    Example:
+    --------
+
+        >>> from myproject.assets import flatten, enrich
+        >>> with TransformPool([flatten, enrich], processes=4) as pool:
+        >>>     for batch in pool.map(Halo.iter_pages("assets")):
+        >>>         write(batch)
+
+    """
+
+    PROCESSES: int = settings.TRANSFORM_PROCESSES
+    """Worker processes (0 for one per CPU)"""
+
+    def __init__(
+        self,
+        transforms: Transform | Iterable[Transform],
+        processes: int = PROCESSES,
+        ordered: bool = True,
+        max_pending: int = None,
+        batch_size: int = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            transforms (Transform | Iterable[Transform]): A transform, or
+            transforms applied in order.
+            processes (int, optional): Worker processes, 0 for one per CPU.
+            Defaults to PROCESSES.
+            ordered (bool, optional): Yield batches in fetch order.
+            Defaults to True.
+            max_pending (int, optional): Batches queued or running at once.
+            Defaults to twice the number of processes.
+            batch_size (int, optional): Split pages into batches of at
+            most this many records, to spread large pages over more
+            workers. Defaults to one batch per page.
+        """
+        if callable(transforms):
+            transforms = (transforms,)
+        self.transforms: tuple[Transform, ...] = tuple(transforms)
+        self.processes: int = processes or os.cpu_count() or 1
+        self.ordered: bool = ordered
+        self.max_pending: int = max(max_pending or 2 * self.processes, 1)
+        self.batch_size: int = batch_size
+        self._executor: ProcessPoolExecutor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The worker pool, started on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.processes)
+        return self._executor
+
+    def _submit(self, batch: list[dict]) -> Future:
+        return self.executor.submit(_apply, self.transforms, batch)
+
+    def map(self, pages: Iterable[list[dict]]) -> Iterator[list[dict]]:
+        """map
+
+        Transform every page from ``pages``.
+
+        Args:
+            pages (Iterable[list[dict]]): Pages of records, e.g. from
+            ``HaloAPI.iter_pages``. It is consumed lazily.
+
+        Yields:
+            list[dict]: Transformed batches. Records dropped by a transform
+            are left out, so batches may be shorter than their pages.
+        """
+        pending: deque[Future] = deque()
+        batches = _batches(pages, self.batch_size)
+        try:
+            for batch in batches:
+                pending.append(self._submit(batch))
+                if len(pending) >= self.max_pending:
+                    yield from self._drain(pending, self.max_pending - 1)
+            yield from self._drain(pending, 0)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _drain(self, pending: deque[Future], keep: int) -> Iterator[list]:
+        """_drain
+
+        Yield finished batches until at most ``keep`` are pending.
+        """
+        while len(pending) > keep:
+            if self.ordered:
+                yield pending.popleft().result()
+                continue
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                yield future.result()
+
+    def close(self) -> None:
+        """close
+
+        Stop the worker processes.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "TransformPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,567 @@
+"""
+Transport
+=========
+
+HTTP backends used by :class:`HaloAuth` and :class:`BaseResource`.
+
+Available Transports:
+---------------------
+
+    http1 (RequestsTransport): HTTP/1.1 with a pooled ``requests.Session``.
+    http2 (HTTP2Transport): HTTP/2 with connection multiplexing, using
+    ``httpx``. Install with ``pip install "pyHaloPSA[http2]"``.
+    record (RecordingTransport): Saves traffic to a cassette file.
+    replay (ReplayTransport): Serves traffic from a cassette file.
+
+The transport is selected with the ``TRANSPORT`` setting, or by passing
+an instance to ``HaloAPI(transport=...)``.
+
+Compression:
+------------
+
+    When the ``COMPRESSION`` setting is on, transports ask for gzip and
+    deflate, plus brotli and zstd when ``brotli`` or ``zstandard`` are
+    installed. Bodies are decompressed as they stream in, and each
+    response reports its transferred size as ``wire_bytes``.
+"""
+
+# python
+import json
+import zlib
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Iterable
+
+# 3rd party
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+CHUNK_SIZE: int = 64 * 1024
+"""Bytes read from the network at a time"""
+
+_DECODE_ERRORS: tuple[type[Exception], ...] = (zlib.error,)
+if brotli is not None:
+    _DECODE_ERRORS += (brotli.error,)
+if zstandard is not None:
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+
+def _decompressor(encoding: str) -> object | None:
+    """_decompressor
+
+    A streaming decompressor for a Content-Encoding value, or ``None`` for
+    an identity (uncompressed) body.
+
+    Raises:
+        ContentEncodingError: The encoding is not supported.
+    """
+    if encoding in ("", "identity"):
+        return None
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return zlib.decompressobj()
+    if encoding == "br" and brotli is not None:
+        return brotli.Decompressor()
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ContentEncodingError(
+        f"Content-Encoding ({encoding}) is not supported"
+    )
+
+
+def accept_encoding() -> str:
+    """accept_encoding
+
+    The Accept-Encoding header value for the installed decompressors.
+    """
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def decode_stream(
+    chunks: Iterable[bytes], content_encoding: str = None
+) -> tuple[bytes, int]:
+    """decode_stream
+
+    Decompress a body as its chunks arrive.
+
+    Args:
+        chunks (Iterable[bytes]): Raw (still encoded) body chunks.
+        content_encoding (str, optional): The Content-Encoding header.
+
+    Raises:
+        ContentEncodingError: The encoding is not supported, or the body
+        is corrupt.
+
+    Returns:
+        tuple[bytes, int]: The decoded body and the raw byte count.
+    """
+    encodings = [
+        e.strip().lower()
+        for e in (content_encoding or "").split(",")
+        if e.strip()
+    ]
+    # encodings are listed in the order they were applied
+    decoders = [d for d in map(_decompressor, reversed(encodings)) if d]
+    wire_bytes = 0
+    parts: list[bytes] = []
+    try:
+        for chunk in chunks:
+            wire_bytes += len(chunk)
+            for decoder in decoders:
+                chunk = _feed(decoder, chunk)
+            parts.append(chunk)
+        for i, decoder in enumerate(decoders):
+            tail = _flush(decoder)
+            for later in decoders[i + 1 :]:
+                tail = _feed(later, tail)
+            parts.append(tail)
+    except _DECODE_ERRORS as err:
+        raise ContentEncodingError(
+            f"Body is not valid {content_encoding}: {err}"
+        ) from err
+    return b"".join(parts), wire_bytes
+
+
+def _feed(decoder: object, chunk: bytes) -> bytes:
+    if brotli is not None and isinstance(decoder, brotli.Decompressor):
+        return decoder.process(chunk)
+    return decoder.decompress(chunk)
+
+
+def _flush(decoder: object) -> bytes:
+    flush = getattr(decoder, "flush", None)
+    return flush() if flush is not None else b""
+
+
+class TransportError(Exception):
+    """
+    TransportError
+    ==============
+
+    A request could not be completed, e.g. the connection failed.
+    """
+
+    @property
+    def retryable(self) -> bool:
+        """retryable
+
+        ``True`` if sending the same request again may succeed.
+        """
+        return True
+
+
+class ContentEncodingError(TransportError):
+    """
+    ContentEncodingError
+    ====================
+
+    A response body could not be decompressed: its Content-Encoding is not
+    supported, or the body is corrupt. Not retried, since the same request
+    gets the same body.
+    """
+
+    @property
+    def retryable(self) -> bool:
+        return False
+
+
+class TransportTimeout(TransportError, TimeoutError):
+    """
+    TransportTimeout
+    ================
+
+    The server did not respond within the request's timeout.
+    """
+
+
+class HTTPStatusError(TransportError):
+    """
+    HTTPStatusError
+    ===============
+
+    The server answered with an error status code.
+
+    Attributes:
+
+        status_code (int): HTTP status code.
+        reason (str): HTTP reason phrase.
+        response (TransportResponse): The error response.
+
+    """
+
+    RETRY_STATUS: tuple[int, ...] = (408, 429, 500, 502, 503, 504)
+    """Status codes worth retrying"""
+
+    def __init__(self, response: "TransportResponse") -> None:
+        super().__init__(f"{response.status_code}: {response.reason}")
+        self.status_code: int = response.status_code
+        self.reason: str = response.reason
+        self.response: TransportResponse = response
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in self.RETRY_STATUS
+
+
+class TransportResponse:
+    """
+    TransportResponse
+    =================
+
+    The transport independent result of a request.
+
+    Attributes:
+
+        status_code (int): HTTP status code.
+        reason (str): HTTP reason phrase.
+        headers (dict[str, str]): Response headers with lowercase names.
+        content (bytes): The response body.
+        elapsed (float): Seconds from sending the request to reading the body.
+        http_version (str): Protocol used for the request.
+        wire_bytes (int): Body bytes as transferred, before decompression.
+
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        reason: str,
+        headers: dict[str, str],
+        content: bytes,
+        elapsed: float = 0.0,
+        http_version: str = "HTTP/1.1",
+        wire_bytes: int = None,
+    ) -> None:
+        self.status_code: int = status_code
+        self.reason: str = reason
+        self.headers: dict[str, str] = {
+            k.lower(): v for k, v in headers.items()
+        }
+        self.content: bytes = content
+        self.elapsed: float = elapsed
+        self.http_version: str = http_version
+        self.wire_bytes: int = (
+            len(content) if wire_bytes is None else wire_bytes
+        )
+
+    @property
+    def ok(self) -> bool:
+        """ok
+
+        ``True`` if the status code is below 400.
+        """
+        return self.status_code < 400
+
+    def json(self) -> any:
+        """json
+
+        Decode the response body as JSON.
+        """
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        """raise_for_status
+
+        Raises:
+            HTTPStatusError: The status code is 400 or above.
+        """
+        if not self.ok:
+            raise HTTPStatusError(self)
+
+
+class BaseTransport:
+    """
+    BaseTransport
+    =============
+
+    Interface for an HTTP backend. Subclasses implement :func:`request`.
+    """
+
+    NAME: str = ...
+    """Name of the transport used by the TRANSPORT setting"""
+
+    POOL_SIZE: int = settings.POOL_SIZE
+    """Maximum number of pooled connections per host"""
+
+    COMPRESSION: bool = settings.COMPRESSION
+    """Whether to ask the server for compressed responses"""
+
+    def _headers(self, headers: dict[str, str] = None) -> dict[str, str]:
+        """_headers
+
+        Request headers with Accept-Encoding negotiated for the transport.
+        """
+        headers = dict(headers or {})
+        if not any(k.lower() == "accept-encoding" for k in headers):
+            headers["Accept-Encoding"] = (
+                accept_encoding() if self.COMPRESSION else "identity"
+            )
+        return headers
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        data: dict[str, any] = None,
+        timeout: float = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        """request
+
+        Send a request and read the full response.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request url.
+            headers (dict[str, str], optional): Request headers.
+            params (dict[str, any], optional): Query parameters.
+            data (dict[str, any], optional): Form encoded body.
+            timeout (float, optional): Seconds to wait for the server.
+            on_headers (Callable[[dict[str, str]], None], optional): Called
+            with the response headers, names in lowercase, before the body
+            is read.
+
+        Returns:
+            TransportResponse: The response.
+        """
+        raise NotImplementedError
+
+    def get(self, url: str, **kwargs) -> TransportResponse:
+        """Send a GET request."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> TransportResponse:
+        """Send a POST request."""
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        """Release pooled connections."""
+
+
+class RequestsTransport(BaseTransport):
+    """
+    RequestsTransport
+    =================
+
+    HTTP/1.1 transport backed by a pooled :class:`requests.Session`.
+    Each concurrent request uses its own keep-alive connection.
+    """
+
+    NAME: str = "http1"
+
+    def __init__(self, pool_size: int = BaseTransport.POOL_SIZE) -> None:
+        self.pool_size: int = pool_size
+        self.session: requests.Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        data: dict[str, any] = None,
+        timeout: float = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        start = perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                headers=self._headers(headers),
+                params=params,
+                data=data,
+                timeout=timeout,
+                stream=True,
+            )
+            try:
+                if on_headers is not None:
+                    on_headers(
+                        {k.lower(): v for k, v in response.headers.items()}
+                    )
+                content, wire_bytes = decode_stream(
+                    response.raw.stream(CHUNK_SIZE, decode_content=False),
+                    response.headers.get("Content-Encoding"),
+                )
+            finally:
+                response.close()
+        except (requests.Timeout, urllib3.exceptions.TimeoutError) as err:
+            raise TransportTimeout(str(err)) from err
+        except (
+            requests.RequestException,
+            urllib3.exceptions.HTTPError,
+        ) as err:
+            raise TransportError(str(err)) from err
+        return TransportResponse(
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=response.headers,
+            content=content,
+            elapsed=perf_counter() - start,
+            wire_bytes=wire_bytes,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HTTP2Transport(BaseTransport):
+    """
+    HTTP2Transport
+    ==============
+
+    HTTP/2 transport backed by :class:`httpx.Client`. Concurrent requests to
+    the same host are multiplexed over a small number of connections.
+
+    Raises:
+        ImportError: ``httpx`` with HTTP/2 support is not installed.
+    """
+
+    NAME: str = "http2"
+
+    def __init__(
+        self,
+        pool_size: int = BaseTransport.POOL_SIZE,
+        verify: bool = True,
+    ) -> None:
+        if httpx is None:
+            raise ImportError(
+                "The http2 transport requires httpx.",
+                'Install it with: pip install "pyHaloPSA[http2]"',
+            )
+        self.pool_size: int = pool_size
+        self.client: httpx.Client = httpx.Client(
+            http2=True,
+            verify=verify,
+            limits=httpx.Limits(max_connections=pool_size),
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        data: dict[str, any] = None,
+        timeout: float = None,
+        on_headers: Callable[[dict[str, str]], None] = None,
+    ) -> TransportResponse:
+        start = perf_counter()
+        try:
+            with self.client.stream(
+                method,
+                url,
+                headers=self._headers(headers),
+                params=params,
+                data=data,
+                timeout=timeout,
+            ) as response:
+                if on_headers is not None:
+                    on_headers(
+                        {k.lower(): v for k, v in response.headers.items()}
+                    )
+                content, wire_bytes = decode_stream(
+                    response.iter_raw(CHUNK_SIZE),
+                    response.headers.get("Content-Encoding"),
+                )
+        except httpx.TimeoutException as err:
+            raise TransportTimeout(str(err)) from err
+        except httpx.HTTPError as err:
+            raise TransportError(str(err)) from err
+        return TransportResponse(
+            status_code=response.status_code,
+            reason=response.reason_phrase,
+            headers=response.headers,
+            content=content,
+            elapsed=perf_counter() - start,
+            http_version=response.http_version,
+            wire_bytes=wire_bytes,
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+
+TRANSPORTS: dict[str, type[BaseTransport]] = {
+    RequestsTransport.NAME: RequestsTransport,
+    HTTP2Transport.NAME: HTTP2Transport,
+}
+"""Available transports by name"""
+
+_default: BaseTransport = None
+_default_lock: Lock = Lock()
+
+
+def register_transport(cls: type[BaseTransport]) -> type[BaseTransport]:
+    """register_transport
+
+    Make a transport class available by its ``NAME``. Usable as a class
+    decorator.
+    """
+    TRANSPORTS[cls.NAME] = cls
+    return cls
+
+
+def get_transport(name: str = settings.TRANSPORT, **options) -> BaseTransport:
+    """get_transport
+
+    Create a new transport by name.
+
+    Args:
+        name (str, optional): A key of ``TRANSPORTS``.
+        Defaults to the TRANSPORT setting.
+
+    Raises:
+        ValueError: Transport not in the transports list
+
+    Returns:
+        BaseTransport: The new transport.
+    """
+    if name.lower() not in TRANSPORTS:
+        raise ValueError(
+            f"Transport ({name}) not found",
+            f"options include: {list(TRANSPORTS)}",
+        )
+    return TRANSPORTS[name.lower()](**options)
+
+
+def default_transport() -> BaseTransport:
+    """default_transport
+
+    The process wide transport shared by objects created without one.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = get_transport()
+        return _default
@@ -0,0 +1,227 @@
+"""
+Tuning
+======
+
+Learn a page size per resource from how its pages actually behave.
+"""
+
+# python
+import json
+import os
+from threading import Lock
+
+# Py-HaloPSA
+from halo_psa.config import settings
+
+PAGING_PARAMS: tuple[str, ...] = ("pageinate", "page_size", "page_no")
+"""Query parameters that do not change what a record costs to fetch"""
+
+
+def floor_pow2(n: float) -> int:
+    """floor_pow2
+
+    The largest power of two not above ``n`` (at least 1).
+    """
+    return 1 << max(int(n), 1).bit_length() - 1
+
+
+class PageSizeTuner:
+    """
+    PageSizeTuner
+    =============
+
+    Adjusts the page size of each resource so a page takes about
+    ``target_seconds`` to fetch and stays below ``max_bytes``.
+
+    After every page, a latency model (fixed cost per request plus cost
+    per record) is fitted to the most recent pages, bytes per record are
+    folded into a moving average, and the next size is chosen from them.
+    A failed page halves the size, and a high error rate keeps the size
+    further below target. Sizes are powers of two, so a paginator can
+    change size between pages without skipping or repeating records. Each
+    resource is tuned separately per filter set, because flags such as
+    ``includedetails`` change the cost of a record.
+
+    Learned sizes are saved to ``path`` and reused by later runs.
+
+    Example:
+    --------
+
+        >>> tuner = PageSizeTuner()
+        >>> key = tuner.key("assets", {"includedetails": True})
+        >>> tuner.suggest(key, 5000)
+        4096
+        >>> tuner.observe(key, 4096, 4096, seconds=6.5, body_bytes=21_000_000)
+        >>> tuner.suggest(key, 5000)
+        2048
+
+    """
+
+    TARGET_SECONDS: float = settings.PAGE_TARGET_SECONDS
+    """Per-page latency to aim for"""
+    MAX_BYTES: int = settings.PAGE_MAX_BYTES
+    """Largest page body to aim for"""
+    MIN_SIZE: int = 16
+    """Smallest page size"""
+    MAX_SIZE: int = 8192
+    """Largest page size"""
+    SMOOTHING: float = 0.3
+    """Weight of the newest observation in the moving averages"""
+    WINDOW: int = 8
+    """Recent pages used to fit the latency model"""
+
+    def __init__(
+        self,
+        path: str = settings.PAGE_TUNING_FILE,
+        target_seconds: float = TARGET_SECONDS,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        """__init__
+
+        Args:
+            path (str, optional): JSON file with learned sizes, or ``None``
+            to keep them in memory only. Defaults to PAGE_TUNING_FILE.
+            target_seconds (float, optional): Per-page latency target.
+            Defaults to TARGET_SECONDS.
+            max_bytes (int, optional): Per-page body size limit.
+            Defaults to MAX_BYTES.
+        """
+        self.path: str = os.path.expanduser(path) if path else None
+        self.target_seconds: float = target_seconds
+        self.max_bytes: int = max_bytes
+        self._lock: Lock = Lock()
+        self._dirty: bool = False
+        self._state: dict[str, dict[str, float]] = self._load()
+
+    @staticmethod
+    def key(resource: str, params: dict[str, any] = None) -> str:
+        """key
+
+        Tuning key for a resource and its (non-paging) query parameters.
+        """
+        filters = sorted(
+            f"{k}={v}"
+            for k, v in (params or {}).items()
+            if k not in PAGING_PARAMS and v is not None
+        )
+        return "&".join([resource.lower(), *filters])
+
+    def _clamp(self, size: float) -> int:
+        size = min(max(size, self.MIN_SIZE), self.MAX_SIZE)
+        return floor_pow2(size)
+
+    def suggest(self, key: str, default: int) -> int:
+        """suggest
+
+        The page size to use next for ``key``.
+
+        Args:
+            key (str): A key from :func:`key`.
+            default (int): Size to start from when nothing is learned yet.
+
+        Returns:
+            int: A power of two page size.
+        """
+        with self._lock:
+            state = self._state.get(key)
+            if state is None:
+                return self._clamp(default)
+            return int(state["size"])
+
+    def observe(
+        self,
+        key: str,
+        size: int,
+        records: int,
+        seconds: float,
+        body_bytes: int,
+        error: bool = False,
+    ) -> None:
+        """observe
+
+        Learn from one page request.
+
+        Args:
+            key (str): A key from :func:`key`.
+            size (int): The requested page size.
+            records (int): Records returned.
+            seconds (float): Time taken by the request.
+            body_bytes (int): Decoded body size.
+            error (bool, optional): The request failed. Defaults to False.
+        """
+        a = self.SMOOTHING
+        with self._lock:
+            state = self._state.setdefault(
+                key, {"size": self._clamp(size), "error_rate": 0.0}
+            )
+            state["error_rate"] = (1 - a) * state["error_rate"] + a * error
+            self._dirty = True
+            if error:
+                state["size"] = self._clamp(size // 2)
+                return
+            if records <= 0:
+                return
+            samples = state.setdefault("samples", [])
+            samples.append([records, seconds])
+            del samples[: -self.WINDOW]
+            value = body_bytes / records
+            old = state.get("bytes_per_record", value)
+            state["bytes_per_record"] = (1 - a) * old + a * value
+            overhead, per_record = self._fit(samples)
+            # when the fixed cost alone is near the target, larger pages
+            # are the only way to amortize it
+            budget = max(self.target_seconds - overhead, overhead)
+            ideal = min(
+                budget / per_record,
+                self.max_bytes / max(state["bytes_per_record"], 1.0),
+            )
+            ideal *= 1 - state["error_rate"]
+            # move at most one power of two per page
+            state["size"] = self._clamp(min(max(ideal, size / 2), size * 2))
+
+    @staticmethod
+    def _fit(samples: list[list[float]]) -> tuple[float, float]:
+        """_fit
+
+        Least squares fit of ``seconds = overhead + per_record * records``
+        over recent samples. With a single page size observed, the whole
+        latency is attributed to the records.
+
+        Returns:
+            tuple[float, float]: Fixed seconds per request and seconds per
+            record.
+        """
+        n = len(samples)
+        mean_x = sum(x for x, _ in samples) / n
+        mean_y = sum(y for _, y in samples) / n
+        var = sum((x - mean_x) ** 2 for x, _ in samples)
+        if var:
+            cov = sum((x - mean_x) * (y - mean_y) for x, y in samples)
+            slope = cov / var
+            if slope > 0:
+                return max(mean_y - slope * mean_x, 0.0), slope
+        return 0.0, max(mean_y / mean_x, 1e-9)
+
+    def _load(self) -> dict[str, dict[str, float]]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """save
+
+        Write learned sizes to ``path`` if anything changed.
+        """
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._state, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
@@ -0,0 +1,271 @@
+"""
+Window Scan
+===========
+
+Read a date range of a resource in concurrent time windows.
+
+A single listing stops at HaloPSA's record count cap, and paging through a
+large resource is one page after another. A window scan instead splits a
+date range into windows filtered with ``startdate``, ``enddate`` and
+``datesearch``, each small enough to come back in one request, and fetches
+several windows at once. Windows are yielded in date order, so the records
+stream in order while later windows are still in flight.
+
+Window lengths come from the record density: one request with a page of one
+record reports how many records fall in the whole range, and windows are
+sized to hold ``target`` records at that rate. The rate is updated from
+each window read, so busy periods get shorter windows; a window that still
+holds more than one request can return is split in half until it fits.
+
+"""
+
+# python
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import sleep
+from typing import Callable, Iterator
+
+# local
+from .base_resource import BaseResource
+from .deadline import Deadline
+from .profiling import phase
+from .request_spec import RequestSpec
+from .scheduler import BULK
+from .transport import TransportError
+
+
+def _moment(value: datetime | str) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(value.rstrip("Z")).replace(tzinfo=None)
+
+
+def _stamp(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+class WindowScan:
+    """
+    WindowScan
+    ==========
+
+    Yields the records of a resource between ``start`` and ``end``, one
+    time window at a time, in date order. Each window covers
+    ``[start, end)`` of the resource's ``DATE_FIELD``; records on a
+    boundary belong to the later window, so none is read twice.
+
+    Up to ``concurrency`` windows are fetched at once. A window whose
+    record count is above what one request returns is split in half, down
+    to ``MIN_WINDOW``; a window that cannot be split further is paged
+    through. Failed requests are retried like :class:`Paginator` pages.
+
+    Example:
+    --------
+
+        >>> scan = halo.scan("tickets", "2025-01-01", "2026-01-01")
+        >>> for window in scan:
+        >>>     write(window)
+        >>> scan.record_count, scan.windows, scan.splits
+        (118204, 31, 2)
+
+    """
+
+    RETRIES: int = 2
+    """Times a failed window request is retried"""
+    BACKOFF: float = 0.5
+    """Seconds to wait before the first retry, doubled for each retry"""
+    CAP: int = 5000
+    """Records one request returns, for resources without a COUNT"""
+    FILL: float = 0.8
+    """Share of the cap a window is sized to hold"""
+    MIN_WINDOW: timedelta = timedelta(minutes=1)
+    """Shortest window; shorter ones are paged through instead of split"""
+    SMOOTHING: float = 0.3
+    """Weight of the newest window in the record rate"""
+
+    def __init__(
+        self,
+        resource: BaseResource,
+        auth: Callable[[], dict[str, str]],
+        start: datetime | str,
+        end: datetime | str,
+        field: str = None,
+        headers: dict[str, str] = None,
+        params: dict[str, any] = None,
+        concurrency: int = 4,
+        target: int = None,
+        priority: int | str = BULK,
+        deadline: Deadline = None,
+    ) -> None:
+        """__init__
+
+        Args:
+            resource (BaseResource): The resource to scan.
+            auth (Callable[[], dict[str, str]]): Returns current
+            authorization headers; it is called before every request.
+            start (datetime | str): Start of the range, inclusive.
+            end (datetime | str): End of the range, exclusive.
+            field (str, optional): The date field windows filter on.
+            Defaults to the resource's DATE_FIELD.
+            headers (dict[str, str], optional): Request headers.
+            params (dict[str, any], optional): Request query parameters,
+            overriding the resource's LIST_PARAMS. ``None`` removes one.
+            concurrency (int, optional): Windows fetched at once.
+            Defaults to 4.
+            target (int, optional): Records a window is sized to hold.
+            Defaults to FILL of the resource's COUNT, or of CAP.
+            priority (int | str, optional): Scheduling priority of the
+            requests. Defaults to BULK.
+            deadline (Deadline, optional): Time budget of the whole scan.
+            When it runs out, iteration stops with
+            :class:`DeadlineExceeded` after the windows already yielded.
+            Defaults to None.
+
+        Raises:
+            ValueError: The resource has no date field, or the range is
+            empty.
+        """
+        self.resource: BaseResource = resource
+        self.auth: Callable[[], dict[str, str]] = auth
+        self.field: str = field or resource.DATE_FIELD
+        if not self.field:
+            raise ValueError(
+                f"Resource ({resource.RESOURCE_NAME}) has no date field",
+                "pass field= or set the resource's DATE_FIELD",
+            )
+        self.start: datetime = _moment(start)
+        self.end: datetime = _moment(end)
+        if self.end <= self.start:
+            raise ValueError(
+                f"Date range ({start} - {end}) is empty",
+                "end must come after start",
+            )
+        self.cap: int = getattr(resource, "COUNT", 0) or self.CAP
+        self.target: int = target or max(int(self.cap * self.FILL), 1)
+        self.concurrency: int = max(concurrency, 1)
+        self.priority: int | str = priority
+        self.deadline: Deadline = deadline
+        self.spec: RequestSpec = resource.list_spec.merge(
+            params={**(params or {}), "datesearch": self.field},
+            headers=headers,
+        )
+        self.rate: float = None
+        """Records per second of the range, updated after each window"""
+        self.record_count: int = None
+        """Records in the whole range, reported by the first request"""
+        self.windows: int = 0
+        """Windows read so far, after splits"""
+        self.splits: int = 0
+        """Windows split because they held too many records"""
+        self.requests: int = 0
+        """Requests made so far"""
+        self.records: int = 0
+        """Records read so far"""
+
+    def _fetch(
+        self, start: datetime, end: datetime, page_no: int, size: int
+    ) -> tuple[list[dict], int | None]:
+        resource = self.resource
+        attempt = 0
+        while True:
+            try:
+                with phase(
+                    resource.profiler, resource.RESOURCE_NAME, "page", "auth"
+                ):
+                    auth = self.auth()
+                self.requests += 1
+                records, total, _ = resource.get_page(
+                    auth=auth,
+                    page_no=page_no,
+                    page_size=size,
+                    priority=self.priority,
+                    spec=self.spec.merge(
+                        {"startdate": _stamp(start), "enddate": _stamp(end)}
+                    ),
+                    deadline=self.deadline,
+                )
+                return records, total
+            except TransportError as err:
+                if not err.retryable or attempt >= self.RETRIES:
+                    raise
+                seconds = self.BACKOFF * 2**attempt
+                if self.deadline is None:
+                    sleep(seconds)
+                else:
+                    self.deadline.sleep(
+                        seconds, f"retry {attempt + 1} of a window"
+                    )
+                attempt += 1
+
+    def _window(self, start: datetime, end: datetime) -> list[dict]:
+        """_window
+
+        The records of ``[start, end)`` in date order, splitting the window
+        or paging through it when one request cannot return them all.
+        """
+        records, total = self._fetch(start, end, 1, self.cap)
+        truncated = total is not None and total > len(records)
+        if truncated and end - start >= 2 * self.MIN_WINDOW:
+            self.splits += 1
+            middle = start + (end - start) / 2
+            return self._window(start, middle) + self._window(middle, end)
+        page_no = 1
+        while truncated and len(records) == self.cap * page_no:
+            page_no += 1
+            page, _ = self._fetch(start, end, page_no, self.cap)
+            records.extend(page)
+        self.windows += 1
+        low, high = _stamp(start), _stamp(end)
+        field = self.field
+        records = [
+            record
+            for record in records
+            if low <= str(record.get(field) or "")[:19] < high
+        ]
+        records.sort(key=lambda record: (record[field], record.get("id", 0)))
+        return records
+
+    def _length(self) -> timedelta:
+        if not self.rate:
+            return self.end - self.start
+        return max(timedelta(seconds=self.target / self.rate), self.MIN_WINDOW)
+
+    def _observe(self, start: datetime, end: datetime, count: int) -> None:
+        rate = count / max((end - start).total_seconds(), 1.0)
+        self.rate = self.SMOOTHING * rate + (1 - self.SMOOTHING) * self.rate
+
+    def __iter__(self) -> Iterator[list[dict]]:
+        seconds = (self.end - self.start).total_seconds()
+        _, self.record_count = self._fetch(self.start, self.end, 1, 1)
+        if self.record_count == 0:
+            return
+        self.rate = (self.record_count or self.target) / seconds
+        cursor = self.start
+        pending: deque[tuple[datetime, datetime, Future]] = deque()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            try:
+                while True:
+                    while cursor < self.end and len(pending) < (
+                        self.concurrency
+                    ):
+                        end = min(cursor + self._length(), self.end)
+                        pending.append(
+                            (
+                                cursor,
+                                end,
+                                pool.submit(self._window, cursor, end),
+                            )
+                        )
+                        cursor = end
+                    if not pending:
+                        return
+                    start, end, future = pending.popleft()
+                    records = future.result()
+                    self._observe(start, end, len(records))
+                    self.records += len(records)
+                    if records:
+                        yield records
+            finally:
+                for _, _, future in pending:
+                    future.cancel()
@@ -0,0 +1,41 @@
+"""
+Test configuration
+==================
+
+Starts the mock HaloPSA server used by the tests before the package is
+imported, since its settings are read at import time. Learned page sizes,
+plans, snapshots, history and sync files go to a temporary directory.
+"""
+
+# python
+import os
+import sys
+import tempfile
+
+# 3rd party
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# local
+from benchmarks.mock_halo import MockHaloServer  # noqa: E402
+
+SERVER: MockHaloServer = MockHaloServer().start()
+CACHE: str = tempfile.mkdtemp(prefix="halo_psa_tests_")
+os.environ.update(
+    BASE_URL=SERVER.url,
+    TENANT="test",
+    CLIENT_ID="test",
+    CLIENT_SECRET="test",
+    PAGE_TUNING_FILE=os.path.join(CACHE, "page_sizes.json"),
+    PLAN_HISTORY_FILE=os.path.join(CACHE, "plans.json"),
+    SNAPSHOT_DIR=os.path.join(CACHE, "snapshots"),
+    HISTORY_PATH=os.path.join(CACHE, "history.db"),
+    SYNC_DIR=os.path.join(CACHE, "sync"),
+)
+
+
+@pytest.fixture
+def server() -> MockHaloServer:
+    """The mock HaloPSA server the settings point at."""
+    return SERVER
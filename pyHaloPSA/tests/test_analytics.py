@@ -0,0 +1,70 @@
+# python
+from collections import Counter
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import ColumnTable
+
+pytest.importorskip("numpy")
+
+FIELDS = {"id": "int", "name": "str", "score": "float", "flag": "bool"}
+RECORDS = [
+    {"id": 1, "name": "b", "score": 2.0, "flag": True},
+    {"id": 2, "name": "a", "score": None, "flag": False},
+    {"id": 3, "name": None, "score": 4.0, "flag": True},
+    {"id": 4, "name": "b", "score": 6.0, "flag": None},
+]
+
+
+@pytest.fixture(scope="module")
+def assets() -> list[dict]:
+    return MockHalo({"assets": 2000}).records["assets"]
+
+
+def test_count_by_matches_python(server, assets):
+    server.halo.records = {"assets": assets}
+    table = HaloAPI().table("assets", concurrency=4)
+    assert len(table) == 2000
+    names = Counter(a["client_name"] for a in assets)
+    assert table.count_by("client_name") == dict(sorted(names.items()))
+    # ties keep key order
+    top = sorted(names.items(), key=lambda item: (-item[1], item[0]))[:3]
+    assert table.count_by("client_name", top=3) == dict(top)
+    pairs = Counter((a["supplier_id"], a["inactive"]) for a in assets)
+    assert table.count_by("supplier_id", "inactive") == dict(
+        sorted(pairs.items())
+    )
+
+
+def test_filter_matches_python(assets):
+    table = ColumnTable.from_records(
+        assets, {"client_id": "int", "site_name": "str", "inactive": "bool"}
+    )
+    wanted = [
+        a for a in assets if a["client_id"] in (4, 12) and not a["inactive"]
+    ]
+    active = table.filter(client_id=[4, 12], inactive=False)
+    assert len(active) == len(wanted)
+    assert active.count_by("site_name") == dict(
+        sorted(Counter(a["site_name"] for a in wanted).items())
+    )
+    by_mask = table.filter(table["site_name"] == "Site 3")
+    assert len(by_mask) == sum(a["site_name"] == "Site 3" for a in assets)
+
+
+def test_missing_values_group_under_none():
+    table = ColumnTable.from_records(RECORDS, FIELDS)
+    assert table.count_by("name") == {None: 1, "a": 1, "b": 2}
+    assert table.count_by("flag") == {None: 1, False: 1, True: 2}
+    assert len(table.filter(name=None)) == 1
+    assert table.aggregate("name", column="score", how="sum") == {
+        None: 4.0,
+        "a": 0.0,
+        "b": 8.0,
+    }
+    assert table.unique("name") == ["a", "b"]
+    assert table.to_records() == RECORDS
@@ -0,0 +1,34 @@
+# python
+import base64
+import json
+import zlib
+
+# Py-HaloPSA
+from halo_psa.api import HaloAPI
+from halo_psa.core.cassette import (
+    REDACTED,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+
+def _bodies(path: str) -> list[dict]:
+    with open(path) as f:
+        entries = [json.loads(line) for line in f][1:]
+    return [
+        json.loads(zlib.decompress(base64.b64decode(e["response"]["body"])))
+        for e in entries
+    ]
+
+
+def test_records_payloads_and_redacts_credentials(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = RecordingTransport(path)
+    live = HaloAPI(transport=recorder).get("assets")
+    recorder.close()
+    token, assets = _bodies(path)
+    assert token["access_token"] == REDACTED
+    assert assets["assets"] == live
+    assert {a["client_id"] for a in assets["assets"]} != {REDACTED}
+    replayed = HaloAPI(transport=ReplayTransport(path)).get("assets")
+    assert replayed == live
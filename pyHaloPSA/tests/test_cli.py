@@ -0,0 +1,38 @@
+# python
+import json
+import os
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa import cli
+from halo_psa.config import settings
+
+
+def test_dump_auto_tune_saves_page_sizes(server, tmp_path):
+    server.halo.records = MockHalo({"assets": 500}).records
+    tuning = os.path.expanduser(settings.PAGE_TUNING_FILE)
+    if os.path.exists(tuning):
+        os.remove(tuning)
+    out = tmp_path / "assets.ndjson"
+    status = cli.main(
+        ["dump", "assets", "--auto-tune", "-q", "-p", "64", "-o", str(out)]
+    )
+    assert status == 0
+    ids = [json.loads(line)["id"] for line in out.read_text().splitlines()]
+    assert ids == list(range(1, 501))
+    with open(tuning) as f:
+        assert any(key.startswith("assets") for key in json.load(f))
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [["dump", "assets", "--filter", "bogus=1"], ["dump", "bogus"]],
+)
+def test_dump_rejected_before_the_output_is_opened(tmp_path, argv):
+    out = tmp_path / "keep.csv"
+    out.write_text("id\n1\n")
+    assert cli.main(argv + ["-o", str(out)]) == 2
+    assert out.read_text() == "id\n1\n"
@@ -0,0 +1,52 @@
+# python
+from time import monotonic
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import Deadline, DeadlineExceeded
+
+
+def test_budget_runs_out():
+    deadline = Deadline(0.2)
+    assert Deadline.of(deadline) is deadline
+    assert Deadline.of(None) is None
+    assert 0 < deadline.timeout("a request", limit=0.05) <= 0.05
+    with pytest.raises(DeadlineExceeded):
+        deadline.sleep(1.0, "a retry")
+    expired = Deadline(0)
+    assert expired.expired
+    assert expired.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded) as raised:
+        expired.check("a page")
+    assert not raised.value.retryable
+
+
+@pytest.fixture
+def slow_assets(server, monkeypatch) -> HaloAPI:
+    server.halo.records = MockHalo({"assets": 200}).records
+    api = HaloAPI()
+    api.connect()
+    monkeypatch.setattr(server.halo, "latency", 0.05)
+    return api
+
+
+def test_get_all_stops_at_the_deadline(slow_assets):
+    started = monotonic()
+    with pytest.raises(DeadlineExceeded) as raised:
+        slow_assets.get_all("assets", page_size=10, deadline=0.3)
+    assert monotonic() - started < 1.0
+    partial = raised.value.partial
+    assert 0 < len(partial) < 200
+    assert [r["id"] for r in partial] == list(range(1, len(partial) + 1))
+
+
+def test_get_all_partial_returns_the_records_so_far(slow_assets):
+    records = slow_assets.get_all(
+        "assets", page_size=10, deadline=0.3, partial=True
+    )
+    assert 0 < len(records) < 200
+    assert len(slow_assets.get_all("assets", page_size=100)) == 200
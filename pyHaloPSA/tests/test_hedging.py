@@ -0,0 +1,94 @@
+# python
+from time import monotonic, sleep
+from types import SimpleNamespace
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import HedgePolicy
+from halo_psa.core.transport import TransportError
+
+
+def _send(seconds: float):
+    def send() -> SimpleNamespace:
+        sleep(seconds)
+        return SimpleNamespace(elapsed=seconds)
+
+    return send
+
+
+def _warm(policy: HedgePolicy, seconds: float = 0.01) -> None:
+    for _ in range(HedgePolicy.MIN_SAMPLES):
+        policy.send("clients", _send(seconds))
+
+
+def test_no_hedge_until_enough_samples():
+    policy = HedgePolicy(max_extra=1.0)
+    assert policy.delay("clients") is None
+    _warm(policy)
+    assert policy.hedges == 0
+    assert policy.delay("clients") == pytest.approx(0.01, abs=0.005)
+
+
+def test_hedges_are_capped_at_a_share_of_requests():
+    policy = HedgePolicy(max_extra=0.01)
+    for _ in range(100):
+        policy.send("clients", _send(0.001))
+    # one hedge is within 1% of 101 requests, a second is not
+    for _ in range(3):
+        policy.send("clients", _send(0.05))
+    stats = policy.stats()
+    assert stats["hedges"] == 1
+    assert stats["skipped"] == 2
+    policy.close()
+
+
+def test_failure_counts_only_when_both_requests_fail():
+    policy = HedgePolicy(max_extra=1.0)
+    _warm(policy)
+    calls = []
+
+    def send() -> SimpleNamespace:
+        calls.append(None)
+        if len(calls) == 1:
+            sleep(0.05)
+            raise TransportError("first")
+        return SimpleNamespace(elapsed=0.001)
+
+    assert policy.send("clients", send).elapsed == 0.001
+    assert policy.wins == 1
+
+    def fail() -> None:
+        sleep(0.05)
+        raise TransportError("down")
+
+    with pytest.raises(TransportError):
+        policy.send("clients", fail)
+    policy.close()
+
+
+def test_hedge_wins_against_a_slow_server(server, monkeypatch):
+    server.halo.records = MockHalo({"clients": 100}).records
+    route, stalled = server.halo._route, []
+
+    def stall_once(method: str, path: str, query: dict) -> tuple:
+        # the first request for client 7 is stuck behind a slow server
+        if path.endswith("/7") and not stalled:
+            stalled.append(path)
+            sleep(1.0)
+        return route(method, path, query)
+
+    monkeypatch.setattr(server.halo, "_route", stall_once)
+    api = HaloAPI(hedge=HedgePolicy(percentile=90, max_extra=0.5))
+    for pk in range(10, 10 + HedgePolicy.MIN_SAMPLES):
+        api.get("clients", pk=pk)
+    started = monotonic()
+    assert api.get("clients", pk=7)["id"] == 7
+    assert monotonic() - started < 0.5
+    stats = api.hedge.stats()
+    assert (stats["hedges"], stats["wins"]) == (1, 1)
+    assert api.metrics.get("clients")["hedge_wins"] == 1
+    api.hedge.close()
@@ -0,0 +1,90 @@
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import HistoryStore
+
+DAYS = [f"2026-01-0{day}" for day in range(1, 8)]
+
+
+@pytest.fixture
+def store() -> HistoryStore:
+    with HistoryStore(":memory:", checkpoint=3) as store:
+        yield store
+
+
+def _kinds(store: HistoryStore, record: int) -> list[str]:
+    rows = store._db.execute(
+        "SELECT kind FROM changes WHERE resource = 'clients' AND record = ? "
+        "ORDER BY version",
+        (record,),
+    )
+    return [kind for (kind,) in rows]
+
+
+def test_versions_store_only_changes(store):
+    clients = [{"id": i, "name": f"Client {i}", "site": None} for i in (1, 2)]
+    first = store.commit("clients", clients, taken_at=DAYS[0])
+    assert (first["added"], first["changed"], first["removed"]) == (2, 0, 0)
+    same = store.commit("clients", clients, taken_at=DAYS[1])
+    assert (same["added"], same["changed"], same["stored_bytes"]) == (0, 0, 0)
+    renamed = [{**clients[0], "name": "Renamed"}, {"id": 3, "name": "New"}]
+    third = store.commit("clients", renamed, taken_at=DAYS[2])
+    assert (third["added"], third["changed"], third["removed"]) == (1, 1, 1)
+    assert [v["records"] for v in store.versions("clients")] == [2, 2, 2]
+
+    assert store.as_of("clients", "2025-12-31") == {}
+    assert store.as_of("clients", DAYS[1]) == {c["id"]: c for c in clients}
+    latest = store.as_of("clients")
+    assert latest == store.as_of("clients", DAYS[2])
+    assert latest == {1: renamed[0], 3: renamed[1]}
+    assert store.get("clients", 2) is None
+    assert store.get("clients", 2, DAYS[0]) == clients[1]
+    history = store.history("clients", 1)
+    assert [(h["change"], h["fields"]) for h in history] == [
+        ("added", ["id", "name", "site"]),
+        ("changed", ["name"]),
+    ]
+    assert [h["change"] for h in store.history("clients", 2)] == [
+        "added",
+        "removed",
+    ]
+
+
+def test_long_delta_chains_are_checkpointed(store):
+    for day, when in enumerate(DAYS):
+        store.commit("clients", [{"id": 1, "visits": day}], taken_at=when)
+    assert _kinds(store, 1) == [
+        "full",
+        "delta",
+        "delta",
+        "full",
+        "delta",
+        "delta",
+        "full",
+    ]
+    for day, when in enumerate(DAYS):
+        assert store.as_of("clients", when) == {1: {"id": 1, "visits": day}}
+
+
+def test_record_history_commits_the_resource(server, tmp_path):
+    server.halo.records = MockHalo({"clients": 50}).records
+    api = HaloAPI()
+    with HistoryStore(str(tmp_path / "history.db")) as store:
+        assert api.record_history("clients", store)["added"] == 50
+        server.halo.change("clients", 7, name="Renamed Ltd")
+        server.halo.change("clients", 9, deleted=True)
+        version = api.record_history("clients", store)
+        assert (version["changed"], version["removed"]) == (1, 1)
+        assert store.as_of("clients")[7]["name"] == "Renamed Ltd"
+        assert 9 not in store.as_of("clients")
+        assert (
+            len(
+                store.as_of(
+                    "clients", store.versions("clients")[0]["taken_at"]
+                )
+            )
+            == 50
+        )
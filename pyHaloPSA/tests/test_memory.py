@@ -0,0 +1,84 @@
+# python
+import threading
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import MemoryGovernor
+from halo_psa.core.transport import TransportTimeout
+
+
+def _acquire_later(
+    governor: MemoryGovernor, records: int, admitted: list
+) -> threading.Thread:
+    def acquire() -> None:
+        admitted.append(governor.acquire("assets", records, timeout=5))
+
+    thread = threading.Thread(target=acquire, daemon=True)
+    thread.start()
+    thread.join(0.1)
+    return thread
+
+
+def test_requests_wait_for_room_in_the_budget():
+    governor = MemoryGovernor(0)
+    governor.budget = 2 * governor.estimate("assets", 10)
+    first = governor.acquire("assets", 10)
+    governor.acquire("assets", 10)
+    waiting = _acquire_later(governor, 10, [])
+    assert waiting.is_alive()
+    assert governor.delayed == 1
+    governor.release(first)
+    waiting.join(1)
+    assert not waiting.is_alive()
+    assert governor.stats()["active"] == 2
+    assert governor.peak == governor.budget
+
+
+def test_first_request_is_admitted_whatever_its_size():
+    governor = MemoryGovernor(1)
+    reservation = governor.acquire("assets", 1000)
+    assert reservation.bytes > governor.budget
+    with pytest.raises(TransportTimeout):
+        governor.acquire("assets", 1, timeout=0.05)
+    governor.release(reservation)
+    governor.release(reservation)
+    assert governor.in_flight == 0
+    assert governor.active == 0
+
+
+def test_waiting_requests_are_admitted_in_order():
+    governor = MemoryGovernor(0)
+    governor.budget = governor.estimate("assets", 100)
+    held = governor.acquire("assets", 100)
+    admitted = []
+    large = _acquire_later(governor, 100, admitted)
+    small = _acquire_later(governor, 1, admitted)
+    # the small page would fit next to the large one, but waits behind it
+    assert large.is_alive() and small.is_alive()
+    governor.release(held)
+    large.join(1)
+    assert not large.is_alive()
+    small.join(0.1)
+    assert small.is_alive()
+    governor.release(admitted[0])
+    small.join(1)
+    assert [r.records for r in admitted] == [100, 1]
+
+
+def test_get_all_stays_within_the_budget(server):
+    server.halo.records = MockHalo({"assets": 2000}).records
+    governor = MemoryGovernor(0)
+    # the default estimate is well above a mock page; room for about two
+    governor.budget = governor.estimate("assets", 100) // 3
+    api = HaloAPI(governor=governor)
+    records = api.get_all("assets", page_size=100, concurrency=8)
+    assert [r["id"] for r in records] == list(range(1, 2001))
+    stats = governor.stats()
+    assert stats["delayed"] > 0
+    assert stats["peak_active"] < 8
+    assert stats["in_flight"] == 0
+    assert stats["record_bytes"]["assets"] > 0
@@ -0,0 +1,22 @@
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+
+
+def test_bare_list_resource_reads_every_page(server):
+    # agents are returned as a bare list, without a record count
+    server.halo.records = MockHalo({"agents": 250}).records
+    api = HaloAPI()
+    pages = api.paginate("agents", page_size=100)
+    records = [record for page in pages for record in page]
+    assert [r["id"] for r in records] == list(range(1, 251))
+    assert pages.record_count is None
+    assert pages.pages == 3
+    assert len(api.get_all("agents")) == 250
+
+
+def test_bare_list_resource_stops_on_an_empty_page(server):
+    server.halo.records = MockHalo({"agents": 200}).records
+    pages = HaloAPI().paginate("agents", page_size=100, concurrency=4)
+    assert sum(len(page) for page in pages) == 200
+    assert pages.pages == 3
@@ -0,0 +1,71 @@
+# python
+from time import monotonic
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core.transport import HTTPStatusError
+
+
+# module level, so worker processes can load it
+def tag(record: dict) -> dict | None:
+    if record["id"] % 2:
+        return None
+    return {**record, "even": True}
+
+
+@pytest.fixture
+def api(server) -> HaloAPI:
+    server.halo.records = MockHalo({"assets": 1234}).records
+    return HaloAPI()
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_records_reach_the_sink_in_order(api, processes):
+    pages = []
+    pipeline = api.pipeline(
+        "assets",
+        pages.append,
+        transforms=tag,
+        processes=processes,
+        page_size=100,
+        concurrency=4,
+        queue_size=2,
+    )
+    pipeline.run()
+    ids = [record["id"] for page in pages for record in page]
+    assert ids == list(range(2, 1235, 2))
+    assert all(record["even"] for page in pages for record in page)
+    assert pipeline.records == 617
+    assert pipeline.stats["fetch"].pages == 13
+    assert pipeline.stats["decode"].records == 1234
+
+
+def test_sink_error_stops_every_stage(api):
+    written = []
+
+    def sink(records: list[dict]) -> None:
+        if written:
+            raise RuntimeError("disk full")
+        written.append(records)
+
+    pipeline = api.pipeline("assets", sink, page_size=10, concurrency=4)
+    started = monotonic()
+    with pytest.raises(RuntimeError, match="disk full"):
+        pipeline.run()
+    assert monotonic() - started < 5
+    assert pipeline.stats["fetch"].pages < 124
+
+
+def test_transform_and_fetch_errors_are_raised(api, server):
+    def fail(record: dict) -> dict:
+        raise ValueError(record["id"])
+
+    with pytest.raises(ValueError):
+        api.pipeline("assets", list, transforms=fail).run()
+    server.halo.records = {}
+    with pytest.raises(HTTPStatusError):
+        api.pipeline("assets", list).run()
@@ -0,0 +1,28 @@
+# python
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.api.planner import SEQUENTIAL, SINGLE, Planner
+
+
+def test_plan_without_a_record_count_reads_every_page(server):
+    # agents are returned as a bare list, without a record count
+    server.halo.records = MockHalo({"agents": 250}).records
+    planner = Planner(HaloAPI(), path=None)
+    for _ in range(2):
+        plan = planner.plan("agents", page_size=100)
+        assert plan.strategy == SEQUENTIAL
+        assert plan.record_count is None
+        assert not plan.alternatives
+        assert len(plan.run()) == 250
+        assert plan.actual["requests"] == 3
+    with pytest.raises(ValueError):
+        planner.plan("agents", strategy=SINGLE)
+
+
+def test_plan_summary_counts_one_request(server):
+    server.halo.records = MockHalo({"clients": 10}).records
+    plan = Planner(HaloAPI(), path=None).plan("clients", strategy=SINGLE)
+    assert "10 records in 1 request (" in plan.summary()
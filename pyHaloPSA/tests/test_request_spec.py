@@ -0,0 +1,54 @@
+# 3rd party
+import pytest
+import requests
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core import RequestSpec
+
+URL = "https://halo.example.com/api/Asset"
+
+
+def test_query_is_encoded_like_requests():
+    # in sorted order, which requests keeps and the spec sorts into
+    params = {"count": 5000, "flag": True, "search": "a b&c", "skip": None}
+    spec = RequestSpec(URL, params)
+    prepared = requests.Request("GET", URL, params=params).prepare()
+    assert spec.full_url == prepared.url
+    assert spec.params == (
+        ("count", "5000"),
+        ("flag", "True"),
+        ("search", "a b&c"),
+    )
+
+
+def test_merge_overrides_and_removes():
+    spec = RequestSpec(URL, {"count": 10, "search": "x"}, {"A": "1"})
+    assert spec.merge({}) is spec
+    merged = spec.merge({"page_no": 2, "search": None}, {"A": None, "B": 2})
+    assert merged.query == "count=10&page_no=2"
+    assert merged.headers == (("B", "2"),)
+    assert spec.query == "count=10&search=x"
+    assert spec.with_pk(7).full_url == f"{URL}/7"
+    assert spec.header_dict({"Authorization": "t"}) == {
+        "Authorization": "t",
+        "A": "1",
+    }
+
+
+def test_equal_specs_send_the_same_request():
+    a = RequestSpec(URL, {"b": 2, "a": 1}, {"X": "1"})
+    b = RequestSpec(URL, {"a": "1"}).merge({"b": 2}, {"X": 1})
+    assert a == b
+    assert hash(a) == hash(b)
+    assert len({a, b}) == 1
+    assert a != RequestSpec(URL, {"a": 1, "b": 2})
+    with pytest.raises(AttributeError):
+        a.url = URL
+
+
+def test_filters_reach_the_server(server):
+    server.halo.records = MockHalo({"clients": 50}).records
+    clients = HaloAPI().get_all("clients", params={"search": "client 4"})
+    assert [client["id"] for client in clients] == [4, *range(40, 50)]
@@ -0,0 +1,78 @@
+# python
+from threading import Event, Thread
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core.scheduler import BULK, INTERACTIVE, RequestScheduler
+from halo_psa.core.transport import TransportTimeout
+
+
+def _acquire_later(scheduler, priority, resource=None) -> Event:
+    granted = Event()
+
+    def run():
+        scheduler.acquire(priority, resource, timeout=5)
+        granted.set()
+
+    Thread(target=run, daemon=True).start()
+    return granted
+
+
+def test_bulk_lane_leaves_reserved_slots():
+    scheduler = RequestScheduler(max_concurrency=3, reserved=1)
+    scheduler.acquire("bulk")
+    scheduler.acquire("bulk")
+    with pytest.raises(TransportTimeout):
+        scheduler.acquire("bulk", timeout=0.05)
+    scheduler.acquire("interactive", timeout=0.05)
+    stats = scheduler.stats()
+    assert stats["active"] == 3
+    assert stats["lanes"]["bulk"]["active"] == 2
+    assert stats["lanes"]["bulk"]["limit"] == 2
+
+
+def test_freed_slot_goes_to_the_highest_priority():
+    scheduler = RequestScheduler(max_concurrency=1, reserved=0)
+    scheduler.acquire(BULK)
+    bulk = _acquire_later(scheduler, BULK)
+    assert not bulk.wait(0.1)
+    interactive = _acquire_later(scheduler, INTERACTIVE)
+    assert not interactive.wait(0.1)
+    scheduler.release(BULK)
+    assert interactive.wait(5)
+    assert not bulk.is_set()
+    scheduler.release(INTERACTIVE)
+    assert bulk.wait(5)
+    scheduler.release(BULK)
+
+
+def test_resource_bulkhead():
+    scheduler = RequestScheduler(
+        max_concurrency=4, reserved=0, resource_limits={"assets": 1}
+    )
+    with scheduler.slot("bulk", resource="assets"):
+        with pytest.raises(TransportTimeout):
+            scheduler.acquire("bulk", resource="assets", timeout=0.05)
+        with scheduler.slot("bulk", resource="tickets", timeout=0.05):
+            assert scheduler.stats()["active"] == 2
+    assert scheduler.stats()["active"] == 0
+
+
+def test_unknown_priority():
+    with pytest.raises(ValueError):
+        RequestScheduler().acquire("urgent")
+
+
+def test_api_requests_release_their_slots(server):
+    server.halo.records = MockHalo({"agents": 30}).records
+    api = HaloAPI(scheduler=RequestScheduler(max_concurrency=2, reserved=1))
+    assert len(api.get_all("agents", page_size=10)) == 30
+    api.get("agents", 1)
+    stats = api.scheduler.stats()
+    assert stats["active"] == 0
+    assert stats["lanes"]["bulk"]["granted"] > 0
+    assert stats["lanes"]["default"]["granted"] > 0
@@ -0,0 +1,75 @@
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.core.snapshot import MAGIC, Snapshot, write_snapshot
+
+FIELDS = {"id": "int", "name": "str", "score": "float", "inactive": "bool"}
+
+
+def test_write_and_open_round_trip(tmp_path):
+    path = str(tmp_path / "clients.halosnap")
+    records = [
+        {"id": 3, "name": "c", "score": 1.5, "inactive": True},
+        {"id": 1, "name": "a", "score": None, "inactive": False},
+        {"id": 2, "name": "a", "score": 0.0, "inactive": None, "x": 1},
+    ]
+    write_snapshot(path, "clients", records, FIELDS, created_at=100.0)
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot.resource == "clients"
+        assert snapshot.created_at == 100.0
+        assert snapshot.fields == FIELDS
+        assert snapshot.to_list() == [
+            {k: r.get(k) for k in FIELDS} for r in records
+        ]
+        assert snapshot.get(1)["name"] == "a"
+        assert snapshot[-1]["id"] == 2
+        assert snapshot.get(4) is None
+        assert snapshot.is_stale(60)
+
+
+@pytest.mark.parametrize(
+    "value, flag",
+    [
+        ("false", False),
+        ("0", False),
+        (b"no", False),
+        ("True", True),
+        (1, True),
+    ],
+)
+def test_bool_strings_are_parsed(tmp_path, value, flag):
+    path = str(tmp_path / "flags.halosnap")
+    write_snapshot(path, "clients", [{"id": 1, "inactive": value}], FIELDS)
+    with Snapshot(path) as snapshot:
+        assert snapshot.get(1)["inactive"] is flag
+
+
+def test_unknown_bool_string_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(
+            str(tmp_path / "flags.halosnap"),
+            "clients",
+            [{"id": 1, "inactive": "maybe"}],
+            FIELDS,
+        )
+
+
+@pytest.mark.parametrize("content", [MAGIC, b"NOTASNAPSHOT" * 20])
+def test_other_files_are_rejected(tmp_path, content):
+    path = tmp_path / "bad.halosnap"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
+
+
+def test_api_snapshot_holds_every_record(server, tmp_path):
+    server.halo.records = MockHalo({"clients": 300}).records
+    api = HaloAPI()
+    path = api.snapshot("clients", path=str(tmp_path / "clients.halosnap"))
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 300
+        assert snapshot.get(300)["id"] == 300
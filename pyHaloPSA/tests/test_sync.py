@@ -0,0 +1,46 @@
+# python
+import json
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+from halo_psa.api.sync import DONE
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_shards_merge_into_every_record_in_order(server, tmp_path, processes):
+    server.halo.records = MockHalo({"assets": 1050}).records
+    sync = HaloAPI().sync(
+        "assets",
+        queue=str(tmp_path / "sync.db"),
+        processes=processes,
+        shard_pages=2,
+        page_size=100,
+    )
+    sync.run(poll=0.05)
+    shards = sync.queue.shards(sync.job)
+    assert len(shards) == 6
+    assert {shard["status"] for shard in shards} == {DONE}
+    ids = [record["id"] for record in sync.records()]
+    assert ids == list(range(1, 1051))
+    merged = sync.merge(str(tmp_path / "assets.ndjson"))
+    with open(merged) as f:
+        assert [json.loads(line)["id"] for line in f] == ids
+    assert sync.status()["records"] == 1050
+    sync.cleanup()
+
+
+def test_resource_without_a_record_count_is_one_shard(server, tmp_path):
+    server.halo.records = MockHalo({"agents": 250}).records
+    sync = HaloAPI().sync(
+        "agents",
+        queue=str(tmp_path / "sync.db"),
+        processes=None,
+        page_size=100,
+    )
+    sync.run(poll=0.05)
+    assert len(sync.paths()) == 1
+    assert [r["id"] for r in sync.records()] == list(range(1, 251))
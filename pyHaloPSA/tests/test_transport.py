@@ -0,0 +1,31 @@
+# python
+import gzip
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from halo_psa.core.transport import (
+    ContentEncodingError,
+    TransportError,
+    decode_stream,
+)
+
+
+def test_gzip_body_decodes_across_chunks():
+    raw = gzip.compress(b'{"id": 1}' * 1000)
+    chunks = [raw[i : i + 100] for i in range(0, len(raw), 100)]
+    content, wire_bytes = decode_stream(chunks, "gzip")
+    assert content == b'{"id": 1}' * 1000
+    assert wire_bytes == len(raw)
+
+
+@pytest.mark.parametrize(
+    "chunks, encoding",
+    [([b"body"], "compress"), ([b"not gzip at all"], "gzip")],
+)
+def test_undecodable_body_is_a_transport_error(chunks, encoding):
+    with pytest.raises(ContentEncodingError) as raised:
+        decode_stream(chunks, encoding)
+    assert isinstance(raised.value, TransportError)
+    assert not raised.value.retryable
@@ -0,0 +1,80 @@
+# python
+import json
+
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from halo_psa.api import HaloAPI
+from halo_psa.api.webhooks import WebhookReceiver
+
+
+@pytest.fixture
+def receiver() -> WebhookReceiver:
+    return WebhookReceiver(HaloAPI(), secret="")
+
+
+@pytest.mark.parametrize(
+    "payload, resource",
+    [
+        ({"event": "Ticket Updated", "object_id": 3}, "tickets"),
+        ({"event": "Tickets Updated", "object_id": 3}, "tickets"),
+        ({"event": "Client Deleted", "object_id": 3}, "clients"),
+        ({"event": "Clients Updated", "object_id": 3}, "clients"),
+        ({"event": "Updated", "supplier": {"id": 3}}, "suppliers"),
+    ],
+)
+def test_event_names_singular_or_plural(receiver, payload, resource):
+    (event,) = receiver.parse(json.dumps(payload).encode())
+    assert (event.resource, event.pk) == (resource, 3)
+
+
+def test_record_that_is_not_an_object_is_rejected(receiver):
+    body = json.dumps({"resource": "clients", "record": 5}).encode()
+    with pytest.raises(ValueError):
+        receiver.parse(body)
+    status, _ = receiver.handle(body, {})
+    assert status == 400
+
+
+@pytest.mark.parametrize(
+    "payload, record",
+    [
+        (
+            {
+                "event": "Asset Updated",
+                "client_id": 1,
+                "id": 2,
+                "client": {"id": 1, "name": "x"},
+            },
+            None,
+        ),
+        (
+            {
+                "event": "Asset Updated",
+                "client": {"id": 1},
+                "asset": {"id": 2},
+            },
+            {"id": 2},
+        ),
+    ],
+)
+def test_event_name_decides_over_embedded_records(receiver, payload, record):
+    (event,) = receiver.parse(json.dumps(payload).encode())
+    assert (event.resource, event.pk, event.record) == ("assets", 2, record)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"resource": 5, "object_id": 2},
+        {"resource": "assets", "object_id": {"a": 1}},
+        {"resource": "assets", "object_id": "two"},
+    ],
+)
+def test_malformed_event_is_answered_with_400(receiver, payload):
+    body = json.dumps(payload).encode()
+    with pytest.raises(ValueError):
+        receiver.parse(body)
+    status, _ = receiver.handle(body, {})
+    assert status == 400
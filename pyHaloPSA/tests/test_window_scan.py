@@ -0,0 +1,45 @@
+# 3rd party
+import pytest
+
+# Py-HaloPSA
+from benchmarks.mock_halo import MockHalo
+from halo_psa.api import HaloAPI
+
+START, END = "2025-01-01T00:00:00", "2025-01-04T00:00:00"
+
+
+@pytest.fixture
+def tickets(server) -> list[dict]:
+    server.halo.records = MockHalo({"tickets": 3000}).records
+    return server.halo.records["tickets"]
+
+
+def expected(tickets: list[dict], start: str, end: str) -> list[int]:
+    return [t["id"] for t in tickets if start <= t["dateoccurred"] < end]
+
+
+def test_windows_hold_every_record_once_in_date_order(tickets):
+    scan = HaloAPI().scan("tickets", START, END, target=200)
+    records = [record for window in scan for record in window]
+    assert [r["id"] for r in records] == expected(tickets, START, END)
+    assert scan.record_count == len(records)
+    assert scan.windows > 1
+
+
+def test_full_windows_are_split_then_paged(tickets):
+    end = "2025-01-01T01:00:00"
+    scan = HaloAPI().scan("tickets", START, end, concurrency=2)
+    # the first minute holds more tickets than one request returns
+    scan.cap = 32
+    records = [record for window in scan for record in window]
+    assert [r["id"] for r in records] == expected(tickets, START, end)
+    assert scan.splits > 0
+    assert scan.requests > scan.windows + scan.splits
+
+
+def test_boundary_record_belongs_to_the_later_window(tickets):
+    start, end = tickets[99]["dateoccurred"], tickets[499]["dateoccurred"]
+    ids = [r["id"] for w in HaloAPI().scan("tickets", start, end) for r in w]
+    assert ids == expected(tickets, start, end)
+    assert ids[0] == 100
+    assert 500 not in ids